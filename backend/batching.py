@@ -0,0 +1,37 @@
+import os
+from typing import List, Sequence, Tuple
+
+# Rough prompt budget for one batched LLM call, in tokens (input citations plus expected output).
+LLM_BATCH_TOKEN_BUDGET = int(os.getenv("LLM_BATCH_TOKEN_BUDGET", "3000"))
+# Upper bound on citations per batched call; 1 disables batching.
+LLM_BATCH_MAX_ITEMS = max(1, int(os.getenv("LLM_BATCH_MAX_ITEMS", "20")))
+# Expected output tokens for one structured citation in the JSON array.
+OUTPUT_TOKENS_PER_ITEM = 100
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) good enough for sizing batches."""
+    return len(text) // 4 + 1
+
+
+def plan_batches(texts: Sequence[str], token_budget: int = None, max_items: int = None) -> List[List[Tuple[int, str]]]:
+    """
+    Groups texts into consecutive batches of (index, text) pairs that fit the token budget.
+    A single text larger than the budget still gets a batch of its own.
+    """
+    token_budget = token_budget or LLM_BATCH_TOKEN_BUDGET
+    max_items = max_items or LLM_BATCH_MAX_ITEMS
+
+    batches: List[List[Tuple[int, str]]] = []
+    current: List[Tuple[int, str]] = []
+    current_tokens = 0
+    for index, text in enumerate(texts):
+        cost = estimate_tokens(text) + OUTPUT_TOKENS_PER_ITEM
+        if current and (current_tokens + cost > token_budget or len(current) >= max_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append((index, text))
+        current_tokens += cost
+    if current:
+        batches.append(current)
+    return batches
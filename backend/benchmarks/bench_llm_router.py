@@ -0,0 +1,86 @@
+"""
+Latency of LLM routing with a slow tail and during a provider outage, using simulated backends.
+
+The primary answers in `--latency` seconds but one call in `--tail-rate` takes `--tail` seconds;
+the secondary is steadily a little slower. Compares the primary alone with failover, hedged and
+racing composites, then repeats with the primary failing every call. Run from the backend directory:
+
+    python benchmarks/bench_llm_router.py [--calls 400] [--concurrency 20]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import llm_router  # noqa: E402
+from llm_backends import LLMBackend  # noqa: E402
+from llm_router import CompositeBackend  # noqa: E402
+
+
+class SimulatedBackend(LLMBackend):
+    def __init__(self, model_name: str, latency: float, tail: float, tail_rate: float, failing: bool, rng: random.Random):
+        super().__init__(model_name)
+        self.provider = model_name
+        self.latency, self.tail, self.tail_rate, self.failing, self.rng = latency, tail, tail_rate, failing, rng
+        self.calls = 0
+
+    async def generate(self, prompt: str) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.tail if self.rng.random() < self.tail_rate else self.latency * self.rng.uniform(0.8, 1.2))
+        if self.failing:
+            raise RuntimeError("503 Service Unavailable")
+        return "ok"
+
+
+async def measure(backend: LLMBackend, calls: int, concurrency: int):
+    slots = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one():
+        nonlocal errors
+        async with slots:
+            started = time.perf_counter()
+            try:
+                await backend.generate("prompt")
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one() for _ in range(calls)))
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+    return pick(0.5), pick(0.99), errors
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--tail", type=float, default=1.0)
+    parser.add_argument("--tail-rate", type=float, default=0.05)
+    args = parser.parse_args()
+    llm_router.LLM_HEDGE_MIN_DELAY = 0.0
+    llm_router.LLM_HEDGE_DEFAULT_DELAY = args.latency * 3
+
+    for outage in (False, True):
+        print("primary failing every call" if outage else f"primary with a {args.tail_rate:.0%} tail of {args.tail}s")
+        for routing in ("single", "failover", "hedged", "race"):
+            llm_router._health.clear()
+            rng = random.Random(1)
+            primary = SimulatedBackend("primary", args.latency, args.tail, args.tail_rate, outage, rng)
+            secondary = SimulatedBackend("secondary", args.latency * 1.5, args.tail, args.tail_rate / 5, False, rng)
+            backend = primary if routing == "single" else CompositeBackend([primary, secondary], routing)
+            started = time.perf_counter()
+            p50, p99, errors = await measure(backend, args.calls, args.concurrency)
+            elapsed = time.perf_counter() - started
+            extra = (primary.calls + secondary.calls) / args.calls - 1
+            print(f"  {routing:9s} p50 {p50 * 1000:7.1f} ms  p99 {p99 * 1000:7.1f} ms  errors {errors:4d}  extra calls {extra:6.1%}  wall {elapsed:5.2f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,115 @@
+"""
+Build time, size and lookup latency of the offline bibliographic index on synthetic records.
+
+Titles are drawn from a Zipf-distributed vocabulary so common words have long posting lists,
+as in real dumps. Run from the backend directory:
+
+    python benchmarks/bench_local_index.py [--records 2000000] [--queries 2000] [--index-dir DIR]
+"""
+import argparse
+import itertools
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from local_index import LocalIndex, build_index  # noqa: E402
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "ta", "vo", "si", "de", "pa", "qu", "zen", "tor", "bel", "chi", "gra", "mon", "lex", "fi", "dra"]
+VOCABULARY_SIZE = 60_000
+
+
+def vocabulary(rng: random.Random) -> List[str]:
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        words.add("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(words)
+
+
+def synthetic_titles(count: int, seed: int):
+    rng = random.Random(seed)
+    words = vocabulary(rng)
+    cumulative = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+    for _ in range(count):
+        yield " ".join(rng.choices(words, cum_weights=cumulative, k=rng.randint(5, 12))).capitalize()
+
+
+def synthetic_records(count: int, seed: int):
+    for i, title in enumerate(synthetic_titles(count, seed)):
+        yield (f"10.{5000 + i % 900}/syn.{i}", title, str(1980 + i % 45), f"Journal {i % 5000}", f"Author{i % 100000};Writer{i % 7919}")
+
+
+def percentiles(samples: List[float]) -> str:
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1e6
+    return f"p50 {pick(0.5):8.1f} us  p95 {pick(0.95):8.1f} us  p99 {pick(0.99):8.1f} us  mean {statistics.mean(samples) * 1e6:8.1f} us"
+
+
+def timed(queries: List, lookup: Callable) -> List:
+    latencies, results = [], []
+    for query in queries:
+        started = time.perf_counter()
+        results.append(lookup(query))
+        latencies.append(time.perf_counter() - started)
+    return latencies, results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=2_000_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--index-dir", help="Keep the index here (reused if it already exists) instead of a temporary directory.")
+    args = parser.parse_args()
+
+    index_dir = args.index_dir or tempfile.mkdtemp(prefix="local-index-")
+    try:
+        if not os.path.exists(os.path.join(index_dir, "meta.json")):
+            started = time.perf_counter()
+            build_index(synthetic_records(args.records, args.seed), index_dir)
+            elapsed = time.perf_counter() - started
+            print(f"built {args.records:,} records in {elapsed:.1f}s ({args.records / elapsed:,.0f} records/s)")
+        size = sum(os.path.getsize(os.path.join(index_dir, name)) for name in os.listdir(index_dir))
+        print(f"index size {size / 1e6:.1f} MB ({size / args.records:.0f} bytes/record)")
+
+        index = LocalIndex(index_dir)
+        rng = random.Random(args.seed + 1)
+        sample_ids = rng.sample(range(index.record_count), args.queries)
+        titles = {record_id: index.record(record_id)["title"] for record_id in sample_ids}
+
+        latencies, results = timed([f"10.{5000 + i % 900}/syn.{i}" for i in sample_ids], index.lookup_doi)
+        print(f"DOI hit        {percentiles(latencies)}  found {sum(1 for r in results if r) / len(results):.1%}")
+        latencies, results = timed([f"10.9999/missing.{i}" for i in sample_ids], index.lookup_doi)
+        print(f"DOI miss       {percentiles(latencies)}  found {sum(1 for r in results if r) / len(results):.1%}")
+
+        latencies, results = timed([titles[i] for i in sample_ids], index.search_title)
+        correct = sum(1 for record_id, result in zip(sample_ids, results) if result and result[1]["title"] == titles[record_id])
+        print(f"title exact    {percentiles(latencies)}  correct {correct / len(results):.1%}")
+
+        def perturb(title: str) -> str:
+            words = title.split()
+            if len(words) > 6:
+                del words[rng.randrange(len(words))]
+            return " ".join(words).upper()
+
+        latencies, results = timed([perturb(titles[i]) for i in sample_ids], index.search_title)
+        correct = sum(1 for record_id, result in zip(sample_ids, results) if result and result[1]["title"] == titles[record_id])
+        print(f"title altered  {percentiles(latencies)}  correct {correct / len(results):.1%}")
+
+        unseen = list(synthetic_titles(args.queries, args.seed + 2))
+        latencies, results = timed(unseen, index.search_title)
+        print(f"title unseen   {percentiles(latencies)}  matched {sum(1 for r in results if r) / len(results):.1%}")
+        index.close()
+    finally:
+        if not args.index_dir:
+            shutil.rmtree(index_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
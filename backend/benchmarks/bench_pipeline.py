@@ -0,0 +1,199 @@
+"""
+End-to-end throughput of stream_verification_process on the bundled sample PDFs, fully offline.
+
+doi.org, CrossRef, Semantic Scholar and OpenAlex are answered by standin_server.py from recorded
+responses, the LLM is the deterministic fake backend with a configurable latency, and the database is a
+temporary SQLite file, so results depend only on the code under test and can be compared across commits.
+Reports references/s, per-stage p50/p95 (from the runs' `timing` events) and peak memory. Caches are
+cold for every run unless --warm is given. Run from the backend directory:
+
+    python benchmarks/bench_pipeline.py [--runs 3] [--concurrency 1] [--llm-latency 0.2] [--upstream-latency 0.03]
+    python benchmarks/bench_pipeline.py --output before.json
+    python benchmarks/bench_pipeline.py --compare before.json [--tolerance 0.1]
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from standin_server import FIXTURES, StandinServer  # noqa: E402
+
+SAMPLES = os.path.dirname(FIXTURES)
+UPSTREAMS = ("DOI", "CROSSREF", "SEMANTIC_SCHOLAR", "OPENALEX")
+
+
+def configure_environment(args: argparse.Namespace, upstream_url: str, workdir: str) -> None:
+    """Must run before main is imported: these modules read their configuration at import time."""
+    os.environ.update({
+        "UPSTREAM_OVERRIDE_URL": upstream_url,
+        "FAKE_LLM_ENABLED": "1",
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        "JOB_WORKERS": "0",
+        "HTTP2_ENABLED": "0",
+    })
+    os.environ.pop("REDIS_URL", None)
+    os.environ.pop("LOCAL_INDEX_PATH", None)
+    if not args.warm:
+        os.environ.update({"DOCUMENT_CACHE_ENABLED": "0", "LLM_CACHE_ENABLED": "0",
+                           "VERIFICATION_CACHE_TTL": "0", "VERIFICATION_CACHE_NEGATIVE_TTL": "0"})
+    if not args.realistic_limits:
+        # Measure the pipeline, not the public APIs' politeness limits.
+        for upstream in UPSTREAMS:
+            os.environ[f"{upstream}_RATE_LIMIT"] = os.environ[f"{upstream}_BURST"] = "100000"
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+async def verify_document(main, pdf_content: bytes, model_name: str) -> Dict[str, Any]:
+    references, timing, errors = 0, {}, []
+    async for chunk in main.stream_verification_process(pdf_content, model_name):
+        for message in chunk.split("\n\n")[:-1]:  # a chunk holds every event that was ready
+            event = json.loads(message[len("data: "):])
+            if event["type"] == "reference":
+                references += 1
+            elif event["type"] == "timing":
+                timing = event["payload"]
+            elif event["type"] == "error":
+                errors.append(event["payload"].get("message"))
+    return {"references": references, "timing": timing, "errors": errors}
+
+
+async def run_benchmark(main, documents: List[bytes], args: argparse.Namespace) -> Dict[str, Any]:
+    model_name = f"fake:{args.llm_latency}"
+    jobs = [pdf for _ in range(args.runs) for pdf in documents]
+    slots = asyncio.Semaphore(args.concurrency)
+
+    async def one(pdf: bytes) -> Dict[str, Any]:
+        async with slots:
+            return await verify_document(main, pdf, model_name)
+
+    await main.create_database_schema()  # the API's startup hook; runs are stored as in production
+    await verify_document(main, documents[0], model_name)  # warm-up: imports, pools, worker processes
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one(pdf) for pdf in jobs))
+    elapsed = time.perf_counter() - started
+
+    stages: Dict[str, List[float]] = {}
+    for result in results:
+        for stage, summary in result["timing"].get("stages", {}).items():
+            stages.setdefault(stage, []).append(summary)
+    references = sum(result["references"] for result in results)
+    run_seconds = [result["timing"].get("total_seconds", 0.0) for result in results]
+    return {
+        "documents": len(results),
+        "references": references,
+        "errors": sum(len(result["errors"]) for result in results),
+        "seconds": round(elapsed, 3),
+        "references_per_second": round(references / elapsed, 2),
+        "run_p50_seconds": round(percentile(run_seconds, 0.5), 4),
+        "run_p95_seconds": round(percentile(run_seconds, 0.95), 4),
+        # Per-call percentiles are pooled across runs by taking the runs' p50/p95 medians.
+        "stages": {
+            stage: {
+                "calls": sum(summary["count"] for summary in summaries),
+                "p50_seconds": round(percentile([summary["p50_seconds"] for summary in summaries], 0.5), 4),
+                "p95_seconds": round(percentile([summary["p95_seconds"] for summary in summaries], 0.5), 4),
+            }
+            for stage, summaries in sorted(stages.items())
+        },
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions beyond `tolerance`: lower throughput, or slower run/stage p95s."""
+    regressions = []
+    before, after = baseline["references_per_second"], report["references_per_second"]
+    if after < before * (1 - tolerance):
+        regressions.append(f"references/s {before} -> {after}")
+    checks = [("run p95", baseline["run_p95_seconds"], report["run_p95_seconds"])]
+    checks += [(f"{stage} p95", summary["p95_seconds"], report["stages"].get(stage, {}).get("p95_seconds", 0.0))
+               for stage, summary in baseline["stages"].items()]
+    for label, before, after in checks:
+        # Ignore sub-millisecond stages, where scheduler noise exceeds any tolerance.
+        if after > before * (1 + tolerance) and after - before > 0.001:
+            regressions.append(f"{label} {before}s -> {after}s")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="Passes over the sample PDFs.")
+    parser.add_argument("--concurrency", type=int, default=1, help="Documents verified at the same time.")
+    parser.add_argument("--documents", nargs="*", help="PDFs to verify instead of the bundled samples.")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds per fake LLM call.")
+    parser.add_argument("--upstream-latency", type=float, default=0.03, help="Seconds added to every stand-in response.")
+    parser.add_argument("--fixtures", default=FIXTURES)
+    parser.add_argument("--warm", action="store_true", help="Keep caches between runs.")
+    parser.add_argument("--realistic-limits", action="store_true", help="Keep the default per-upstream rate limits.")
+    parser.add_argument("--trace-memory", action="store_true", help="Also report the Python heap peak (tracemalloc; slows the run).")
+    parser.add_argument("--output", help="Write the report as JSON.")
+    parser.add_argument("--compare", help="Baseline JSON from --output; exit 1 on a regression.")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    paths = args.documents or sorted(os.path.join(SAMPLES, name) for name in os.listdir(SAMPLES) if name.endswith(".pdf"))
+    documents = []
+    for path in paths:
+        with open(path, "rb") as f:
+            documents.append(f.read())
+
+    server = StandinServer(args.fixtures, latency=args.upstream_latency).start()
+    with tempfile.TemporaryDirectory() as workdir:
+        configure_environment(args, server.url, workdir)
+        if args.trace_memory:
+            tracemalloc.start()
+        import main as app  # noqa: E402
+        report = asyncio.run(run_benchmark(app, documents, args))
+        app.shutdown_process_pool()
+    server.stop()
+
+    report["commit"] = git_commit()
+    report["settings"] = {key: getattr(args, key) for key in ("runs", "concurrency", "llm_latency", "upstream_latency", "warm", "realistic_limits")}
+    report["upstream_requests"] = dict(server.counters)
+    report["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    if args.trace_memory:
+        report["peak_heap_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+
+    print(f"commit {report['commit']}: {report['documents']} documents, {report['references']} references in {report['seconds']}s "
+          f"({report['references_per_second']} references/s, {report['errors']} errors)")
+    print(f"run p50 {report['run_p50_seconds']}s  p95 {report['run_p95_seconds']}s  peak RSS {report['peak_rss_mb']} MB"
+          + (f"  peak heap {report['peak_heap_mb']} MB" if args.trace_memory else ""))
+    for stage, summary in report["stages"].items():
+        print(f"  {stage:12s} {summary['calls']:6d} calls  p50 {summary['p50_seconds'] * 1000:9.1f} ms  p95 {summary['p95_seconds'] * 1000:9.1f} ms")
+    print(f"stand-in upstream: {report['upstream_requests']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("settings") != report["settings"]:
+            print(f"warning: baseline settings differ: {baseline.get('settings')}")
+        regressions = compare(report, baseline, args.tolerance)
+        print(f"vs {baseline.get('commit', args.compare)}: " + ("; ".join(regressions) if regressions else "no regression"))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Accuracy and throughput of reference section detection and splitting.
+
+Compares reference_splitter against the previous regex-per-keyword implementation on the
+bundled fixture corpus. Run from the backend directory:
+
+    python benchmarks/bench_reference_splitter.py [--repeat 200]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from typing import Callable, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reference_splitter  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "reference_sections.json")
+
+
+# --- Previous implementation, kept for comparison ---
+def legacy_find_references_section(text: str) -> str:
+    reference_keywords = ["references", "bibliography", "works cited", "literature cited", "參考文獻"]
+    last_found_pos = -1
+    for keyword in reference_keywords:
+        pattern = re.compile(r"^\s*" + re.escape(keyword), re.IGNORECASE | re.MULTILINE)
+        matches = list(pattern.finditer(text))
+        if matches:
+            last_match_pos = matches[-1].start()
+            if last_match_pos > last_found_pos:
+                last_found_pos = last_match_pos
+    return text[last_found_pos:] if last_found_pos != -1 else ""
+
+
+def legacy_parse_references(text: str) -> List[str]:
+    if not text: return []
+    pattern = re.compile(r"^\s*(\[\d+\]|\d+\.)", re.MULTILINE)
+    if not pattern.search(text):
+        lines = text.strip().split('\n')
+        return [line.strip() for line in lines[1:] if line.strip()]
+    split_text = pattern.split(text)
+    return [(split_text[i] + split_text[i+1]).strip().replace('\n', ' ') for i in range(1, len(split_text), 2)]
+
+
+def score(entries: List[str], expected: List[str]) -> float:
+    """Fraction of expected references that came out as their own entry, in order; 0 if the count is wrong."""
+    if len(entries) != len(expected):
+        return 0.0
+    return sum(1 for entry, needle in zip(entries, expected) if needle in entry) / len(expected)
+
+
+def evaluate(name: str, find_section: Callable[[str], str], split: Callable[[str], List[str]], documents, repeat: int) -> None:
+    scores = []
+    for document in documents:
+        entries = split(find_section(document["text"]))
+        scores.append(score(entries, document["expected"]))
+        if scores[-1] < 1.0:
+            print(f"  [{name}] {document['name']}: got {len(entries)} entries, expected {len(document['expected'])}")
+
+    total_chars = sum(len(document["text"]) for document in documents)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for document in documents:
+            split(find_section(document["text"]))
+    elapsed = time.perf_counter() - started
+
+    exact = sum(1 for value in scores if value == 1.0)
+    print(
+        f"{name:<8} accuracy {sum(scores) / len(scores):6.1%}  exact {exact}/{len(documents)}  "
+        f"{repeat * len(documents) / elapsed:9.0f} docs/s  {repeat * total_chars / elapsed / 1e6:6.2f} MB/s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with open(FIXTURES, encoding="utf-8") as f:
+        documents = json.load(f)["documents"]
+
+    print(f"{len(documents)} fixture documents, {args.repeat} rounds")
+    evaluate("legacy", legacy_find_references_section, legacy_parse_references, documents, args.repeat)
+    evaluate("current", reference_splitter.find_references_section, reference_splitter.parse_references, documents, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Export time, peak memory and size of the PDF report against the number of references.
+
+Compares report_generator with the previous implementation (stylesheet rebuilt on every call, one
+setStyle per row for the zebra stripes, one table for all rows, whole PDF in a BytesIO). Time is measured
+untraced; memory is the tracemalloc peak of a second, traced run. Run from the backend directory:
+
+    python benchmarks/bench_report.py [--references 100 500 1000 2000] [--skip-legacy]
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reportlab.lib import colors  # noqa: E402
+from reportlab.lib.pagesizes import landscape, letter  # noqa: E402
+from reportlab.lib.styles import getSampleStyleSheet  # noqa: E402
+from reportlab.lib.units import inch  # noqa: E402
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle  # noqa: E402
+
+import report_generator  # noqa: E402
+
+WORDS = ("adaptive attention benchmark citation clustering contrastive corpus dataset detection diffusion "
+         "embedding evaluation federated graph inference language learning memory network retrieval").split()
+
+
+def report_data(count: int, rng: random.Random) -> dict:
+    statuses = ["Verified"] * 8 + ["Not Found", "Format Error"]
+    references = [{
+        "status": rng.choice(statuses),
+        "authors": [f"{rng.choice('ABCDEFG')}. {rng.choice(WORDS).title()}" for _ in range(rng.randint(1, 5))],
+        "year": rng.randint(1990, 2024),
+        "title": " ".join(rng.sample(WORDS, rng.randint(5, 12))).capitalize(),
+        "source": f"CrossRef: Journal of {rng.choice(WORDS).title()} Research",
+    } for _ in range(count)]
+    return {
+        "references": references,
+        "summary": {"total_references": count, "verified_count": sum(ref["status"] == "Verified" for ref in references),
+                    "not_found_count": sum(ref["status"] == "Not Found" for ref in references),
+                    "format_error_count": sum(ref["status"] == "Format Error" for ref in references)},
+        "paperMetadata": {"title": "Benchmark Paper", "authors": ["A. Author"], "year": 2024, "affiliation": "University"},
+        "language": "en",
+        "model_name": "fake",
+    }
+
+
+# --- Previous implementation, kept for comparison (results table only; the header part is unchanged) ---
+def legacy_report(data) -> io.BytesIO:
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=landscape(letter), topMargin=0.5*inch, bottomMargin=0.5*inch)
+    styles = getSampleStyleSheet()
+    story = [Paragraph("Citation Verification Report", styles['h1']), Spacer(1, 0.2*inch)]
+    body_style, header_style = styles['BodyText'], styles['h4']
+    table_data = [[Paragraph(cell, header_style) for cell in ["Status", "Authors", "Year", "Title", "Source"]]]
+    for ref in data['references']:
+        table_data.append([Paragraph(str(ref.get(key, 'N/A')) if key != 'authors' else ', '.join(ref['authors']), body_style)
+                           for key in ('status', 'authors', 'year', 'title', 'source')])
+    table = Table(table_data, colWidths=[1*inch, 2*inch, 0.5*inch, 3.5*inch, 2*inch], repeatRows=1)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4F81BD')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#DCE6F1')),
+    ]))
+    for i in range(1, len(table_data)):
+        bg_color = colors.white if i % 2 == 0 else colors.HexColor('#DCE6F1')
+        table.setStyle(TableStyle([('BACKGROUND', (0, i), (-1, i), bg_color)]))
+    story.append(table)
+    doc.build(story)
+    buffer.seek(0)
+    return buffer
+
+
+def measure(label: str, generate, data) -> None:
+    started = time.perf_counter()
+    report = generate(data)
+    elapsed = time.perf_counter() - started
+    size = len(report.read())
+    report.close()
+    tracemalloc.start()
+    generate(data).close()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:8s} {len(data['references']):6d} references  {elapsed:7.2f} s  peak {peak / 2 ** 20:7.1f} MB  pdf {size / 1024:7.0f} KB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--references", type=int, nargs="+", default=[100, 500, 1000, 2000])
+    parser.add_argument("--skip-legacy", action="store_true", help="Only run the current implementation (the legacy one is slow on large lists).")
+    parser.add_argument("--seed", type=int, default=20)
+    args = parser.parse_args()
+
+    report_generator.report_styles(False)  # style setup is a one-time cost now; keep it out of the first sample
+    for count in args.references:
+        data = report_data(count, random.Random(args.seed))
+        if not args.skip_legacy:
+            measure("legacy", legacy_report, data)
+        measure("current", report_generator.generate_pdf_report, data)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Events, bytes, writes and encoding time of a verification stream against the size of the bibliography.
+
+Replays a synthetic run (a progress status, a reference and a full summary per reference, like
+verification_events) through the previous encoding (one json.dumps and one write per event) and through
+sse.sse_stream in full and compact mode. References arrive every --arrival seconds, so the progress and
+summary throttling can be seen; --slow-client adds a delay per write and reports the buffer's peak. Run
+from the backend directory:
+
+    python benchmarks/bench_sse.py [--references 100 1000 5000] [--arrival 0.001] [--slow-client 0.01]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sse  # noqa: E402
+
+WORDS = ("adaptive attention benchmark citation clustering contrastive corpus dataset detection diffusion "
+         "embedding evaluation federated graph inference language learning memory network retrieval").split()
+
+
+def reference_payload(index: int, rng: random.Random) -> dict:
+    verified = rng.random() < 0.8
+    return {
+        "raw_text": " ".join(rng.choices(WORDS, k=30)),
+        "status": "Verified" if verified else "Not Found",
+        "authors": [f"{rng.choice('ABCDEFG')}. {rng.choice(WORDS).title()}" for _ in range(rng.randint(1, 5))],
+        "year": rng.randint(1990, 2024),
+        "title": " ".join(rng.sample(WORDS, rng.randint(5, 12))).capitalize(),
+        "source": f"Journal of {rng.choice(WORDS).title()} Research",
+        "verification_score": 97.0 if verified else 0.0,
+        "verified_doi": f"10.1000/{index}" if verified else None,
+        "format_suggestion": None,
+        "source_url": None,
+        "index": index,
+    }
+
+
+async def synthetic_run(count: int, arrival: float, seed: int):
+    rng = random.Random(seed)
+    verified = 0
+    yield {"type": "run", "payload": {"run_id": "0" * 32}}
+    yield {"type": "status", "payload": {"message": "Using model: fake"}}
+    for index in range(count):
+        if arrival:
+            await asyncio.sleep(arrival)
+        reference = reference_payload(index, rng)
+        verified += reference["status"] == "Verified"
+        yield {"type": "status", "payload": {"message": f"Finished reference {index+1} ({index+1}/{count})", "completed": index + 1, "total": count}}
+        yield {"type": "reference", "payload": reference}
+        yield {"type": "summary", "payload": {"total_references": count, "verified_count": verified,
+                                              "not_found_count": index + 1 - verified, "format_error_count": 0}}
+    yield {"type": "end", "payload": {"message": "Verification process complete."}}
+
+
+async def legacy_stream(events):
+    async for event in events:
+        yield f"data: {json.dumps(event)}\n\n"
+
+
+async def measure(label: str, stream, slow_client: float) -> None:
+    writes = events = size = 0
+    started = time.perf_counter()
+    async for chunk in stream:
+        writes += 1
+        events += chunk.count("\n\n")
+        size += len(chunk.encode())
+        if slow_client:
+            await asyncio.sleep(slow_client)
+    elapsed = time.perf_counter() - started
+    print(f"  {label:8s} {events:7d} events  {writes:7d} writes  {size / 1024:8.0f} KB  {elapsed:6.2f} s")
+
+
+async def run(args: argparse.Namespace) -> None:
+    print(f"encoder: {'orjson' if sse.orjson is not None else 'json'}, progress interval {sse.SSE_PROGRESS_INTERVAL}s, buffer {sse.SSE_BUFFER_EVENTS} events")
+    for count in args.references:
+        print(f"{count} references")
+        await measure("legacy", legacy_stream(synthetic_run(count, args.arrival, args.seed)), args.slow_client)
+        for mode in sse.EVENT_MODES:
+            await measure(mode, sse.sse_stream(synthetic_run(count, args.arrival, args.seed), mode), args.slow_client)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--references", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--arrival", type=float, default=0.001, help="Seconds between finished references.")
+    parser.add_argument("--slow-client", type=float, default=0.0, help="Seconds the client takes per write.")
+    parser.add_argument("--seed", type=int, default=22)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
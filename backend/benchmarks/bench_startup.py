@@ -0,0 +1,83 @@
+"""
+Import time of the API (or worker) module against a budget, from `python -X importtime`.
+
+Each run imports the module in a fresh interpreter with a database URL that points nowhere, so it also
+checks that importing touches neither the database nor the modules that are only needed later: the
+report generator, LLM provider SDKs, the PDF reader and the optional fallbacks. Prints the median total,
+the slowest top-level packages and the wall-clock time of the process. Exits 1 when the median exceeds
+--budget-ms or a deferred module was imported. Run from the backend directory:
+
+    python benchmarks/bench_startup.py [--runs 5] [--module main] [--budget-ms 1200]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Loaded on first use (first export, first LLM call of that provider, first PDF, fallback matcher, Redis).
+DEFERRED = ("reportlab", "report_generator", "google.generativeai", "openai", "PyPDF2", "fuzzywuzzy", "redis")
+
+
+def import_once(module: str) -> Tuple[float, List[Tuple[str, int, int]]]:
+    """Wall-clock seconds of the process, and (name, self, cumulative) microseconds per imported module."""
+    env = {**os.environ, "DATABASE_URL": "postgresql+psycopg2://nobody@127.0.0.1:9/nowhere", "JOB_WORKERS": "0"}
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=BACKEND, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        sys.exit(f"import {module} failed:\n{result.stderr[-2000:]}")
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(own), int(cumulative)))
+    return elapsed, modules
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--module", default="main", help="Module to import, e.g. main or worker.")
+    parser.add_argument("--budget-ms", type=float, default=1200.0, help="Limit for the median import time of the module.")
+    parser.add_argument("--top", type=int, default=10, help="Top-level packages to list by import time.")
+    args = parser.parse_args()
+
+    totals, walls, packages = [], [], {}
+    imported = set()
+    for _ in range(args.runs):
+        wall, modules = import_once(args.module)
+        walls.append(wall)
+        totals.append(next(cumulative for name, _, cumulative in modules if name == args.module) / 1000)
+        run_packages: Dict[str, int] = {}
+        for name, own, _ in modules:
+            imported.add(name)
+            root = name.split(".")[0]
+            run_packages[root] = run_packages.get(root, 0) + own
+        for root, own in run_packages.items():
+            packages.setdefault(root, []).append(own / 1000)
+
+    median = lambda values: sorted(values)[len(values) // 2]
+    total = median(totals)
+    print(f"import {args.module}: median {total:.0f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms), "
+          f"process wall-clock {median(walls) * 1000:.0f} ms")
+    for root, values in sorted(packages.items(), key=lambda item: -median(item[1]))[:args.top]:
+        print(f"  {root:24s} {median(values):7.1f} ms")
+
+    loaded = sorted(name for name in imported if any(name == deferred or name.startswith(deferred + ".") for deferred in DEFERRED))
+    failures = []
+    if total > args.budget_ms:
+        failures.append(f"median import time {total:.0f} ms exceeds the budget of {args.budget_ms:.0f} ms")
+    if loaded:
+        failures.append(f"imported at startup: {', '.join(loaded)}")
+    print("; ".join(failures) if failures else "within budget")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Speed and accuracy of TitleMatcher against the former fuzzywuzzy single-candidate check.
+
+Each synthetic reference gets `--top-k` search results: the true record at a random rank and
+decoys that share most of its title words but have another year and other authors, as search
+APIs return for short or generic titles. Run from the backend directory:
+
+    python benchmarks/bench_title_matcher.py [--references 2000] [--top-k 5]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fuzzywuzzy import fuzz  # noqa: E402
+
+import title_matcher  # noqa: E402
+from title_matcher import Candidate, TitleMatcher  # noqa: E402
+
+WORDS = ("deep learning neural network graph attention transformer citation verification retrieval "
+         "language model robust efficient scalable survey analysis detection generation federated "
+         "contrastive representation benchmark dataset optimization adaptive sparse").split()
+SURNAMES = "Smith Chen Wang Garcia Müller Tanaka Kumar Rossi Novak Silva Kim Dubois Olsen Lee".split()
+
+
+def synthetic_queries(count: int, top_k: int, rng: random.Random):
+    for _ in range(count):
+        title_words = rng.sample(WORDS, rng.randint(3, 8))
+        year, authors = rng.randint(1995, 2024), rng.sample(SURNAMES, rng.randint(1, 4))
+        truth = Candidate(" ".join(title_words).title(), year, authors, "truth")
+        candidates = []
+        for _ in range(top_k - 1):
+            words = list(title_words)
+            if len(words) > 3 and rng.random() < 0.7:
+                del words[rng.randrange(len(words))]
+            else:
+                words.append(rng.choice(WORDS))
+            candidates.append(Candidate(" ".join(words).title(), year + rng.choice([-6, -4, 3, 8]), rng.sample(SURNAMES, 2), "decoy"))
+        candidates.insert(rng.randrange(top_k), truth)
+        yield " ".join(title_words), year, [f"{name[0]}. {name}" for name in authors], candidates
+
+
+def fuzzywuzzy_first(title, candidates):
+    """The former path: only the API's first result, accepted if token_set_ratio > 85."""
+    first = candidates[0]
+    return first if fuzz.token_set_ratio(title.lower(), first.title.lower()) > 85 else None
+
+
+def fuzzywuzzy_all(title, candidates):
+    scores = [fuzz.token_set_ratio(title.lower(), candidate.title.lower()) for candidate in candidates]
+    best = max(range(len(candidates)), key=scores.__getitem__)
+    return candidates[best] if scores[best] > 85 else None
+
+
+def run(label, queries, pick) -> None:
+    started = time.perf_counter()
+    picked = [pick(title, year, authors, candidates) for title, year, authors, candidates in queries]
+    elapsed = time.perf_counter() - started
+    correct = sum(1 for candidate in picked if candidate is not None and candidate.payload == "truth")
+    wrong = sum(1 for candidate in picked if candidate is not None and candidate.payload != "truth")
+    print(f"{label:34s} {elapsed / len(queries) * 1e6:8.1f} us/reference  correct {correct / len(queries):6.1%}  wrong {wrong / len(queries):6.1%}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--references", type=int, default=2000)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    queries = list(synthetic_queries(args.references, args.top_k, random.Random(args.seed)))
+    matcher = TitleMatcher()
+    print(f"title engine: {'rapidfuzz' if title_matcher._rapid_process is not None else 'fuzzywuzzy'}")
+    run("fuzzywuzzy, first result only", queries, lambda title, year, authors, candidates: fuzzywuzzy_first(title, candidates))
+    run(f"fuzzywuzzy, best of {args.top_k} by title", queries, lambda title, year, authors, candidates: fuzzywuzzy_all(title, candidates))
+
+    def matcher_pick(title, year, authors, candidates):
+        match = matcher.best(title, candidates, year, authors)
+        return match.candidate if match else None
+
+    run(f"TitleMatcher, best of {args.top_k}", queries, matcher_pick)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Generates the sample PDFs and upstream responses used by bench_pipeline.py.
+
+A seeded synthetic catalog of works is cited in three documents: a short numbered paper, a mixed
+APA/MLA article and a long GB/T-style thesis with body pages. Around 30% of citations carry a DOI
+(a few of them wrong), 10% are free-form enough to need the LLM parser and 10% cite works that exist
+nowhere. upstream.json holds doi.org statuses and CrossRef, Semantic Scholar and OpenAlex search
+responses in the APIs' own shapes, with look-alike decoys around the true record; some works are only
+known to one or two of the services. Output is deterministic, so the fixtures only change with this
+script. Run from the backend directory:
+
+    python benchmarks/make_pipeline_fixtures.py [--seed 19]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import textwrap
+import zlib
+from typing import Any, Dict, List, Tuple
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from verification_cache import normalize_text  # noqa: E402
+
+OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "pipeline")
+
+WORDS = ("adaptive attention benchmark calibration citation clustering compression contrastive corpus "
+         "curriculum dataset detection diffusion distillation efficient embedding evaluation federated "
+         "generation graph hierarchical inference interpretable knowledge language latent learning "
+         "long-range memory multilingual multimodal network optimization pretraining pruning quantization "
+         "reasoning recommendation reinforcement representation retrieval robust scalable segmentation "
+         "self-supervised semantic sparse streaming summarization transfer transformer uncertainty").split()
+CONNECTORS = ["for", "with", "via", "under", "in", "of"]
+SURNAMES = ("Smith Chen Wang Garcia Müller Tanaka Kumar Rossi Novak Silva Kim Dubois Olsen Lee Ahmed "
+            "Petrov Nakamura Fischer Moreau Jensen Costa Ivanova Okafor Haddad Lindqvist Brennan Zhou "
+            "Kowalski Santos Weber Hoffmann Yamamoto Patel Larsen Romero Schmidt Bauer Sato Murphy Dixon").split()
+GIVEN = "Alice Bruno Chloe David Elena Farid Grace Hiro Ines Jonas Kira Liam Maya Nikhil Omar Priya".split()
+VENUES = ["Journal of Machine Learning Research", "Pattern Recognition Letters", "Neural Computation",
+          "Information Processing and Management", "Journal of Documentation", "Scientometrics",
+          "Knowledge-Based Systems", "Data Mining and Knowledge Discovery", "Computational Linguistics",
+          "Journal of Informetrics", "Machine Learning", "Artificial Intelligence Review"]
+
+
+# --- Catalog ---
+def make_title(rng: random.Random) -> str:
+    words = rng.sample(WORDS, rng.randint(4, 8))
+    words.insert(rng.randint(2, len(words) - 1), rng.choice(CONNECTORS))
+    return " ".join(words).capitalize()
+
+
+def make_work(rng: random.Random, number: int) -> Dict[str, Any]:
+    authors = [(rng.choice(GIVEN), surname) for surname in rng.sample(SURNAMES, rng.randint(1, 4))]
+    return {
+        "title": make_title(rng),
+        "authors": authors,
+        "year": rng.randint(1998, 2024),
+        "venue": rng.choice(VENUES),
+        "volume": rng.randint(1, 60),
+        "issue": rng.randint(1, 12),
+        "pages": f"{(first := rng.randint(1, 900))}-{first + rng.randint(8, 30)}",
+        "doi": f"10.5555/bench.{number:05d}",
+    }
+
+
+# --- Citation styles ---
+def initials(given: str) -> str:
+    return f"{given[0]}."
+
+
+def cite(work: Dict[str, Any], style: str, with_doi: str) -> str:
+    authors, title, year, venue = work["authors"], work["title"], work["year"], work["venue"]
+    doi = f" https://doi.org/{with_doi}" if with_doi else ""
+    if style == "apa":
+        names = [f"{surname}, {initials(given)}" for given, surname in authors]
+        people = names[0] if len(names) == 1 else ", ".join(names[:-1]) + ", & " + names[-1]
+        return f"{people} ({year}). {title}. {venue}, {work['volume']}({work['issue']}), {work['pages']}.{doi}"
+    if style == "numbered":
+        names = [f"{initials(given)} {surname}" for given, surname in authors]
+        people = names[0] if len(names) == 1 else ", ".join(names[:-1]) + " and " + names[-1]
+        return f'{people}, "{title}," {venue}, vol. {work["volume"]}, no. {work["issue"]}, pp. {work["pages"]}, {year}.{doi}'
+    if style == "gbt":
+        people = ", ".join(f"{surname.upper()} {given[0]}" for given, surname in authors)
+        return f"{people}. {title}[J]. {venue}, {year}, {work['volume']}({work['issue']}): {work['pages']}.{doi}"
+    if style == "mla":
+        (first_given, first_surname), rest = authors[0], authors[1:]
+        people = f"{first_surname}, {first_given}" + (f", and {rest[0][0]} {rest[0][1]}" if len(rest) == 1 else ", et al" if rest else "")
+        return f'{people}. "{title}." {venue}, vol. {work["volume"]}, no. {work["issue"]}, {year}, pp. {work["pages"]}.{doi}'
+    # Free-form notes that the local parser gives up on.
+    people = " / ".join(surname for _, surname in authors)
+    return f"{people} -- {title.lower()} -- see {venue} {year}"
+
+
+# --- Upstream responses ---
+def decoy(rng: random.Random, work: Dict[str, Any]) -> Dict[str, Any]:
+    words = work["title"].split()
+    if len(words) > 5 and rng.random() < 0.6:
+        del words[rng.randrange(1, len(words))]
+    else:
+        words.insert(rng.randrange(1, len(words)), rng.choice(WORDS))
+    return {**work, "title": " ".join(words), "year": work["year"] + rng.choice([-7, -4, 3, 6]),
+            "authors": [(rng.choice(GIVEN), surname) for surname in rng.sample(SURNAMES, 2)],
+            "doi": f"{work['doi']}.d{rng.randint(1, 99)}"}
+
+
+def crossref_item(work: Dict[str, Any]) -> Dict[str, Any]:
+    return {"DOI": work["doi"], "title": [work["title"]], "container-title": [work["venue"]],
+            "author": [{"given": given, "family": surname, "sequence": "additional"} for given, surname in work["authors"]],
+            "issued": {"date-parts": [[work["year"]]]}}
+
+
+def semantic_scholar_item(work: Dict[str, Any], number: int) -> Dict[str, Any]:
+    return {"paperId": f"{number:040x}", "title": work["title"], "year": work["year"], "venue": work["venue"],
+            "publicationVenue": {"name": work["venue"]}, "externalIds": {"DOI": work["doi"]},
+            "authors": [{"authorId": str(zlib.crc32(surname.encode())), "name": f"{given} {surname}"} for given, surname in work["authors"]]}
+
+
+def openalex_item(work: Dict[str, Any], number: int) -> Dict[str, Any]:
+    return {"id": f"https://openalex.org/W{number:010d}", "doi": f"https://doi.org/{work['doi']}", "title": work["title"],
+            "display_name": work["title"], "publication_year": work["year"], "host_venue": {"display_name": work["venue"]},
+            "authorships": [{"author_position": "middle", "author": {"display_name": f"{given} {surname}"}} for given, surname in work["authors"]]}
+
+
+def upstream_fixtures(rng: random.Random, works: List[Tuple[int, Dict[str, Any]]], cited_dois: List[str]) -> Dict[str, Any]:
+    fixtures: Dict[str, Any] = {"doi": {doi: 200 for doi in sorted(set(cited_dois))}, "api.crossref.org": [],
+                                "api.semanticscholar.org": [], "api.openalex.org": []}
+    for number, work in works:
+        key = normalize_text(work["title"])
+        for host, share in (("api.crossref.org", 0.75), ("api.semanticscholar.org", 0.6), ("api.openalex.org", 0.9)):
+            if rng.random() >= share:
+                continue
+            results = [decoy(rng, work) for _ in range(rng.randint(1, 3))]
+            results.insert(rng.randrange(len(results) + 1), work)
+            if host == "api.crossref.org":
+                body = {"status": "ok", "message-type": "work-list",
+                        "message": {"total-results": len(results), "items": [crossref_item(item) for item in results]}}
+            elif host == "api.semanticscholar.org":
+                body = {"total": len(results), "offset": 0, "data": [semantic_scholar_item(item, number * 10 + i) for i, item in enumerate(results)]}
+            else:
+                body = {"meta": {"count": len(results)}, "results": [openalex_item(item, number * 10 + i) for i, item in enumerate(results)]}
+            fixtures[host].append({"title": key, "body": body})
+    return fixtures
+
+
+# --- Documents ---
+def write_pdf(path: str, title: str, body_pages: int, heading: str, citations: List[str], numbered: bool) -> None:
+    pdf = canvas.Canvas(path, pagesize=A4, invariant=1)
+    pdf.setFont("Helvetica-Bold", 14)
+    pdf.drawString(72, 780, title)
+    pdf.setFont("Helvetica", 10)
+    pdf.drawString(72, 760, "Benchmark Author, Department of Information Science, 2024")
+    for page in range(body_pages):
+        y = 730 if page == 0 else 780
+        for line in textwrap.wrap(" ".join(f"Section {page + 1} discusses {word} methods." for word in WORDS[page % 20:page % 20 + 20]), 95):
+            pdf.drawString(72, y, line)
+            y -= 14
+        pdf.showPage()
+        pdf.setFont("Helvetica", 10)
+    y = 780
+    pdf.setFont("Helvetica-Bold", 12)
+    pdf.drawString(72, y, heading)
+    pdf.setFont("Helvetica", 10)
+    y -= 20
+    for number, citation in enumerate(citations, 1):
+        text = f"[{number}] {citation}" if numbered else citation
+        lines = textwrap.wrap(text, 95)
+        if y - 13 * len(lines) < 60:
+            pdf.showPage()
+            pdf.setFont("Helvetica", 10)
+            y = 780
+        for position, line in enumerate(lines):
+            pdf.drawString(72 if position == 0 else 90, y, line)
+            y -= 13
+        y -= 4
+    pdf.save()
+
+
+DOCUMENTS = [
+    # file, title, body pages, heading, numbered, citations, style mix
+    ("paper_short.pdf", "Efficient Retrieval for Citation Checking", 3, "References", True, 25, {"numbered": 1.0}),
+    ("article_mixed.pdf", "A Survey of Reference Verification Practice", 6, "Works Cited", False, 60, {"apa": 0.6, "mla": 0.4}),
+    ("thesis_long.pdf", "Scalable Bibliographic Verification: A Thesis", 40, "Bibliography", True, 150, {"gbt": 0.5, "numbered": 0.5}),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seed", type=int, default=19)
+    parser.add_argument("--output", default=OUTPUT)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    os.makedirs(args.output, exist_ok=True)
+
+    works = [make_work(rng, number) for number in range(400)]
+    cited: Dict[int, Dict[str, Any]] = {}
+    cited_dois: List[str] = []
+    manifest = []
+    for filename, title, body_pages, heading, numbered, count, mix in DOCUMENTS:
+        citations = []
+        styles = list(mix)
+        for _ in range(count):
+            number = rng.randrange(len(works))
+            work = works[number]
+            if rng.random() < 0.1:
+                work = make_work(rng, 90000 + len(citations))  # cited but known nowhere
+            else:
+                cited[number] = work
+            doi = ""
+            if rng.random() < 0.3:
+                doi = work["doi"] if rng.random() < 0.85 else work["doi"].replace("bench", "bench-x")
+                if doi == work["doi"] and work is works[number]:
+                    cited_dois.append(doi)
+            style = "free" if rng.random() < 0.1 else rng.choices(styles, [mix[style] for style in styles])[0]
+            citations.append(cite(work, style, doi))
+        if not numbered:
+            citations.sort()
+        write_pdf(os.path.join(args.output, filename), title, body_pages, heading, citations, numbered)
+        manifest.append({"file": filename, "citations": count})
+
+    fixtures = upstream_fixtures(rng, sorted(cited.items()), cited_dois)
+    fixtures["documents"] = manifest
+    with open(os.path.join(args.output, "upstream.json"), "w", encoding="utf-8") as f:
+        json.dump(fixtures, f, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+    sizes = {host: len(entries) for host, entries in fixtures.items() if isinstance(entries, (list, dict)) and host != "documents"}
+    print(f"Wrote {', '.join(name for name, *_ in DOCUMENTS)} and upstream.json to {args.output}: {sizes}")
+
+
+if __name__ == "__main__":
+    main()
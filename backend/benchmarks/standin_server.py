@@ -0,0 +1,186 @@
+"""
+Local stand-in for doi.org, CrossRef, Semantic Scholar and OpenAlex that serves recorded responses.
+
+Point the backend at it with UPSTREAM_OVERRIDE_URL; requests then arrive as /<host>/<path>?<query>.
+Search responses are matched by the normalized title (or recorded query) contained in the request's
+query text, so fixtures keep matching when paging or field parameters change. CrossRef `filter=doi:...`
+queries are answered with every recorded CrossRef work that has one of the DOIs. Unmatched searches get
+an empty result and unknown DOIs a 404; both are counted so fixture drift shows up in benchmark output.
+With --record, requests are forwarded to the real services and their responses added to the fixture file.
+
+    python benchmarks/standin_server.py [--port 8765] [--fixtures FILE] [--latency 0.02] [--record]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from verification_cache import normalize_text  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "pipeline", "upstream.json")
+
+# Query parameter holding the searched text, and the body of an empty answer, per search API.
+SEARCH_APIS: Dict[str, Tuple[str, Dict[str, Any]]] = {
+    "api.crossref.org": ("query.bibliographic", {"status": "ok", "message": {"total-results": 0, "items": []}}),
+    "api.semanticscholar.org": ("query", {"total": 0, "offset": 0, "data": []}),
+    "api.openalex.org": ("search", {"meta": {"count": 0}, "results": []}),
+}
+
+
+class StandinServer:
+    def __init__(self, fixtures_path: str = FIXTURES, latency: float = 0.0, record: bool = False, port: int = 0):
+        self.fixtures_path = fixtures_path
+        self.latency = latency
+        self.record = record
+        self.fixtures: Dict[str, Any] = {"doi": {}}
+        if os.path.exists(fixtures_path):
+            with open(fixtures_path, encoding="utf-8") as f:
+                self.fixtures = json.load(f)
+        self.counters: Dict[str, int] = {"requests": 0, "matched": 0, "unmatched": 0, "recorded": 0}
+        self._crossref_works: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandinServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self.record:
+            with open(self.fixtures_path, "w", encoding="utf-8") as f:
+                json.dump(self.fixtures, f, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    # --- Responses ---
+    def _search(self, host: str, query: Dict[str, List[str]]) -> Optional[Dict[str, Any]]:
+        param, _ = SEARCH_APIS[host]
+        wanted = normalize_text(" ".join(query.get(param, [])))
+        best = None
+        for entry in self.fixtures.get(host, []):
+            if entry["title"] and entry["title"] in wanted and (best is None or len(entry["title"]) > len(best["title"])):
+                best = entry
+        return best["body"] if best else None
+
+    def _crossref_dois(self, query: Dict[str, List[str]]) -> Tuple[Dict[str, Any], bool]:
+        """Answer to a `filter=doi:A,doi:B` query, and whether every DOI was found."""
+        wanted = [part.split(":", 1)[1].lower() for value in query["filter"] for part in value.split(",") if part.startswith("doi:")]
+        with self._lock:
+            if self._crossref_works is None:
+                self._crossref_works = {item["DOI"].lower(): item for entry in self.fixtures.get("api.crossref.org", [])
+                                        for item in (entry["body"].get("message") or {}).get("items") or [] if item.get("DOI")}
+            items = [self._crossref_works[doi] for doi in wanted if doi in self._crossref_works]
+        return {"status": "ok", "message": {"total-results": len(items), "items": items}}, len(items) == len(wanted)
+
+    def respond(self, method: str, path: str) -> Tuple[int, Optional[Dict[str, Any]]]:
+        host, _, rest = path.lstrip("/").partition("/")
+        parts = urlsplit("/" + rest)
+        if host == "doi.org":
+            doi = parts.path.lstrip("/").lower()
+            status = self.fixtures["doi"].get(doi)
+            if status is None and self.record:
+                status = self._forward(method, host, rest)[0]
+                self.fixtures["doi"][doi] = status
+            return (status, None) if status is not None else (404, None)
+        if host == "api.crossref.org" and "filter" in parse_qs(parts.query):
+            body, complete = self._crossref_dois(parse_qs(parts.query))
+            if not complete and self.record:
+                status, body = self._forward(method, host, rest)
+                if status != 200:
+                    return status, None
+                with self._lock:
+                    self.fixtures.setdefault(host, []).append({"title": "", "body": body})
+                    self._crossref_works = None
+            return 200, body
+        if host in SEARCH_APIS:
+            query = parse_qs(parts.query)
+            body = self._search(host, query)
+            if body is None and self.record:
+                status, body = self._forward(method, host, rest)
+                if status == 200:
+                    param, _ = SEARCH_APIS[host]
+                    self.fixtures.setdefault(host, []).append({"title": normalize_text(" ".join(query.get(param, []))), "body": body})
+            return (200, body) if body is not None else (200, None)
+        return 404, None
+
+    def _forward(self, method: str, host: str, rest: str) -> Tuple[int, Optional[Dict[str, Any]]]:
+        import httpx
+        response = httpx.request(method, f"https://{host}/{rest}", follow_redirects=True, timeout=30)
+        self._count("recorded")
+        return response.status_code, response.json() if method == "GET" and response.status_code == 200 else None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _serve(self, method: str) -> None:
+                server._count("requests")
+                server._count(self.path.lstrip("/").split("/", 1)[0])
+                if server.latency:
+                    time.sleep(server.latency)
+                status, body = server.respond(method, self.path)
+                host = self.path.lstrip("/").split("/", 1)[0]
+                matched = body is not None or (host == "doi.org" and status != 404)
+                server._count("matched" if matched else "unmatched")
+                if body is None and host in SEARCH_APIS:
+                    body = SEARCH_APIS[host][1]
+                payload = json.dumps(body).encode("utf-8") if body is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                if method == "GET":
+                    self.wfile.write(payload)
+
+            def do_GET(self):
+                self._serve("GET")
+
+            def do_HEAD(self):
+                self._serve("HEAD")
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixtures", default=FIXTURES)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response.")
+    parser.add_argument("--record", action="store_true", help="Forward unmatched requests to the real services and save their responses.")
+    args = parser.parse_args()
+    server = StandinServer(args.fixtures, args.latency, args.record, args.port).start()
+    print(f"Serving {args.fixtures} at {server.url} (set UPSTREAM_OVERRIDE_URL={server.url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+        print(server.counters)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Rule-based parsing of well-formed citations (IEEE, APA, MLA, Chicago, GB/T 7714).
+
+Each style is a compiled pattern; the best match is scored on how complete and plausible its
+fields are. Callers send only citations below LOCAL_PARSE_MIN_CONFIDENCE to the LLM.
+"""
+import datetime
+import os
+import re
+from typing import Callable, List, NamedTuple, Optional
+
+import schemas
+
+# --- Configuration ---
+LOCAL_PARSER_ENABLED = os.getenv("LOCAL_PARSER_ENABLED", "1") == "1"
+LOCAL_PARSE_MIN_CONFIDENCE = float(os.getenv("LOCAL_PARSE_MIN_CONFIDENCE", "0.85"))
+
+
+class LocalParse(NamedTuple):
+    reference: schemas.Reference
+    confidence: float
+    style: str
+
+
+# --- Shared patterns ---
+_LEADING_MARKER = re.compile(r"^\s*(?:\[\d{1,4}\]|\d{1,4}[.)])\s*")
+_TRAILING_LINK = re.compile(r"[\s.,]*(?:(?:https?://|doi:\s*|DOI:\s*)\S+|Available:?\s*\S+|\[Online\]\.?)[\s.]*$", re.IGNORECASE)
+_YEAR = re.compile(r"(?<![\d\-–])((?:1[89]|20)\d{2})[a-z]?(?![\d\-–])")
+_PAREN_YEAR = re.compile(r"\(((?:1[89]|20)\d{2})[a-z]?\)")
+_ET_AL = re.compile(r"[,\s]*(?:et\s+al\.?|等|他)\s*$", re.IGNORECASE)
+_AUTHOR_SEPARATOR = re.compile(r"\s*(?:;|,?\s+(?:and|&)\s+|,|，|、)\s*")
+_INITIALS = re.compile(r"^(?:[A-Z]\.[\s\-]*){1,4}$")
+_GIVEN_NAMES = re.compile(r"^[A-Z][a-z]+(?:\s+(?:[A-Z]\.?|[A-Z][a-z]+))*$")
+_SOURCE_END = re.compile(r",|\s+(?:vol|no|pp|Vol|No|pp)\.|\s+\d|\s*\(|:|\.\s")
+# IEEE abbreviates journal names ("Proc. IEEE Conf. Comput. Vis."), so only commas and volume/page markers end them.
+_ABBREVIATED_SOURCE_END = re.compile(r",|\s+(?:vol|no|pp|Vol|No)\.|\s*\(")
+_MISPARSE_HINTS = re.compile(r"\b(?:vol|pp|no)\.\s*\d|https?://", re.IGNORECASE)
+_CJK = re.compile(r"[一-鿿぀-ヿ]")
+
+# --- Style patterns ---
+# GB/T 7714: Authors. Title[J]. Journal, 2020, 12(3): 45-67.
+_GBT = re.compile(
+    r"^(?P<authors>[^.．。\[]+?)[.．。]\s*(?P<title>[^\[]+?)\s*\[(?P<kind>[A-Z]{1,2})(?:/OL)?\]\s*(?://|[.．。])?\s*(?P<rest>.*)$"
+)
+# APA: Authors (2020). Title. Source, 12(3), 45-67.
+# The title does not end at initials, dotted acronyms ("U.S.") or common abbreviations ("vs.", "e.g.").
+_APA = re.compile(
+    r"^(?P<authors>.+?)\s*\((?P<year>(?:1[89]|20)\d{2})[a-z]?(?:,[^)]*)?\)\.\s*"
+    r"(?P<title>.+?(?:[?!]|(?<!\s[A-Z])(?<!\.[A-Z])(?<!\set\sal)(?<!\bvs)(?<!\bSt)(?<!\bDr)(?<!\bNo)(?<!\bVol)(?<!\be\.g)(?<!\bi\.e)\.))\s+(?P<rest>.+)$"
+)
+# What follows an APA source: volume, issue or pages, a publisher after its place, or nothing.
+_APA_SOURCE_TAIL = re.compile(r"^[\s.,]*(?:$|\d|\(|(?:vol|no|pp)\.|:[^.]*\.?\s*$)", re.IGNORECASE)
+# IEEE (Authors, "Title," ...), MLA (Authors. "Title." ...) and Chicago (Authors. 2020. "Title." ...).
+_QUOTED = re.compile(
+    r"^(?P<authors>.+?)(?:[.,]\s*(?P<year>(?:1[89]|20)\d{2})[a-z]?)?(?P<separator>[.,])\s*"
+    r"[“\"](?P<title>[^”\"]+?)[,.?!]?\s*[”\"]\s*[,.]?\s*(?P<rest>.*)$"
+)
+# Chicago / MLA books: Authors. Title. City: Publisher, 2020.
+_BOOK = re.compile(
+    r"^(?P<authors>[^.]+?(?:\s[A-Z]\.)*)\.\s+(?P<title>[^.]{8,}?)\.\s+(?P<place>[^.:,]+):\s*(?P<publisher>[^,:]+),\s*(?P<year>(?:1[89]|20)\d{2})\.?$"
+)
+
+_MAX_YEAR = datetime.date.today().year + 1
+
+
+# --- Field helpers ---
+def split_authors(text: str) -> List[str]:
+    """Splits an author list, keeping "Last, First" and "Last, I. I." pairs together."""
+    text = re.sub(r"(?<![A-Z])\.$", "", _ET_AL.sub("", text.strip().rstrip(",")))
+    parts = [part.strip() for part in _AUTHOR_SEPARATOR.split(text) if part.strip()]
+    authors: List[str] = []
+    i = 0
+    while i < len(parts):
+        part = parts[i]
+        following = parts[i + 1] if i + 1 < len(parts) else None
+        if following and " " not in part and "." not in part and (
+            _INITIALS.match(following) or _INITIALS.match(following + ".") or (i == 0 and _GIVEN_NAMES.match(following))
+        ):
+            authors.append(f"{part}, {following}")
+            i += 2
+        else:
+            authors.append(part)
+            i += 1
+    return authors
+
+
+def _source_from(rest: str, end: re.Pattern = _SOURCE_END) -> Optional[str]:
+    rest = re.sub(r"^(?:in|In)(?::|\s)\s*", "", rest.strip())
+    match = end.search(rest)
+    source = (rest[:match.start()] if match else rest).strip(" .,")
+    return source or None
+
+
+def _year_from(text: str) -> Optional[int]:
+    match = _PAREN_YEAR.search(text)
+    if match:
+        return int(match.group(1))
+    years = _YEAR.findall(text)
+    return int(years[-1]) if years else None
+
+
+def score(reference: schemas.Reference, base: float) -> float:
+    """Starts from how distinctive the style's structure is and deducts for missing or implausible fields."""
+    confidence = base
+    title = reference.title or ""
+    if len(title) < (4 if _CJK.search(title) else 10) or (not _CJK.search(title) and len(title.split()) < 2):
+        confidence -= 0.4
+    if _MISPARSE_HINTS.search(title):
+        confidence -= 0.4
+    if not reference.authors:
+        confidence -= 0.3
+    elif any(len(author.split()) > 6 or re.search(r"\d", author) for author in reference.authors):
+        confidence -= 0.3
+    if reference.year is None or not 1800 <= reference.year <= _MAX_YEAR:
+        confidence -= 0.2
+    if not reference.source:
+        confidence -= 0.15
+    elif _MISPARSE_HINTS.search(reference.source):
+        confidence -= 0.2
+    return max(0.0, min(1.0, confidence))
+
+
+# --- Style parsers ---
+def _parse_gbt(text: str) -> Optional[LocalParse]:
+    match = _GBT.match(text)
+    if not match:
+        return None
+    rest = match.group("rest")
+    if match.group("kind") == "J":
+        source_match = re.match(r"\s*([^,，:：]+?)\s*[,，:：]", rest)
+    else:
+        # Books, theses and reports: City: Publisher, 2020.
+        source_match = re.match(r"\s*(?:[^,，:：]+[:：])?\s*([^,，:：]+?)\s*[,，]", rest)
+    reference = schemas.Reference(
+        raw_text=text,
+        authors=split_authors(match.group("authors")),
+        year=_year_from(rest),
+        title=match.group("title").strip(),
+        source=source_match.group(1).strip(" .．") if source_match else None,
+    )
+    base = 0.95 if match.group("kind") == "J" else 0.9
+    return LocalParse(reference, score(reference, base), "gbt7714")
+
+
+def _parse_apa(text: str) -> Optional[LocalParse]:
+    match = _APA.match(text)
+    if not match:
+        return None
+    title = match.group("title").strip()
+    if title.endswith("."):
+        title = title[:-1]
+    rest = match.group("rest")
+    source = _source_from(rest)
+    reference = schemas.Reference(
+        raw_text=text,
+        authors=split_authors(match.group("authors")),
+        year=int(match.group("year")),
+        title=title,
+        source=source,
+    )
+    # Chapters ("In J. Editor (Ed.), Book ...") name the editors where the source should be.
+    base = 0.8 if re.match(r"In\s", rest) else 0.92
+    if source and not _APA_SOURCE_TAIL.match(rest[rest.find(source) + len(source):]):
+        # More prose after the "source": the title was probably cut short, and the source is its end.
+        base -= 0.15
+    return LocalParse(reference, score(reference, base), "apa")
+
+
+def _parse_quoted(text: str) -> Optional[LocalParse]:
+    match = _QUOTED.match(text)
+    if not match:
+        return None
+    rest = match.group("rest")
+    if match.group("year"):
+        style, year = "chicago", int(match.group("year"))
+    else:
+        style, year = ("ieee" if match.group("separator") == "," else "mla"), _year_from(rest)
+        if style == "mla" and re.search(r"\(\d{4}\)\s*:", rest):
+            style = "chicago"
+    reference = schemas.Reference(
+        raw_text=text,
+        authors=split_authors(match.group("authors")),
+        year=year,
+        title=match.group("title").strip(),
+        source=_source_from(rest, _ABBREVIATED_SOURCE_END if style == "ieee" else _SOURCE_END),
+    )
+    return LocalParse(reference, score(reference, 0.92), style)
+
+
+def _parse_book(text: str) -> Optional[LocalParse]:
+    match = _BOOK.match(text)
+    if not match:
+        return None
+    reference = schemas.Reference(
+        raw_text=text,
+        authors=split_authors(match.group("authors")),
+        year=int(match.group("year")),
+        title=match.group("title").strip(),
+        source=match.group("publisher").strip(),
+    )
+    return LocalParse(reference, score(reference, 0.88), "chicago")
+
+
+_PARSERS: List[Callable[[str], Optional[LocalParse]]] = [_parse_gbt, _parse_apa, _parse_quoted, _parse_book]
+
+
+def parse_citation(raw_text: str) -> Optional[LocalParse]:
+    """
+    Parses a citation without the LLM. Returns the most confident style match, or None when no style fits.
+    The returned reference keeps the original `raw_text`.
+    """
+    text = _TRAILING_LINK.sub("", _LEADING_MARKER.sub("", " ".join(raw_text.split())))
+    best: Optional[LocalParse] = None
+    for parser in _PARSERS:
+        try:
+            result = parser(text)
+        except Exception:
+            continue
+        if result and (best is None or result.confidence > best.confidence):
+            best = result
+    if best is None:
+        return None
+    best.reference.raw_text = raw_text
+    return best
+
+
+def parse_confidently(raw_text: str) -> Optional[LocalParse]:
+    """The local parse if it clears LOCAL_PARSE_MIN_CONFIDENCE, otherwise None (the LLM should parse it)."""
+    if not LOCAL_PARSER_ENABLED:
+        return None
+    result = parse_citation(raw_text)
+    if result is None or result.confidence < LOCAL_PARSE_MIN_CONFIDENCE:
+        return None
+    return result
@@ -0,0 +1,46 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Dict
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+
+# How many references of a single run may be inside each pipeline stage at once.
+STAGE_CONCURRENCY: Dict[str, int] = {
+    "parse": _env_int("PARSE_CONCURRENCY", 8),
+    "rescue": _env_int("RESCUE_CONCURRENCY", 4),
+    "format": _env_int("FORMAT_CONCURRENCY", 8),
+    "verify": _env_int("VERIFY_CONCURRENCY", 8),
+}
+
+# How many requests may be in flight against each upstream, shared by every run in the process.
+UPSTREAM_CONCURRENCY: Dict[str, int] = {
+    "llm": _env_int("LLM_CONCURRENCY", 8),
+    "doi": _env_int("DOI_CONCURRENCY", 8),
+    "crossref": _env_int("CROSSREF_CONCURRENCY", 4),
+    "semantic_scholar": _env_int("SEMANTIC_SCHOLAR_CONCURRENCY", 2),
+    "openalex": _env_int("OPENALEX_CONCURRENCY", 4),
+}
+
+_upstream_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def stage_semaphores() -> Dict[str, asyncio.Semaphore]:
+    """Creates a fresh set of stage limits for one verification run."""
+    return {stage: asyncio.Semaphore(limit) for stage, limit in STAGE_CONCURRENCY.items()}
+
+
+@asynccontextmanager
+async def upstream_slot(name: str):
+    """Holds one of the process-wide slots for the given upstream while the block runs."""
+    semaphore = _upstream_semaphores.get(name)
+    if semaphore is None:
+        semaphore = _upstream_semaphores[name] = asyncio.Semaphore(UPSTREAM_CONCURRENCY.get(name, 4))
+    async with semaphore:
+        yield
@@ -0,0 +1,105 @@
+import asyncio
+import hashlib
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+import schemas
+from verification_cache import build_verification_cache, normalize_text
+
+# --- Configuration ---
+DOCUMENT_CACHE_ENABLED = os.getenv("DOCUMENT_CACHE_ENABLED", "1") == "1"
+DOCUMENT_CACHE_TTL = int(os.getenv("DOCUMENT_CACHE_TTL", str(7 * 24 * 3600)))
+DOCUMENT_CACHE_SIZE = int(os.getenv("DOCUMENT_CACHE_SIZE", "5000"))
+# Bump whenever parsing, verification or scoring changes in a way that makes stored results stale.
+VERIFIER_VERSION = "1"
+
+_LEADING_MARKER = re.compile(r"^\s*(?:\[\d{1,4}\]|\d{1,4}[.)])\s*")
+
+
+# --- Keys ---
+def _namespace(model_name: str) -> str:
+    return f"{model_name}:v{VERIFIER_VERSION}"
+
+
+def document_hash(pdf_content: bytes) -> str:
+    return hashlib.sha256(pdf_content).hexdigest()
+
+
+def citation_hash(raw_text: str) -> str:
+    """Hash of the citation with numbering, case, punctuation and whitespace normalized away, so renumbered drafts still match."""
+    return hashlib.sha1(normalize_text(_LEADING_MARKER.sub("", raw_text)).encode("utf-8")).hexdigest()
+
+
+def document_key(model_name: str, pdf_hash: str) -> str:
+    return f"document:{_namespace(model_name)}:{pdf_hash}"
+
+
+def citation_key(model_name: str, raw_text: str) -> str:
+    return f"citation:{_namespace(model_name)}:{citation_hash(raw_text)}"
+
+
+def is_cacheable(reference: schemas.Reference, complete: bool = True) -> bool:
+    """
+    Pipeline failures, LLM errors and outcomes of lookups that did not complete (network errors,
+    throttling) are retried on the next upload instead of being stored.
+    """
+    title = reference.title or ""
+    return complete and not (
+        reference.status == "Format Error"
+        or reference.status.startswith("Error")
+        or title.startswith("Error processing reference")
+        or title.startswith("Error parsing with AI")
+    )
+
+
+# --- Cache ---
+class DocumentCache:
+    """
+    Content-addressed results of whole verification runs.
+    A document entry (keyed by the PDF's SHA-256) replays an identical upload; citation entries
+    (keyed by the normalized citation text) let a revised draft reuse every unchanged reference.
+    Both are namespaced by model name and VERIFIER_VERSION. Entries live in the same memory/Redis/Postgres
+    tiers as the verification cache, under their own key prefix.
+    """
+
+    def __init__(self, enabled: bool = DOCUMENT_CACHE_ENABLED):
+        self.enabled = enabled
+        self.cache = build_verification_cache(size=DOCUMENT_CACHE_SIZE, ttl=DOCUMENT_CACHE_TTL, prefix="results", name="documents")
+
+    async def get_document(self, model_name: str, pdf_content: bytes) -> Optional[Dict[str, Any]]:
+        """Returns {"metadata", "references"} for a previously completed identical upload."""
+        if not self.enabled:
+            return None
+        pdf_hash = await asyncio.to_thread(document_hash, pdf_content)
+        entry = await self.cache.get(document_key(model_name, pdf_hash))
+        return entry["result"] if entry else None
+
+    async def set_document(self, model_name: str, pdf_content: bytes, metadata: Optional[Dict[str, Any]], references: List[schemas.Reference],
+                           complete: bool = True) -> None:
+        """Stores a finished run; `complete` is False when any of its lookups did not complete."""
+        if not self.enabled or not complete or not all(is_cacheable(ref) for ref in references):
+            return
+        pdf_hash = await asyncio.to_thread(document_hash, pdf_content)
+        await self.cache.set(document_key(model_name, pdf_hash), {"metadata": metadata, "references": [ref.dict() for ref in references]})
+
+    async def get_references(self, model_name: str, raw_texts: List[str]) -> Dict[int, schemas.Reference]:
+        """Cached results for the citations whose normalized text was verified before, keyed by position."""
+        if not self.enabled:
+            return {}
+        entries = await asyncio.gather(*(self.cache.get(citation_key(model_name, text)) for text in raw_texts))
+        found: Dict[int, schemas.Reference] = {}
+        for position, entry in enumerate(entries):
+            if entry:
+                found[position] = schemas.Reference(**{**entry["result"], "raw_text": raw_texts[position]})
+        return found
+
+    async def set_reference(self, model_name: str, reference: schemas.Reference, complete: bool = True) -> None:
+        if self.enabled and is_cacheable(reference, complete):
+            await self.cache.set(citation_key(model_name, reference.raw_text), reference.dict())
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, **self.cache.stats()}
+
+
+document_cache = DocumentCache()
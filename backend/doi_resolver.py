@@ -0,0 +1,123 @@
+"""
+Bulk DOI resolution through CrossRef.
+
+As soon as a document's reference list is split, every DOI it cites is extracted, normalized and
+looked up through CrossRef's /works endpoint with `filter=doi:A,doi:B,...`, DOI_BATCH_SIZE DOIs per
+request, instead of one doi.org request per reference. Results go into a bounded table shared by all
+runs. When a reference reaches verification, lookup_reference reads its DOI's record from there, or
+waits for the batch still resolving it, and cross-checks the record's title, year and authors against
+the parsed citation. DOIs that CrossRef does not register (DataCite, mEDRA, ...) and DOIs whose batch
+failed are still checked with a doi.org HEAD request.
+"""
+import asyncio
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+from concurrency import upstream_slot
+from http_client import http_clients
+from local_index import get_local_index
+from metrics import timed_stage
+from title_matcher import Candidate, parse_year
+from verification_cache import normalize_doi
+
+# --- Configuration ---
+DOI_PREFETCH_ENABLED = os.getenv("DOI_PREFETCH_ENABLED", "1") == "1"
+# DOIs per CrossRef request; bounded by the length of the request URL.
+DOI_BATCH_SIZE = int(os.getenv("DOI_BATCH_SIZE", "40"))
+# Resolved DOIs kept for references that have not reached verification yet.
+DOI_RESOLVER_CACHE_SIZE = int(os.getenv("DOI_RESOLVER_CACHE_SIZE", "10000"))
+
+CROSSREF_WORKS_URL = "https://api.crossref.org/works"
+CROSSREF_FIELDS = "DOI,title,container-title,author,issued"
+
+
+def crossref_candidate(item: Dict[str, Any]) -> Candidate:
+    """A CrossRef work as a title matcher candidate."""
+    return Candidate(
+        title=(item.get('title') or [''])[0],
+        year=parse_year(((item.get('issued') or {}).get('date-parts') or [[None]])[0][0]),
+        surnames=[author.get('family') or author.get('name', '') for author in item.get('author') or []],
+        payload=item,
+    )
+
+
+class DoiResolver:
+    """Resolves DOIs in CrossRef batches; see the module docstring."""
+
+    def __init__(self, batch_size: int = DOI_BATCH_SIZE, max_entries: int = DOI_RESOLVER_CACHE_SIZE):
+        self.batch_size = max(1, batch_size)
+        self.max_entries = max_entries
+        # DOI -> CrossRef record, or None when CrossRef answered without it.
+        self.records: "OrderedDict[str, Optional[Dict[str, Any]]]" = OrderedDict()
+        self.pending: Dict[str, asyncio.Task] = {}
+        self.counts = {"prefetched": 0, "requests": 0, "found": 0, "not_in_crossref": 0, "failed": 0}
+
+    def prefetch(self, dois: Iterable[Optional[str]]) -> None:
+        """Starts resolving the DOIs not already known or in flight, in the background."""
+        if not DOI_PREFETCH_ENABLED:
+            return
+        # Commas separate filters, so such DOIs are left to the doi.org fallback.
+        new = [doi for doi in dict.fromkeys(dois) if doi and "," not in doi and doi not in self.records and doi not in self.pending]
+        if not new:
+            return
+        task = asyncio.create_task(self._prefetch(new))
+        for doi in new:
+            self.pending[doi] = task
+        self.counts["prefetched"] += len(new)
+
+    async def lookup(self, doi: str) -> Optional[Dict[str, Any]]:
+        """The DOI's CrossRef record; None when CrossRef does not have it, was not asked or did not answer."""
+        task = self.pending.get(doi)
+        if task is not None:
+            # Shielded: a cancelled reference must not cancel the batch other references wait for.
+            await asyncio.shield(task)
+        if doi in self.records:
+            self.records.move_to_end(doi)
+        return self.records.get(doi)
+
+    async def _prefetch(self, requested: List[str]) -> None:
+        try:
+            dois = requested
+            index = get_local_index()
+            if index is not None:
+                # Step 0 checks these against the offline record (verified, or cited as another work), so not worth a request.
+                dois = await asyncio.to_thread(lambda: [doi for doi in requested if not index.lookup_doi(doi)])
+            await asyncio.gather(*(self._resolve_batch(dois[i:i + self.batch_size]) for i in range(0, len(dois), self.batch_size)))
+        except Exception as e:
+            print(f"DOI prefetch error: {type(e).__name__} - {e}")
+        finally:
+            current = asyncio.current_task()
+            for doi in requested:
+                if self.pending.get(doi) is current:
+                    del self.pending[doi]
+
+    async def _resolve_batch(self, dois: List[str]) -> None:
+        params = {"filter": ",".join(f"doi:{doi}" for doi in dois), "rows": len(dois), "select": CROSSREF_FIELDS}
+        try:
+            with timed_stage("doi_prefetch"):
+                async with upstream_slot("crossref"):
+                    response = await http_clients.request("crossref", "GET", CROSSREF_WORKS_URL, params=params)
+            self.counts["requests"] += 1
+            if response.status_code != 200:
+                self.counts["failed"] += len(dois)
+                return
+            items = response.json().get("message", {}).get("items") or []
+        except Exception as e:
+            self.counts["failed"] += len(dois)
+            print(f"CrossRef DOI batch error ({len(dois)} DOIs): {type(e).__name__} - {e}")
+            return
+        found = {normalize_doi(item.get("DOI") or ""): item for item in items}
+        for doi in dois:
+            record = found.get(doi)
+            self.counts["found" if record is not None else "not_in_crossref"] += 1
+            self.records[doi] = record
+            self.records.move_to_end(doi)
+        while len(self.records) > self.max_entries:
+            self.records.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.counts, "entries": len(self.records), "in_flight": len(self.pending)}
+
+
+doi_resolver = DoiResolver()
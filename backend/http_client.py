@@ -0,0 +1,132 @@
+import os
+import time
+from typing import Dict, Optional
+
+import httpx
+
+from metrics import record_upstream
+from rate_limiter import RETRYABLE_STATUS_CODES, UPSTREAM_MAX_RETRIES, backoff_delay, parse_retry_after, rate_limiters
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+HTTP_CONNECT_TIMEOUT = _env_float("HTTP_CONNECT_TIMEOUT", 5.0)
+HTTP_READ_TIMEOUT = _env_float("HTTP_READ_TIMEOUT", 10.0)
+HTTP_POOL_TIMEOUT = _env_float("HTTP_POOL_TIMEOUT", 10.0)
+HTTP_KEEPALIVE_EXPIRY = _env_float("HTTP_KEEPALIVE_EXPIRY", 30.0)
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "1") == "1"
+# Sends every upstream request to this server instead, as <override>/<host>/<path>; for benchmarks and tests.
+UPSTREAM_OVERRIDE_URL = os.getenv("UPSTREAM_OVERRIDE_URL", "").rstrip("/")
+
+# Connection limit for each upstream host; every upstream gets its own pool.
+UPSTREAM_MAX_CONNECTIONS: Dict[str, int] = {
+    "doi": int(os.getenv("DOI_MAX_CONNECTIONS", "10")),
+    "crossref": int(os.getenv("CROSSREF_MAX_CONNECTIONS", "10")),
+    "semantic_scholar": int(os.getenv("SEMANTIC_SCHOLAR_MAX_CONNECTIONS", "5")),
+    "openalex": int(os.getenv("OPENALEX_MAX_CONNECTIONS", "10")),
+}
+DEFAULT_MAX_CONNECTIONS = 10
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class HttpClientPool:
+    """
+    Application-lifetime httpx clients, one per upstream, so connections (and TLS sessions)
+    are kept alive and reused across references and uploads.
+    Started on FastAPI startup and closed on shutdown; clients are created lazily if used before that.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self.http2 = HTTP2_ENABLED and _http2_available()
+        self.counters: Dict[str, Dict[str, float]] = {}
+
+    def _create_client(self, upstream: str) -> httpx.AsyncClient:
+        max_connections = UPSTREAM_MAX_CONNECTIONS.get(upstream, DEFAULT_MAX_CONNECTIONS)
+        return httpx.AsyncClient(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT, pool=HTTP_POOL_TIMEOUT),
+        )
+
+    def client(self, upstream: str) -> httpx.AsyncClient:
+        client = self._clients.get(upstream)
+        if client is None or client.is_closed:
+            client = self._clients[upstream] = self._create_client(upstream)
+            self.counters.setdefault(upstream, {"requests": 0, "errors": 0, "retries": 0, "in_flight": 0, "total_seconds": 0.0})
+        return client
+
+    async def start(self) -> None:
+        for upstream in UPSTREAM_MAX_CONNECTIONS:
+            self.client(upstream)
+
+    async def close(self) -> None:
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    async def request(self, upstream: str, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Sends a request through the upstream's token bucket. 429/503 responses are retried with
+        jittered exponential backoff (honoring Retry-After), and the bucket slows down for everyone.
+        """
+        client = self.client(upstream)
+        counters = self.counters[upstream]
+        if UPSTREAM_OVERRIDE_URL:
+            url = UPSTREAM_OVERRIDE_URL + "/" + url.split("://", 1)[-1]
+        for attempt in range(UPSTREAM_MAX_RETRIES + 1):
+            await rate_limiters.acquire(upstream)
+            counters["requests"] += 1
+            counters["in_flight"] += 1
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+            except Exception:
+                counters["errors"] += 1
+                record_upstream(upstream, "error", time.perf_counter() - started)
+                raise
+            finally:
+                counters["in_flight"] -= 1
+                counters["total_seconds"] += time.perf_counter() - started
+            record_upstream(upstream, response.status_code, time.perf_counter() - started)
+
+            if response.status_code not in RETRYABLE_STATUS_CODES:
+                rate_limiters.reward(upstream)
+                return response
+            if attempt == UPSTREAM_MAX_RETRIES:
+                return response
+            counters["retries"] += 1
+            rate_limiters.penalize(upstream, backoff_delay(attempt, parse_retry_after(response.headers.get("Retry-After"))))
+        return response
+
+    def stats(self) -> Dict[str, Dict[str, Optional[float]]]:
+        stats = {}
+        for upstream, counters in self.counters.items():
+            entry = dict(counters)
+            entry["max_connections"] = UPSTREAM_MAX_CONNECTIONS.get(upstream, DEFAULT_MAX_CONNECTIONS)
+            pool = getattr(getattr(self._clients.get(upstream), "_transport", None), "_pool", None)
+            connections = getattr(pool, "connections", None)
+            if connections is not None:
+                entry["open_connections"] = len(connections)
+                entry["idle_connections"] = sum(1 for connection in connections if connection.is_idle())
+            stats[upstream] = entry
+        return {"http2": self.http2, "upstreams": stats, "rate_limits": rate_limiters.stats()}
+
+
+http_clients = HttpClientPool()
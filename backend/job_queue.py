@@ -0,0 +1,271 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+# --- Configuration ---
+JOB_TTL = int(os.getenv("JOB_TTL", str(24 * 3600)))
+# A running job whose worker has not sent a heartbeat for this long is put back on the queue.
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "0.5"))
+
+FINISHED_STATUSES = ("completed", "failed")
+
+# (pdf_content, params) -> async iterator of {"type": ..., "payload": ...} events
+JobRunner = Callable[[bytes, Dict[str, Any]], AsyncIterator[Dict[str, Any]]]
+
+
+def new_job_id() -> str:
+    return uuid.uuid4().hex
+
+
+# --- Stores ---
+class MemoryJobStore:
+    """In-process queue and event log. Used for tests and single-process deployments; does not survive restarts."""
+
+    def __init__(self):
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._queue: Optional[asyncio.Queue] = None
+
+    @property
+    def queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        return self._queue
+
+    def _expire(self) -> None:
+        # Like the Redis keys, a job is kept for JOB_TTL seconds after it was created; unfinished jobs until they finish.
+        now = time.time()
+        for job_id in [job_id for job_id, job in self._jobs.items() if job["status"] in FINISHED_STATUSES and now - job["created_at"] >= JOB_TTL]:
+            del self._jobs[job_id]
+
+    async def create(self, job_id: str, pdf_content: bytes, params: Dict[str, Any]) -> None:
+        self._expire()
+        self._jobs[job_id] = {"status": "queued", "params": params, "pdf": pdf_content, "events": [], "events_base": 0, "created_at": time.time()}
+
+    async def enqueue(self, job_id: str) -> None:
+        await self.queue.put(job_id)
+
+    async def dequeue(self, timeout: float) -> Optional[str]:
+        try:
+            job_id = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self._jobs[job_id]["heartbeat_at"] = time.time()
+        return job_id
+
+    async def load(self, job_id: str) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+        job = self._jobs.get(job_id)
+        return (job["pdf"], job["params"]) if job else None
+
+    async def set_status(self, job_id: str, status: str) -> None:
+        self._jobs[job_id]["status"] = status
+
+    async def heartbeat(self, job_id: str) -> None:
+        self._jobs[job_id]["heartbeat_at"] = time.time()
+
+    async def finish(self, job_id: str) -> None:
+        self._jobs[job_id].pop("pdf", None)
+
+    async def requeue_stale(self) -> int:
+        return 0
+
+    async def append_event(self, job_id: str, event: Dict[str, Any]) -> int:
+        job = self._jobs[job_id]
+        job["events"].append(event)
+        return job["events_base"] + len(job["events"])
+
+    async def reset_events(self, job_id: str) -> None:
+        job = self._jobs[job_id]
+        job["events_base"] += len(job["events"])
+        job["events"] = []
+
+    async def events(self, job_id: str, offset: int) -> Tuple[int, List[Dict[str, Any]]]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return offset, []
+        start = max(offset, job["events_base"])
+        return start, list(job["events"][start - job["events_base"]:])
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        self._expire()
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        return {"job_id": job_id, "status": job["status"], "event_count": job["events_base"] + len(job["events"]), "created_at": job["created_at"]}
+
+
+class RedisJobStore:
+    """
+    Redis-backed queue and event log shared by API processes and workers.
+    Dequeued jobs move atomically to a processing list; jobs whose worker stops heartbeating are requeued.
+    """
+
+    QUEUE_KEY = "jobs:queue"
+    PROCESSING_KEY = "jobs:processing"
+
+    def __init__(self, url: str):
+        import redis.asyncio as aioredis
+        self._client = aioredis.from_url(url)
+
+    async def create(self, job_id: str, pdf_content: bytes, params: Dict[str, Any]) -> None:
+        key = f"job:{job_id}"
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={"status": "queued", "params": json.dumps(params), "created_at": time.time()})
+            pipe.expire(key, JOB_TTL)
+            pipe.set(f"{key}:pdf", pdf_content, ex=JOB_TTL)
+            await pipe.execute()
+
+    async def enqueue(self, job_id: str) -> None:
+        await self._client.lpush(self.QUEUE_KEY, job_id)
+
+    async def dequeue(self, timeout: float) -> Optional[str]:
+        job_id = await self._client.blmove(self.QUEUE_KEY, self.PROCESSING_KEY, timeout, src="RIGHT", dest="LEFT")
+        if job_id is None:
+            return None
+        job_id = job_id.decode("utf-8")
+        await self.heartbeat(job_id)
+        return job_id
+
+    async def load(self, job_id: str) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+        pdf_content = await self._client.get(f"job:{job_id}:pdf")
+        params = await self._client.hget(f"job:{job_id}", "params")
+        if pdf_content is None or params is None:
+            return None
+        return pdf_content, json.loads(params)
+
+    async def set_status(self, job_id: str, status: str) -> None:
+        await self._client.hset(f"job:{job_id}", "status", status)
+
+    async def heartbeat(self, job_id: str) -> None:
+        await self._client.hset(f"job:{job_id}", "heartbeat_at", time.time())
+
+    async def finish(self, job_id: str) -> None:
+        await self._client.lrem(self.PROCESSING_KEY, 0, job_id)
+        await self._client.delete(f"job:{job_id}:pdf")
+
+    async def requeue_stale(self) -> int:
+        requeued = 0
+        for raw_id in await self._client.lrange(self.PROCESSING_KEY, 0, -1):
+            job_id = raw_id.decode("utf-8")
+            heartbeat_at = await self._client.hget(f"job:{job_id}", "heartbeat_at")
+            if heartbeat_at is not None and time.time() - float(heartbeat_at) < JOB_LEASE_SECONDS:
+                continue
+            # LREM guards against two workers requeueing the same job.
+            if await self._client.lrem(self.PROCESSING_KEY, 1, job_id):
+                await self._client.hset(f"job:{job_id}", "heartbeat_at", time.time())
+                await self._client.rpush(self.QUEUE_KEY, job_id)
+                requeued += 1
+        return requeued
+
+    async def _events_base(self, job_id: str) -> int:
+        return int(await self._client.hget(f"job:{job_id}", "events_base") or 0)
+
+    async def append_event(self, job_id: str, event: Dict[str, Any]) -> int:
+        key = f"job:{job_id}:events"
+        length = await self._client.rpush(key, json.dumps(event))
+        if length == 1:
+            await self._client.expire(key, JOB_TTL)
+        return await self._events_base(job_id) + length
+
+    async def reset_events(self, job_id: str) -> None:
+        key = f"job:{job_id}:events"
+        length = await self._client.llen(key)
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.hincrby(f"job:{job_id}", "events_base", length)
+            pipe.delete(key)
+            await pipe.execute()
+
+    async def events(self, job_id: str, offset: int) -> Tuple[int, List[Dict[str, Any]]]:
+        base = await self._events_base(job_id)
+        start = max(offset, base)
+        return start, [json.loads(raw) for raw in await self._client.lrange(f"job:{job_id}:events", start - base, -1)]
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = await self._client.hgetall(f"job:{job_id}")
+        if not job:
+            return None
+        return {
+            "job_id": job_id,
+            "status": job[b"status"].decode("utf-8"),
+            "event_count": int(job.get(b"events_base", 0)) + await self._client.llen(f"job:{job_id}:events"),
+            "created_at": float(job[b"created_at"]),
+        }
+
+
+def build_job_store():
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        return RedisJobStore(redis_url)
+    return MemoryJobStore()
+
+
+# --- Workers ---
+async def _heartbeat(store, job_id: str) -> None:
+    while True:
+        await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+        await store.heartbeat(job_id)
+
+
+async def process_job(store, runner: JobRunner, job_id: str) -> None:
+    loaded = await store.load(job_id)
+    if loaded is None:
+        await store.finish(job_id)
+        return
+    pdf_content, params = loaded
+
+    job = await store.get(job_id)
+    if job and job["status"] == "running":
+        # The rerun's events replace the interrupted attempt's; offsets carry on from where it stopped.
+        await store.reset_events(job_id)
+        await store.append_event(job_id, {"type": "status", "payload": {"message": "Worker restarted; resuming job from the beginning..."}})
+    await store.set_status(job_id, "running")
+
+    heartbeat = asyncio.create_task(_heartbeat(store, job_id))
+    status = "completed"
+    try:
+        async for event in runner(pdf_content, params):
+            await store.append_event(job_id, event)
+            if event["type"] == "error":
+                status = "failed"
+    except Exception as e:
+        status = "failed"
+        await store.append_event(job_id, {"type": "error", "payload": {"message": f"An unexpected error occurred: {str(e)}"}})
+    finally:
+        heartbeat.cancel()
+    await store.set_status(job_id, status)
+    await store.finish(job_id)
+
+
+async def run_worker(store, runner: JobRunner) -> None:
+    """Takes jobs off the queue forever. Run several of these to process jobs concurrently."""
+    while True:
+        try:
+            await store.requeue_stale()
+            job_id = await store.dequeue(timeout=5)
+            if job_id is not None:
+                await process_job(store, runner, job_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Job worker error: {type(e).__name__} - {e}")
+            await asyncio.sleep(1)
+
+
+async def replay_events(store, job_id: str, offset: int = 0) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Yields (offset after the event, event) from `offset` on, following the job until it finishes.
+    Events of an interrupted attempt that were not read before the job restarted are skipped.
+    """
+    while True:
+        start, events = await store.events(job_id, offset)
+        offset = start
+        for event in events:
+            offset += 1
+            yield offset, event
+        job = await store.get(job_id)
+        if job is None or (job["status"] in FINISHED_STATUSES and offset >= job["event_count"]):
+            return
+        await asyncio.sleep(JOB_POLL_INTERVAL)
@@ -0,0 +1,174 @@
+"""
+Async LLM backends. Each backend turns a prompt into text without blocking the event loop,
+so an in-flight call holds no thread and is cancelled together with the task awaiting it.
+"""
+import asyncio
+import json
+import os
+import re
+from typing import Callable, Optional
+
+from batching import estimate_tokens
+from metrics import record_llm_tokens
+
+# --- Configuration ---
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
+DEEPSEEK_BASE_URL = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com/v1")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_MAX_OUTPUT_TOKENS = int(os.getenv("LLM_MAX_OUTPUT_TOKENS", "4096"))
+# "fake" models answer locally; only for tests and benchmarks.
+FAKE_LLM_ENABLED = os.getenv("FAKE_LLM_ENABLED", "0") == "1"
+FAKE_LLM_LATENCY = float(os.getenv("FAKE_LLM_LATENCY", "0"))
+# Models tried after the requested one (comma-separated), e.g. "deepseek-chat"; see llm_router.py.
+LLM_FALLBACK_MODELS = [name.strip() for name in os.getenv("LLM_FALLBACK_MODELS", "").split(",") if name.strip()]
+
+
+class LLMBackend:
+    """Interface: `provider` names the rate limiter bucket; `generate` returns the model's text answer."""
+
+    provider = "llm"
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    async def generate(self, prompt: str) -> str:
+        raise NotImplementedError
+
+
+class GeminiBackend(LLMBackend):
+    provider = "gemini"
+    _configured = False
+
+    def __init__(self, model_name: str):
+        super().__init__(model_name)
+        if not GEMINI_API_KEY:
+            raise ValueError("GEMINI_API_KEY is not configured.")
+        import google.generativeai as genai
+        if not GeminiBackend._configured:
+            genai.configure(api_key=GEMINI_API_KEY)
+            GeminiBackend._configured = True
+        self.model = genai.GenerativeModel(model_name)
+
+    async def generate(self, prompt: str) -> str:
+        response = await self.model.generate_content_async(prompt, request_options={"timeout": LLM_TIMEOUT})
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            record_llm_tokens(self.model_name, usage.prompt_token_count, usage.candidates_token_count)
+        return response.text
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """Chat-completions API (DeepSeek and other OpenAI-compatible servers). Clients are shared per base URL."""
+
+    _clients = {}
+
+    def __init__(self, model_name: str, provider: str, api_key: Optional[str], base_url: str):
+        super().__init__(model_name)
+        if not api_key:
+            raise ValueError(f"{provider.upper()}_API_KEY is not configured.")
+        self.provider = provider
+        self.client = self._clients.get(base_url)
+        if self.client is None:
+            from openai import AsyncOpenAI
+            # Retries are handled by LLMClient so they go through the rate limiter.
+            self.client = self._clients[base_url] = AsyncOpenAI(api_key=api_key, base_url=base_url, timeout=LLM_TIMEOUT, max_retries=0)
+
+    async def generate(self, prompt: str) -> str:
+        chat_completion = await self.client.chat.completions.create(
+            model=self.model_name,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=LLM_MAX_OUTPUT_TOKENS,
+        )
+        if chat_completion.usage is not None:
+            record_llm_tokens(self.model_name, chat_completion.usage.prompt_tokens, chat_completion.usage.completion_tokens)
+        return chat_completion.choices[0].message.content
+
+    @classmethod
+    async def close_all(cls) -> None:
+        clients, cls._clients = cls._clients, {}
+        for client in clients.values():
+            await client.close()
+
+
+def fake_answer(prompt: str) -> str:
+    """Deterministic, well-formed answers for every prompt LLMClient sends."""
+    from citation_parser import parse_citation
+
+    def parsed(text: str) -> dict:
+        local = parse_citation(text)
+        if local:
+            ref = local.reference
+            return {"authors": ref.authors, "year": ref.year, "title": ref.title, "source": ref.source}
+        return {"authors": None, "year": None, "title": " ".join(text.split()[:8]) or None, "source": None}
+
+    if "Citations to parse" in prompt:
+        citations = re.findall(r"^\s*\[(\d+)\] (\".*\")$", prompt, re.MULTILINE)
+        return json.dumps([{"index": int(index), **parsed(json.loads(text))} for index, text in citations])
+    if "Parsed Citations" in prompt:
+        count = len(re.findall(r"^\s*\[\d+\] \{", prompt, re.MULTILINE))
+        return json.dumps([{"index": i + 1, "suggestion": None} for i in range(count)])
+    match = re.search(r'Citation to parse: "(.*)"\s*JSON output', prompt, re.DOTALL)
+    if match:
+        return json.dumps(parsed(match.group(1)))
+    if "Parsed Citation:" in prompt:
+        return "None"
+    match = re.search(r'Raw Text: "(.*)"\s*Title:', prompt, re.DOTALL)
+    if match:
+        return parsed(match.group(1))["title"] or ""
+    match = re.search(r'Text to analyze: "(.*)"\s*JSON output', prompt, re.DOTALL)
+    if match:
+        first_line = next((line.strip() for line in match.group(1).splitlines() if line.strip()), None)
+        return json.dumps({"title": first_line, "authors": None, "year": None, "affiliation": None})
+    return "Not Found"
+
+
+class FakeBackend(LLMBackend):
+    """Answers locally after a fixed latency. `model_name` may carry the latency, e.g. "fake:0.2"."""
+
+    provider = "fake"
+
+    def __init__(self, model_name: str = "fake", latency: Optional[float] = None, responder: Callable[[str], str] = fake_answer):
+        super().__init__(model_name)
+        _, _, suffix = model_name.partition(":")
+        self.latency = latency if latency is not None else (float(suffix) if suffix else FAKE_LLM_LATENCY)
+        self.responder = responder
+        self.calls = 0
+
+    async def generate(self, prompt: str) -> str:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        answer = self.responder(prompt)
+        record_llm_tokens(self.model_name, estimate_tokens(prompt), estimate_tokens(answer))
+        return answer
+
+
+def build_single_backend(model_name: str) -> LLMBackend:
+    if "gemini" in model_name:
+        return GeminiBackend(model_name)
+    if "deepseek" in model_name:
+        return OpenAICompatibleBackend(model_name, "deepseek", DEEPSEEK_API_KEY, DEEPSEEK_BASE_URL)
+    if model_name.startswith("fake") and FAKE_LLM_ENABLED:
+        return FakeBackend(model_name)
+    raise ValueError(f"Unsupported model: {model_name}")
+
+
+def build_backend(model_name: str) -> LLMBackend:
+    """
+    A single backend, or a CompositeBackend when `model_name` lists several models ("gemini-1.5-pro,deepseek-chat")
+    or LLM_FALLBACK_MODELS is set. Fallback models without an API key are skipped.
+    """
+    names = [name.strip() for name in model_name.split(",") if name.strip()]
+    backends = [build_single_backend(name) for name in names]
+    for name in LLM_FALLBACK_MODELS:
+        if name in names:
+            continue
+        try:
+            backends.append(build_single_backend(name))
+        except ValueError as e:
+            print(f"Fallback model {name} unavailable: {e}")
+    if len(backends) == 1:
+        return backends[0]
+    from llm_router import CompositeBackend
+    return CompositeBackend(backends)
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from batching import estimate_tokens
+from verification_cache import REDIS_URL, DiskTier, MemoryTier, RedisTier, VerificationCache
+
+# --- Configuration ---
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(30 * 24 * 3600)))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# SQLite file for a disk tier; unset to keep memoized answers in memory (and Redis) only.
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH")
+LLM_CACHE_REDIS = os.getenv("LLM_CACHE_REDIS", "1") == "1"
+
+
+def normalize_input(value: Any) -> str:
+    """Whitespace-insensitive text, or canonical JSON for structured inputs."""
+    if isinstance(value, str):
+        return " ".join(value.split())
+    return json.dumps(value, sort_keys=True, ensure_ascii=False)
+
+
+def is_error_response(text: Optional[str]) -> bool:
+    return not text or not text.strip() or text.lstrip().startswith("Error")
+
+
+class LLMResponseCache:
+    """
+    Memoizes LLM answers by model, prompt kind, prompt template version and normalized input.
+    Uses the same tiered cache as verification results: a byte-bounded memory LRU, then an optional
+    SQLite disk tier and Redis. Error answers are never stored.
+    """
+
+    def __init__(self, cache: Optional[VerificationCache], enabled: bool = LLM_CACHE_ENABLED):
+        self.cache = cache
+        self.enabled = enabled and cache is not None
+        self.counters: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "errors_not_cached": 0, "tokens_saved": 0}
+
+    @staticmethod
+    def key(model_name: str, kind: str, version: int, value: Any) -> str:
+        digest = hashlib.sha1(normalize_input(value).encode("utf-8")).hexdigest()
+        return f"{model_name}:{kind}:v{version}:{digest}"
+
+    async def get(self, key: str, prompt_tokens: int = 0) -> Optional[str]:
+        if not self.enabled:
+            return None
+        entry = await self.cache.get(key)
+        if entry is None or not entry["found"]:
+            self.counters["misses"] += 1
+            return None
+        text = entry["result"]["text"]
+        self.counters["hits"] += 1
+        self.counters["tokens_saved"] += prompt_tokens + estimate_tokens(text)
+        return text
+
+    async def set(self, key: str, text: Optional[str]) -> None:
+        if not self.enabled:
+            return
+        if is_error_response(text):
+            self.counters["errors_not_cached"] += 1
+            return
+        self.counters["stores"] += 1
+        await self.cache.set(key, {"text": text})
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        hit_rate = self.counters["hits"] / lookups if lookups else 0.0
+        tiers = self.cache.stats()["tiers"] if self.cache else []
+        return {"enabled": self.enabled, **self.counters, "hit_rate": round(hit_rate, 4), "tiers": tiers}
+
+
+def build_llm_cache() -> LLMResponseCache:
+    if not LLM_CACHE_ENABLED:
+        return LLMResponseCache(None, enabled=False)
+    tiers: List[Any] = [MemoryTier(maxsize=10 ** 9, max_bytes=LLM_CACHE_MAX_BYTES)]
+    if LLM_CACHE_PATH:
+        try:
+            tiers.append(DiskTier(LLM_CACHE_PATH))
+        except Exception as e:
+            print(f"Disk LLM cache disabled: {e}")
+    if REDIS_URL and LLM_CACHE_REDIS:
+        try:
+            tiers.append(RedisTier(REDIS_URL, "llm"))
+        except Exception as e:
+            print(f"Redis LLM cache disabled: {e}")
+    return LLMResponseCache(VerificationCache(tiers, ttl=LLM_CACHE_TTL, name="llm"))
+
+
+llm_cache = build_llm_cache()
@@ -0,0 +1,243 @@
+"""
+Routes one prompt across several LLM backends: hedged racing, failover and per-provider circuit breakers.
+
+Health (latency histogram and breaker state) is kept per backend model name for the whole process,
+so every LLMClient sees the same view of an unhealthy or slow provider.
+"""
+import asyncio
+import bisect
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from llm_backends import LLMBackend
+
+# --- Configuration ---
+# "hedged": start the next backend when the running ones are slower than their recent latency percentile.
+# "failover": the next backend only after an error or timeout. "race": all backends at once.
+LLM_ROUTING = os.getenv("LLM_ROUTING", "hedged")
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+# Hedge delay used until a backend has LLM_HEDGE_MIN_SAMPLES latencies, and the floor afterwards.
+LLM_HEDGE_DEFAULT_DELAY = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY", "8"))
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "1"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_LATENCY_WINDOW = int(os.getenv("LLM_LATENCY_WINDOW", "200"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is unbounded.
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+
+
+class LatencyHistogram:
+    """Cumulative bucket counts for reporting, plus a window of recent samples for percentiles."""
+
+    def __init__(self, window: int = LLM_LATENCY_WINDOW):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.recent: deque = deque(maxlen=window)
+
+    def observe(self, seconds: float) -> None:
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.recent.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.recent:
+            return None
+        samples = sorted(self.recent)
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def stats(self) -> Dict[str, Any]:
+        bounds = [str(bound) for bound in LATENCY_BUCKETS] + ["+Inf"]
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 4) if self.count else None,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "buckets": dict(zip(bounds, self.buckets)),
+        }
+
+
+class CircuitBreaker:
+    """
+    Opens after `failures` consecutive errors and rejects calls for `cooldown` seconds.
+    Then one trial call is let through (half-open): success closes the breaker, failure reopens it.
+    """
+
+    def __init__(self, failures: int = LLM_BREAKER_FAILURES, cooldown: float = LLM_BREAKER_COOLDOWN):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.trial_in_flight or self.consecutive_failures >= self.failures:
+            if self.opened_at is None or self.trial_in_flight:
+                self.times_opened += 1
+            self.opened_at = time.monotonic()
+        self.trial_in_flight = False
+
+    def release(self) -> None:
+        """A trial call was cancelled without an outcome; let the next call try instead."""
+        self.trial_in_flight = False
+
+
+class ProviderHealth:
+    def __init__(self, provider: str):
+        self.provider = provider
+        self.latency = LatencyHistogram()
+        self.breaker = CircuitBreaker()
+        self.counters = {"calls": 0, "successes": 0, "errors": 0, "cancelled": 0, "wins": 0, "hedges": 0, "rejected": 0}
+
+    def hedge_delay(self) -> float:
+        if len(self.latency.recent) < LLM_HEDGE_MIN_SAMPLES:
+            return LLM_HEDGE_DEFAULT_DELAY
+        return max(LLM_HEDGE_MIN_DELAY, self.latency.percentile(LLM_HEDGE_PERCENTILE))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "provider": self.provider,
+            **self.counters,
+            "breaker": self.breaker.state,
+            "breaker_opened": self.breaker.times_opened,
+            "hedge_delay": round(self.hedge_delay(), 3),
+            "latency": self.latency.stats(),
+        }
+
+
+_health: Dict[str, ProviderHealth] = {}
+
+
+def provider_health(backend: LLMBackend) -> ProviderHealth:
+    health = _health.get(backend.model_name)
+    if health is None:
+        health = _health[backend.model_name] = ProviderHealth(backend.provider)
+    return health
+
+
+def router_stats() -> Dict[str, Any]:
+    return {"routing": LLM_ROUTING, "backends": {name: health.stats() for name, health in _health.items()}}
+
+
+Attempt = Callable[[LLMBackend, str], Awaitable[str]]
+
+
+async def _direct(backend: LLMBackend, prompt: str) -> str:
+    return await backend.generate(prompt)
+
+
+class CompositeBackend(LLMBackend):
+    """
+    Several backends behind one interface, in order of preference.
+    `generate` starts with the first backend whose breaker is closed and brings in the next one when the
+    running ones fail, or (hedged) take longer than their recent LLM_HEDGE_PERCENTILE latency.
+    The first answer wins and the other calls are cancelled. When every breaker is open, all backends
+    are tried anyway rather than failing outright.
+    """
+
+    provider = "composite"
+
+    def __init__(self, backends: List[LLMBackend], routing: str = LLM_ROUTING):
+        super().__init__(",".join(backend.model_name for backend in backends))
+        self.backends = backends
+        self.routing = routing
+
+    async def _timed(self, backend: LLMBackend, health: ProviderHealth, prompt: str, attempt: Attempt) -> str:
+        health.counters["calls"] += 1
+        started = time.monotonic()
+        try:
+            text = await attempt(backend, prompt)
+        except asyncio.CancelledError:
+            health.counters["cancelled"] += 1
+            health.breaker.release()
+            raise
+        except Exception:
+            health.counters["errors"] += 1
+            health.breaker.record_failure()
+            raise
+        health.latency.observe(time.monotonic() - started)
+        health.counters["successes"] += 1
+        health.breaker.record_success()
+        return text
+
+    async def generate(self, prompt: str, attempt: Attempt = _direct) -> str:
+        text, _ = await self.generate_with_model(prompt, attempt)
+        return text
+
+    async def generate_with_model(self, prompt: str, attempt: Attempt = _direct) -> Tuple[str, str]:
+        """The first answer and the name of the model that gave it; raises RuntimeError when every backend failed."""
+        healths = {backend.model_name: provider_health(backend) for backend in self.backends}
+        candidates = list(self.backends)
+        running: Dict[asyncio.Task, LLMBackend] = {}
+        errors: List[str] = []
+        bypass_breakers = False
+
+        def launch(hedge: bool = False) -> bool:
+            while candidates:
+                backend = candidates.pop(0)
+                health = healths[backend.model_name]
+                if not bypass_breakers and not health.breaker.allow():
+                    health.counters["rejected"] += 1
+                    continue
+                if hedge:
+                    health.counters["hedges"] += 1
+                running[asyncio.create_task(self._timed(backend, health, prompt, attempt))] = backend
+                return True
+            return False
+
+        try:
+            if not launch():
+                # Every breaker is open; trying them all is better than failing the whole run.
+                candidates, bypass_breakers = list(self.backends), True
+                launch()
+            while candidates and self.routing == "race":
+                launch()
+            while running:
+                timeout = None
+                if candidates and self.routing == "hedged":
+                    timeout = min(healths[backend.model_name].hedge_delay() for backend in running.values())
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    launch(hedge=True)
+                    continue
+                for task in done:
+                    backend = running.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        healths[backend.model_name].counters["wins"] += 1
+                        return task.result(), backend.model_name
+                    errors.append(f"{backend.model_name}: {str(error) or type(error).__name__}")
+                if not running or self.routing != "failover":
+                    launch()
+        finally:
+            for task in running:
+                task.cancel()
+        raise RuntimeError("; ".join(errors) or "no LLM backend available")
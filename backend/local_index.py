@@ -0,0 +1,330 @@
+"""
+Offline bibliographic index built from CrossRef/OpenAlex JSONL dumps.
+
+An index directory holds:
+- records.bin: one tab-separated record per line (doi, title, year, container, author surnames).
+- offsets.bin: uint64 start offset of every record, plus the end of the file.
+- terms.bin / term_offsets.bin: sorted uint32 crc32 hashes of every title token and "doi:<doi>",
+  with the uint64 start of each term's posting list (plus the end).
+- postings.bin: uint32 record ids, ascending within each term.
+A DOI lookup or a title term is a binary search in terms.bin followed by a slice of postings.bin.
+Every file is memory-mapped read-only, so worker processes share one copy through the page cache.
+
+Usage:
+    python local_index.py build INDEX_DIR dump.jsonl [dump2.jsonl.gz ...]
+    python local_index.py query INDEX_DIR "title or DOI"
+"""
+import array
+import gzip
+import json
+import mmap
+import os
+import re
+import sys
+import tempfile
+import zlib
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from title_matcher import Candidate, TitleMatcher
+from verification_cache import normalize_doi, normalize_text
+
+# --- Configuration ---
+LOCAL_INDEX_PATH = os.getenv("LOCAL_INDEX_PATH")
+# Title matches need the same fuzzy score as the online databases.
+LOCAL_INDEX_MIN_SCORE = int(os.getenv("LOCAL_INDEX_MIN_SCORE", "86"))
+INDEX_VERSION = 1
+MAX_QUERY_TERMS = 8
+# Upper bound on the postings a title query scans, which bounds its latency.
+MAX_SEED_POSTINGS = 50_000
+MAX_CANDIDATES = 10
+# Build-time partitions by the top bits of the key; each one is sorted on its own.
+BUILD_BUCKETS = 256
+BUILD_FLUSH_ITEMS = 1 << 20
+
+_STOPWORDS = frozenset("a an and are as at by for from in into is of on or the to with via using its their based".split())
+_CJK_RUN = re.compile(r"[぀-ヿ一-鿿]+")
+
+
+# --- Tokens and keys ---
+def _hash(term: str) -> int:
+    return zlib.crc32(term.encode("utf-8"))
+
+
+def title_terms(title: str) -> List[str]:
+    """Distinct word tokens, plus character bigrams for Chinese/Japanese runs."""
+    normalized = normalize_text(title)
+    terms = {token for token in normalized.split() if len(token) > 1 and token not in _STOPWORDS and not _CJK_RUN.fullmatch(token)}
+    for run in _CJK_RUN.findall(normalized):
+        terms.update(run[i:i + 2] for i in range(max(1, len(run) - 1)))
+    return list(terms)
+
+
+def _doi_term(doi: str) -> str:
+    return "doi:" + normalize_doi(doi)
+
+
+# --- Dump readers ---
+def _first(value: Any) -> str:
+    if isinstance(value, list):
+        return str(value[0]) if value else ""
+    return str(value or "")
+
+
+def record_from_item(item: Dict[str, Any]) -> Optional[Tuple[str, str, str, str, str]]:
+    """(doi, title, year, container, surnames) from a CrossRef or OpenAlex work, or None without a title."""
+    if "openalex" in str(item.get("id", "")) or "display_name" in item or "authorships" in item:
+        title = item.get("title") or item.get("display_name") or ""
+        doi = (item.get("doi") or "").replace("https://doi.org/", "")
+        year = item.get("publication_year") or ""
+        location = item.get("primary_location") or {}
+        container = ((location.get("source") or {}).get("display_name")) or (item.get("host_venue") or {}).get("display_name") or ""
+        surnames = [((authorship.get("author") or {}).get("display_name") or "").split(" ")[-1] for authorship in item.get("authorships") or []]
+    else:
+        title = _first(item.get("title"))
+        doi = item.get("DOI") or ""
+        parts = ((item.get("issued") or item.get("published") or {}).get("date-parts") or [[None]])[0]
+        year = parts[0] if parts and parts[0] else ""
+        container = _first(item.get("container-title"))
+        surnames = [author.get("family") or author.get("name") or "" for author in item.get("author") or []]
+    title = " ".join(str(title).split())
+    if not title:
+        return None
+    fields = (normalize_doi(doi) if doi else "", title, str(year), container, ";".join(name for name in surnames if name))
+    return tuple(" ".join(field.split()) for field in fields)
+
+
+def read_dump(path: str) -> Iterator[Dict[str, Any]]:
+    """Works from a JSONL dump (optionally gzipped). Lines may also wrap items as {"items": [...]} or {"message": {...}}."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError:
+                continue
+            if "message" in data and isinstance(data["message"], dict):
+                data = data["message"]
+            items = data.get("items") if isinstance(data.get("items"), list) else [data]
+            yield from items
+
+
+# --- Build ---
+def build_index(records: Iterable[Tuple[str, str, str, str, str]], index_dir: str) -> int:
+    """Writes an index from (doi, title, year, container, surnames) records. Returns the record count."""
+    os.makedirs(index_dir, exist_ok=True)
+    offsets = array.array("Q", [0])
+    count = 0
+    with tempfile.TemporaryDirectory(dir=index_dir) as spill_dir:
+        buckets = [array.array("Q") for _ in range(BUILD_BUCKETS)]
+        spill_paths = [os.path.join(spill_dir, f"{i}.bin") for i in range(BUILD_BUCKETS)]
+        buffered = 0
+
+        def flush():
+            for bucket, spill_path in zip(buckets, spill_paths):
+                if bucket:
+                    with open(spill_path, "ab") as spill:
+                        bucket.tofile(spill)
+                    del bucket[:]
+
+        with open(os.path.join(index_dir, "records.bin"), "wb") as out:
+            position = 0
+            for record in records:
+                line = ("\t".join(record) + "\n").encode("utf-8")
+                out.write(line)
+                position += len(line)
+                offsets.append(position)
+
+                terms = title_terms(record[1])
+                if record[0]:
+                    terms.append(_doi_term(record[0]))
+                for term in terms:
+                    key = (_hash(term) << 32) | count
+                    buckets[key >> 56].append(key)
+                buffered += len(terms)
+                count += 1
+                if buffered >= BUILD_FLUSH_ITEMS:
+                    flush()
+                    buffered = 0
+        flush()
+
+        terms = array.array("I")
+        term_offsets = array.array("Q", [0])
+        with open(os.path.join(index_dir, "postings.bin"), "wb") as out:
+            for spill_path in spill_paths:
+                if not os.path.exists(spill_path):
+                    continue
+                keys = array.array("Q")
+                with open(spill_path, "rb") as spill:
+                    keys.frombytes(spill.read())
+                # Reinterpret the sorted uint64 keys as (record id, term hash) uint32 pairs.
+                halves = array.array("I")
+                halves.frombytes(array.array("Q", sorted(keys)).tobytes())
+                ids, hashes = (halves[0::2], halves[1::2]) if sys.byteorder == "little" else (halves[1::2], halves[0::2])
+                ids.tofile(out)
+                base = term_offsets[-1]
+                position = 0
+                while position < len(hashes):
+                    end = bisect_right(hashes, hashes[position], position)
+                    terms.append(hashes[position])
+                    term_offsets.append(base + end)
+                    position = end
+
+    for name, values in (("offsets.bin", offsets), ("terms.bin", terms), ("term_offsets.bin", term_offsets)):
+        with open(os.path.join(index_dir, name), "wb") as out:
+            values.tofile(out)
+    with open(os.path.join(index_dir, "meta.json"), "w") as out:
+        json.dump({"version": INDEX_VERSION, "records": count}, out)
+    return count
+
+
+def build_from_dumps(paths: List[str], index_dir: str) -> int:
+    def records():
+        for path in paths:
+            for item in read_dump(path):
+                record = record_from_item(item)
+                if record:
+                    yield record
+    return build_index(records(), index_dir)
+
+
+# --- Query ---
+class LocalIndex:
+    """Read-only, memory-mapped view of an index directory. Lookups are synchronous and thread-safe."""
+
+    def __init__(self, index_dir: str):
+        with open(os.path.join(index_dir, "meta.json")) as f:
+            meta = json.load(f)
+        if meta.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported local index version {meta.get('version')} in {index_dir}")
+        self.record_count = meta["records"]
+        self._maps = []
+        self._records = self._map(os.path.join(index_dir, "records.bin"))
+        self._offsets = self._map(os.path.join(index_dir, "offsets.bin")).cast("Q")
+        self._terms = self._map(os.path.join(index_dir, "terms.bin")).cast("I")
+        self._term_offsets = self._map(os.path.join(index_dir, "term_offsets.bin")).cast("Q")
+        self._postings = self._map(os.path.join(index_dir, "postings.bin")).cast("I")
+
+    def _map(self, path: str) -> memoryview:
+        if os.path.getsize(path) == 0:
+            return memoryview(b"")
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return memoryview(mapped)
+
+    def _run(self, term: str) -> Tuple[int, int]:
+        """Bounds of the term's posting list in postings.bin; empty when the term is unknown."""
+        term_hash = _hash(term)
+        position = bisect_left(self._terms, term_hash)
+        if position == len(self._terms) or self._terms[position] != term_hash:
+            return 0, 0
+        return self._term_offsets[position], self._term_offsets[position + 1]
+
+    def _contains(self, low: int, high: int, record_id: int) -> bool:
+        position = bisect_left(self._postings, record_id, low, high)
+        return position < high and self._postings[position] == record_id
+
+    def record(self, record_id: int) -> Dict[str, Any]:
+        doi, title, year, container, surnames = bytes(self._records[self._offsets[record_id]:self._offsets[record_id + 1] - 1]).decode("utf-8").split("\t")
+        return {"doi": doi or None, "title": title, "year": int(year) if year.isdigit() else None, "container": container, "authors": surnames.split(";") if surnames else []}
+
+    def lookup_doi(self, doi: str) -> Optional[Dict[str, Any]]:
+        wanted = normalize_doi(doi)
+        low, high = self._run(_doi_term(wanted))
+        for record_id in self._postings[low:high]:
+            record = self.record(record_id)
+            if record["doi"] == wanted:
+                return record
+        return None
+
+    def search_title(self, title: str, year: Optional[int] = None, authors: Optional[List[str]] = None, min_score: int = LOCAL_INDEX_MIN_SCORE) -> Optional[Tuple[float, Dict[str, Any]]]:
+        """
+        Best (title score, record) among records sharing most of the title's terms, ranked by
+        TitleMatcher with the year and authors when given.
+        A candidate must contain all but one in four of the (up to MAX_QUERY_TERMS rarest) known terms,
+        so by prefix filtering it contains one of the rarest `len(runs) - needed + 1`; only those
+        posting lists are scanned, and the rest are intersected with the candidates.
+        """
+        runs = sorted((high - low, low, high) for low, high in map(self._run, title_terms(title)) if high > low)[:MAX_QUERY_TERMS]
+        if not runs:
+            return None
+        needed = len(runs) - len(runs) // 4
+        seeds = len(runs) - needed + 1
+        if sum(length for length, _, _ in runs[:seeds]) > MAX_SEED_POSTINGS:
+            # Only very common words; leave it to the online sources rather than scan huge lists.
+            return None
+
+        counts: Counter = Counter()
+        for _, low, high in runs[:seeds]:
+            counts.update(self._postings[low:high])
+        for checked, (length, low, high) in enumerate(runs[seeds:], seeds):
+            # Drop candidates that can no longer reach `needed` even if they contain every term left.
+            reachable = needed - (len(runs) - checked)
+            if reachable > 1:
+                counts = Counter({record_id: hits for record_id, hits in counts.items() if hits >= reachable})
+            if length < 32 * len(counts):
+                present = counts.keys() & self._postings[low:high]
+            else:
+                present = [record_id for record_id in counts if self._contains(low, high, record_id)]
+            counts.update(present)
+
+        candidates = []
+        wanted_terms = set(title_terms(title))
+        for record_id, hits in counts.most_common(MAX_CANDIDATES):
+            if hits < needed:
+                break
+            record = self.record(record_id)
+            # Cheap term-overlap check first; fuzzy scoring is the expensive part of a query.
+            candidate_terms = set(title_terms(record["title"]))
+            if 2 * len(wanted_terms & candidate_terms) < min(len(wanted_terms), len(candidate_terms)):
+                continue
+            candidates.append(Candidate(record["title"], record["year"], record["authors"], record))
+        match = TitleMatcher(min_score).best(title, candidates, year, authors)
+        return (match.title_score, match.candidate.payload) if match else None
+
+    def close(self) -> None:
+        self._records = self._offsets = self._terms = self._term_offsets = self._postings = None
+        for mapped in self._maps:
+            try:
+                mapped.close()
+            except BufferError:
+                pass
+        self._maps = []
+
+
+_local_index: Optional[LocalIndex] = None
+_local_index_failed = False
+
+
+def get_local_index() -> Optional[LocalIndex]:
+    """The index at LOCAL_INDEX_PATH, opened on first use; None when unset or unreadable."""
+    global _local_index, _local_index_failed
+    if _local_index is None and LOCAL_INDEX_PATH and not _local_index_failed:
+        try:
+            _local_index = LocalIndex(LOCAL_INDEX_PATH)
+        except Exception as e:
+            _local_index_failed = True
+            print(f"Local bibliographic index disabled: {type(e).__name__} - {e}")
+    return _local_index
+
+
+def main() -> None:
+    if len(sys.argv) >= 4 and sys.argv[1] == "build":
+        count = build_from_dumps(sys.argv[3:], sys.argv[2])
+        print(f"Indexed {count} records into {sys.argv[2]}")
+    elif len(sys.argv) == 4 and sys.argv[1] == "query":
+        index = LocalIndex(sys.argv[2])
+        query = sys.argv[3]
+        print(json.dumps(index.lookup_doi(query) if query.startswith("10.") else index.search_title(query), ensure_ascii=False, indent=2))
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
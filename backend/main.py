@@ -1,47 +1,96 @@
-from fastapi import FastAPI, Depends, UploadFile, File, Form
-from sqlalchemy.orm import Session
+from fastapi import FastAPI, UploadFile, File, Form, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-import PyPDF2
-import io
 import re
-from typing import List, Optional, Dict, Any
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
 import os
 import json
 import asyncio
-import httpx
-from fuzzywuzzy import fuzz
+import time
 
-# --- PDF Generation ---
-from report_generator import generate_pdf_report
-from fastapi.responses import StreamingResponse
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
 # --- LLM Integration ---
-import google.generativeai as genai
-from openai import OpenAI
+from llm_backends import LLM_TIMEOUT, LLMBackend, OpenAICompatibleBackend, build_backend
+from llm_cache import LLMResponseCache, llm_cache
+from llm_router import CompositeBackend, router_stats
 
 # --- Database and Schemas ---
 import models
 import schemas
 from database import SessionLocal, engine
+from concurrency import stage_semaphores, upstream_slot
+from batching import estimate_tokens, plan_batches
+from verification_cache import cited_doi, verification_cache, verification_cache_key
+from doi_resolver import crossref_candidate, doi_resolver
+from document_cache import citation_hash, document_cache, document_hash
+from http_client import http_clients
+from reference_splitter import parse_references
+from citation_parser import parse_confidently
+from local_index import get_local_index
+from title_matcher import MATCH_TOP_K, Candidate, parse_year, title_matcher
+from pdf_extraction import PdfLimitError, expand_uploads, extract_pdf_text, shutdown_process_pool
+from job_queue import build_job_store, new_job_id, replay_events, run_worker
+import metrics
+from metrics import record_llm_call, run_scope, timed_stage
+import run_store
+from run_store import RunRecorder, recorded_run
+from sse import event_mode as parse_event_mode, format_sse, sse_stream
+from rate_limiter import UPSTREAM_MAX_RETRIES, backoff_delay, parse_retry_after, rate_limiters
 
 # --- Configuration ---
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
-
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-
-deepseek_client = None
-if DEEPSEEK_API_KEY:
-    deepseek_client = OpenAI(
-        api_key=DEEPSEEK_API_KEY,
-        base_url="https://api.deepseek.com/v1"
-    )
+VERIFICATION_STRATEGY = os.getenv("VERIFICATION_STRATEGY", "hedged")
+HEDGE_DELAY = float(os.getenv("HEDGE_DELAY", "1.0"))
+HEDGE_GRACE_WINDOW = float(os.getenv("HEDGE_GRACE_WINDOW", "0.3"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# PDFs of one batch being extracted (and their metadata parsed) at the same time.
+BATCH_EXTRACT_CONCURRENCY = int(os.getenv("BATCH_EXTRACT_CONCURRENCY", "4"))
+REPORT_STREAM_CHUNK_BYTES = 64 * 1024
 
 # --- FastAPI App Initialization ---
-models.Base.metadata.create_all(bind=engine)
 app = FastAPI()
 
+job_store = build_job_store()
+job_workers: List[asyncio.Task] = []
+
+@app.on_event("startup")
+async def create_database_schema():
+    # Not at import time: importing main (worker.py, benchmarks, tests) must not need the database,
+    # and the API still starts when it is down. Runs are then not stored (see run_store.py).
+    try:
+        await asyncio.to_thread(models.Base.metadata.create_all, bind=engine)
+        run_store.schema_ready = True
+    except Exception as e:
+        run_store.schema_ready = False
+        print(f"Database schema setup failed: {type(e).__name__} - {e}; runs will not be stored")
+
+@app.on_event("startup")
+async def start_http_clients():
+    await http_clients.start()
+
+@app.on_event("startup")
+async def start_job_workers():
+    # Set JOB_WORKERS=0 when jobs are processed by separate `python worker.py` processes.
+    for _ in range(JOB_WORKERS):
+        job_workers.append(asyncio.create_task(run_worker(job_store, job_runner)))
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    for task in job_workers:
+        task.cancel()
+    job_workers.clear()
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    await http_clients.close()
+
+@app.on_event("shutdown")
+async def close_llm_clients():
+    await OpenAICompatibleBackend.close_all()
+
+@app.on_event("shutdown")
+def stop_pdf_workers():
+    shutdown_process_pool()
+
 origins = ["http://localhost:3000", "http://127.0.0.1:3000"]
 app.add_middleware(
     CORSMiddleware,
@@ -52,41 +101,98 @@ app.add_middleware(
 )
 
 # --- LLM Abstraction Layer ---
+def is_rate_limit_error(e: Exception) -> bool:
+    """Recognizes throttling errors from the Gemini (ResourceExhausted) and OpenAI-compatible (RateLimitError) SDKs."""
+    return (
+        getattr(e, "status_code", None) == 429
+        or getattr(e, "code", None) == 429
+        or type(e).__name__ in ("ResourceExhausted", "RateLimitError", "TooManyRequests")
+    )
+
+# Bump a prompt's version when its wording changes, so memoized answers to the old wording are not reused.
+PROMPT_VERSIONS = {"parse": 1, "unverified": 1, "format": 1, "rescue": 1, "metadata": 1}
+
+def format_fields(reference: schemas.Reference) -> Dict[str, Any]:
+    return {"authors": reference.authors, "year": reference.year, "title": reference.title, "source": reference.source}
+
 class LLMClient:
-    def __init__(self, model_name: str):
+    """
+    Prompts for each pipeline step, sent through async backends (see llm_backends.py) and routed
+    across fallback models by llm_router.CompositeBackend. Answers are memoized per model, prompt version and normalized input (see llm_cache.py),
+    under the model that gave them, so a fallback model's answer is never served as the primary model's.
+    """
+
+    def __init__(self, model_name: str, backend: Optional[LLMBackend] = None, cache: Optional[LLMResponseCache] = None):
         self.model_name = model_name
-        self.is_gemini = "gemini" in model_name
-        self.is_deepseek = "deepseek" in model_name
-
-        if self.is_gemini:
-            if not GEMINI_API_KEY:
-                raise ValueError("GEMINI_API_KEY is not configured.")
-            self.model = genai.GenerativeModel(self.model_name)
-        elif self.is_deepseek:
-            if not deepseek_client:
-                raise ValueError("DEEPSEEK_API_KEY is not configured.")
-            self.model = deepseek_client
-        else:
-            raise ValueError(f"Unsupported model: {model_name}")
+        backend = backend or build_backend(model_name)
+        # A single backend is routed too, so its latency and breaker state are tracked like any other.
+        self.backend = backend if isinstance(backend, CompositeBackend) else CompositeBackend([backend])
+        self.primary_model = self.backend.backends[0].model_name
+        self.cache = cache if cache is not None else llm_cache
+
+    async def _call_backend(self, backend: LLMBackend, prompt: str) -> str:
+        """One backend's answer, bounded by the shared LLM limit and paced by its provider's rate limiter; raises on failure."""
+        for attempt in range(UPSTREAM_MAX_RETRIES + 1):
+            try:
+                async with upstream_slot("llm"):
+                    await rate_limiters.acquire(backend.provider)
+                    started = time.perf_counter()
+                    try:
+                        text = await asyncio.wait_for(backend.generate(prompt), LLM_TIMEOUT)
+                    except asyncio.TimeoutError:
+                        record_llm_call(backend.model_name, "timeout", time.perf_counter() - started)
+                        raise
+                    except Exception:
+                        record_llm_call(backend.model_name, "error", time.perf_counter() - started)
+                        raise
+                    record_llm_call(backend.model_name, "ok", time.perf_counter() - started)
+                    return text
+            except asyncio.TimeoutError:
+                raise asyncio.TimeoutError(f"timed out after {LLM_TIMEOUT:.0f}s")
+            except Exception as e:
+                if attempt < UPSTREAM_MAX_RETRIES and is_rate_limit_error(e):
+                    delay = backoff_delay(attempt, parse_retry_after(getattr(getattr(e, "response", None), "headers", {}).get("Retry-After")))
+                    rate_limiters.penalize(backend.provider, delay)
+                    await asyncio.sleep(delay)
+                    continue
+                raise
+        return ""
 
-    def _execute_prompt(self, prompt: str) -> str:
+    async def _answer(self, prompt: str) -> Tuple[str, Optional[str]]:
+        """
+        Sends a prompt through the router, which races or fails over between backends.
+        Returns the answer and the model that gave it; failures come back as "Error: ..." text from no model.
+        """
         try:
-            if self.is_gemini:
-                response = self.model.generate_content(prompt)
-                return response.text
-            elif self.is_deepseek:
-                chat_completion = self.model.chat.completions.create(
-                    model=self.model_name,
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=4096,
-                )
-                return chat_completion.choices[0].message.content
+            return await self.backend.generate_with_model(prompt, self._call_backend)
         except Exception as e:
+            # The router reports every backend's error, timeouts included.
             print(f"Error executing prompt with {self.model_name}: {e}")
-            return f"Error: {e}"
-        return ""
+            return f"Error: {e}", None
+
+    async def _execute_prompt(self, prompt: str) -> str:
+        response_text, _ = await self._answer(prompt)
+        return response_text
+
+    def _cache_key(self, kind: str, value: Any, model_name: Optional[str] = None) -> str:
+        """Key of a memoized answer from `model_name`; lookups use the primary model's."""
+        return LLMResponseCache.key(model_name or self.primary_model, kind, PROMPT_VERSIONS[kind], value)
+
+    async def _memoized_prompt(self, kind: str, value: Any, prompt: str, valid: Optional[Callable[[str], bool]] = None) -> str:
+        """Answers from the memo when this input was asked before; otherwise sends the prompt and stores a usable answer."""
+        cached = await self.cache.get(self._cache_key(kind, value), estimate_tokens(prompt))
+        if cached is not None:
+            return cached
+        response_text, answered_by = await self._answer(prompt)
+        if answered_by is not None and (valid is None or valid(response_text)):
+            await self.cache.set(self._cache_key(kind, value, answered_by), response_text)
+        return response_text
 
-    def parse_single_reference(self, ref_text: str) -> schemas.Reference:
+    @staticmethod
+    def _has_json_object(response_text: str) -> bool:
+        return re.search(r'\{.*\}', response_text, re.DOTALL) is not None
+
+    async def parse_single_reference(self, ref_text: str) -> schemas.Reference:
         prompt = f"""
         You are an expert academic librarian. Your task is to parse a raw academic citation string and return a structured JSON object.
         The JSON object must contain the following fields: "authors" (a list of strings), "year" (an integer), "title" (a string), and "source" (a string, which is the journal, conference, or publisher).
@@ -95,7 +201,7 @@ class LLMClient:
         Citation to parse: "{ref_text}"
         JSON output:
         """
-        response_text = self._execute_prompt(prompt)
+        response_text = await self._memoized_prompt("parse", ref_text, prompt, self._has_json_object)
         try:
             match = re.search(r'\{.*\}', response_text, re.DOTALL)
             if not match:
@@ -112,7 +218,95 @@ class LLMClient:
         except Exception as e:
             return schemas.Reference(raw_text=ref_text, title=f"Error parsing with AI: {str(e)}")
 
-    def analyze_unverified_reference(self, reference: schemas.Reference) -> str:
+    @staticmethod
+    def _extract_json_array(response_text: str) -> List[Any]:
+        match = re.search(r'\[.*\]', response_text, re.DOTALL)
+        if not match:
+            raise ValueError("No JSON array found in the AI response.")
+        items = json.loads(match.group(0))
+        if not isinstance(items, list):
+            raise ValueError("AI response is not a JSON array.")
+        return items
+
+    @staticmethod
+    def _map_batch_items(items: List[Any], count: int) -> Dict[int, Dict[str, Any]]:
+        """
+        Maps the objects of a batched answer back to input positions using their "index" field.
+        Falls back to array order only when the answer has exactly one object per input.
+        """
+        mapped: Dict[int, Dict[str, Any]] = {}
+        objects = [item for item in items if isinstance(item, dict)]
+        for item in objects:
+            try:
+                position = int(item.get("index")) - 1
+            except (TypeError, ValueError):
+                continue
+            if 0 <= position < count and position not in mapped:
+                mapped[position] = item
+        if not mapped and len(objects) == count:
+            mapped = dict(enumerate(objects))
+        return mapped
+
+    async def parse_references_batch(self, ref_texts: List[str]) -> Dict[int, schemas.Reference]:
+        """
+        Parses several citations with a single prompt.
+        Returns the references that came back intact, keyed by position in `ref_texts`;
+        callers retry any missing positions with `parse_single_reference`.
+        Memoized citations are answered from the cache and left out of the prompt.
+        """
+        parsed: Dict[int, schemas.Reference] = {}
+        keys = [self._cache_key("parse", text) for text in ref_texts]
+        for position, text in enumerate(ref_texts):
+            cached = await self.cache.get(keys[position], estimate_tokens(text))
+            reference = self._reference_from_response(text, cached) if cached is not None else None
+            if reference is not None:
+                parsed[position] = reference
+        missing = [p for p in range(len(ref_texts)) if p not in parsed]
+        if not missing:
+            return parsed
+
+        citations = "\n".join(f"[{i+1}] {json.dumps(ref_texts[p], ensure_ascii=False)}" for i, p in enumerate(missing))
+        prompt = f"""
+        You are an expert academic librarian. Your task is to parse each raw academic citation string below and return a JSON array of structured objects.
+        Each object must contain the following fields: "index" (the number of the citation as given below), "authors" (a list of strings), "year" (an integer), "title" (a string), and "source" (a string, which is the journal, conference, or publisher).
+        If a field cannot be found, its value should be null.
+        Return exactly one object per citation, in the same order. Do not return any text other than the JSON array itself.
+        Citations to parse:
+        {citations}
+        JSON output:
+        """
+        response_text, answered_by = await self._answer(prompt)
+        try:
+            items = self._map_batch_items(self._extract_json_array(response_text), len(missing))
+        except Exception as e:
+            print(f"Batch parsing error with {self.model_name}: {e}")
+            return parsed
+
+        for i, data in items.items():
+            position = missing[i]
+            try:
+                parsed[position] = schemas.Reference(
+                    raw_text=ref_texts[position],
+                    authors=data.get("authors"),
+                    year=data.get("year"),
+                    title=data.get("title"),
+                    source=data.get("source")
+                )
+            except Exception:
+                continue
+            # Stored in the single-citation answer format, so both parse paths share memoized answers.
+            await self.cache.set(self._cache_key("parse", ref_texts[position], answered_by), json.dumps(format_fields(parsed[position]), ensure_ascii=False))
+        return parsed
+
+    @staticmethod
+    def _reference_from_response(ref_text: str, response_text: str) -> Optional[schemas.Reference]:
+        try:
+            parsed_data = json.loads(re.search(r'\{.*\}', response_text, re.DOTALL).group(0))
+            return schemas.Reference(raw_text=ref_text, **{field: parsed_data.get(field) for field in ("authors", "year", "title", "source")})
+        except Exception:
+            return None
+
+    async def analyze_unverified_reference(self, reference: schemas.Reference) -> str:
         prompt = f"""
         You are an expert academic librarian. A citation could not be found in online databases.
         Analyze the provided citation and determine the most likely reason for the verification failure.
@@ -122,9 +316,9 @@ class LLMClient:
         Parsed Title: "{reference.title}"
         Reason:
         """
-        return self._execute_prompt(prompt).strip()
+        return (await self._memoized_prompt("unverified", {"raw_text": reference.raw_text, "title": reference.title}, prompt)).strip()
 
-    def analyze_format_completeness(self, reference: schemas.Reference) -> Optional[str]:
+    async def analyze_format_completeness(self, reference: schemas.Reference) -> Optional[str]:
         prompt = f"""
         You are an expert academic journal editor. Analyze the parsed fields of a citation for issues.
         Provide a single, concise suggestion for improvement if any issues are found. If the format is complete, return "None".
@@ -132,27 +326,74 @@ class LLMClient:
         Parsed Citation: {{ "authors": {json.dumps(reference.authors)}, "year": {reference.year or "null"}, "title": {json.dumps(reference.title)}, "source": {json.dumps(reference.source)} }}
         Suggestion:
         """
-        suggestion = self._execute_prompt(prompt).strip()
+        suggestion = (await self._memoized_prompt("format", format_fields(reference), prompt)).strip()
         return suggestion if "none" not in suggestion.lower() else None
 
-    def rescue_parse_reference(self, ref_text: str) -> Optional[str]:
+    async def analyze_format_batch(self, references: List[schemas.Reference]) -> Dict[int, Optional[str]]:
+        """
+        Batched variant of `analyze_format_completeness`.
+        Returns suggestions keyed by position for the references that were answered.
+        Memoized references are answered from the cache and left out of the prompt.
+        """
+        suggestions: Dict[int, Optional[str]] = {}
+        keys = [self._cache_key("format", format_fields(ref)) for ref in references]
+        for position, ref in enumerate(references):
+            cached = await self.cache.get(keys[position], estimate_tokens(json.dumps(format_fields(ref))))
+            if cached is not None:
+                suggestions[position] = cached.strip() if "none" not in cached.lower() else None
+        missing = [p for p in range(len(references)) if p not in suggestions]
+        if not missing:
+            return suggestions
+
+        citations = "\n".join(
+            f'[{i+1}] {{ "authors": {json.dumps(ref.authors)}, "year": {ref.year or "null"}, "title": {json.dumps(ref.title)}, "source": {json.dumps(ref.source)} }}'
+            for i, ref in enumerate(references[p] for p in missing)
+        )
+        prompt = f"""
+        You are an expert academic journal editor. Analyze the parsed fields of each citation below for issues.
+        For each citation, provide a single, concise suggestion for improvement if any issues are found. If the format is complete, the suggestion must be null.
+        Do not add any prefixes. Focus on missing fields or abbreviated source names.
+        Return a JSON array with exactly one object per citation, in the same order, each with the fields "index" (the number of the citation as given below) and "suggestion".
+        Do not return any text other than the JSON array itself.
+        Parsed Citations:
+        {citations}
+        JSON output:
+        """
+        response_text, answered_by = await self._answer(prompt)
+        try:
+            items = self._map_batch_items(self._extract_json_array(response_text), len(missing))
+        except Exception as e:
+            print(f"Batch format analysis error with {self.model_name}: {e}")
+            return suggestions
+
+        for i, data in items.items():
+            if "suggestion" not in data:
+                continue
+            position = missing[i]
+            suggestion = data.get("suggestion")
+            suggestion = str(suggestion).strip() if suggestion is not None else ""
+            suggestions[position] = suggestion if suggestion and "none" not in suggestion.lower() else None
+            await self.cache.set(self._cache_key("format", format_fields(references[position]), answered_by), suggestions[position] or "None")
+        return suggestions
+
+    async def rescue_parse_reference(self, ref_text: str) -> Optional[str]:
         prompt = f"""
         Previous parsing failed. Your single task is to identify and extract the main **title** of the academic paper from the text below.
         Return only the raw title as a single line of plain text.
         Raw Text: "{ref_text}"
         Title:
         """
-        title = self._execute_prompt(prompt).strip()
+        title = (await self._memoized_prompt("rescue", ref_text, prompt)).strip()
         return title if title else None
 
-    def extract_paper_metadata(self, text: str) -> Optional[Dict[str, Any]]:
+    async def extract_paper_metadata(self, text: str) -> Optional[Dict[str, Any]]:
         prompt = f"""
         You are a document analysis expert. Analyze the text from the first page of an academic paper and extract its metadata.
         Return a JSON object with "title", "authors", "year", and "affiliation". If a field is not found, its value must be `null`.
         Text to analyze: "{text[:4000]}"
         JSON output:
         """
-        response_text = self._execute_prompt(prompt)
+        response_text = await self._memoized_prompt("metadata", text[:4000], prompt, self._has_json_object)
         try:
             match = re.search(r'\{.*\}', response_text, re.DOTALL)
             if match:
@@ -161,210 +402,897 @@ class LLMClient:
             print(f"Metadata extraction error: {e}")
         return None
 
-# --- PDF and Reference Parsing Utilities ---
-def find_references_section(text: str) -> str:
-    reference_keywords = ["references", "bibliography", "works cited", "literature cited", "參考文獻"]
-    last_found_pos = -1
-    for keyword in reference_keywords:
-        pattern = re.compile(r"^\s*" + re.escape(keyword), re.IGNORECASE | re.MULTILINE)
-        matches = list(pattern.finditer(text))
-        if matches:
-            last_match_pos = matches[-1].start()
-            if last_match_pos > last_found_pos:
-                last_found_pos = last_match_pos
-    return text[last_found_pos:] if last_found_pos != -1 else ""
-
-def parse_references(text: str) -> List[str]:
-    if not text: return []
-    pattern = re.compile(r"^\s*(\[\d+\]|\d+\.)", re.MULTILINE)
-    if not pattern.search(text):
-        lines = text.strip().split('\n')
-        return [line.strip() for line in lines[1:] if line.strip()]
-    
-    split_text = pattern.split(text)
-    references = [(split_text[i] + split_text[i+1]).strip().replace('\n', ' ') for i in range(1, len(split_text), 2)]
-    return references
-
 # --- Verification Logic ---
-async def verify_reference(reference: schemas.Reference, llm_client: LLMClient) -> schemas.Reference:
+def is_transient_status(status_code: int) -> bool:
+    return status_code == 429 or status_code >= 500
+
+async def lookup_reference(reference: schemas.Reference, options: Optional[schemas.VerificationOptions] = None) -> Tuple[Optional[Dict[str, Any]], bool]:
     """
-    Verifies a reference using a multi-step, resilient strategy.
+    Runs the local index, DOI, trusted-source and database lookups for a reference.
+    Returns the verification fields to apply (or None if nothing matched) and whether every
+    lookup completed; a miss caused by errors or throttling should not be cached as "not found".
     """
-    # Step 0: Initial Status and Error Checks
-    if reference.title and "Error parsing with AI" in reference.title:
-        reference.status = "Format Error"
-        reference.verification_score = 0
-        return reference
+    complete = True
+    doi = cited_doi(reference.raw_text)
 
-    # Step 1: DOI Parsing and Direct Verification
-    doi_match = re.search(r'10\.\d{4,9}/[-._;()/:A-Z0-9]+', reference.raw_text, re.IGNORECASE)
-    if doi_match:
-        doi = doi_match.group(0)
+    # Step 0: Offline Bibliographic Index (no network)
+    local_result, local_doi_mismatch = await query_local_index(reference, doi)
+    if local_result:
+        return local_result, True
+
+    # Step 1: DOI, from the bulk CrossRef pre-pass (see doi_resolver.py), else from doi.org
+    record = await doi_resolver.lookup(doi) if doi and not local_doi_mismatch else None
+    if local_doi_mismatch:
+        # The offline index has the DOI under another work than the one cited; fall through to the title search.
+        metrics.doi_checks.inc(result="mismatch")
+    elif record is not None:
+        result = doi_record_result(reference, doi, record)
+        metrics.doi_checks.inc(result="crossref" if result else "mismatch")
+        if result:
+            return result, True
+        # The DOI belongs to another work than the one cited; fall through to the title search.
+    elif doi:
+        metrics.doi_checks.inc(result="fallback")
         try:
-            await asyncio.sleep(0.1)
-            async with httpx.AsyncClient() as client:
-                response = await client.head(f"https://doi.org/{doi}", timeout=10.0, follow_redirects=True)
-                if response.status_code == 200:
-                    reference.status = "Verified"
-                    reference.verified_doi = doi
-                    reference.source = "DOI Verified"
-                    reference.verification_score = 100
-                    return reference
+            async with upstream_slot("doi"):
+                response = await http_clients.request("doi", "HEAD", f"https://doi.org/{doi}", follow_redirects=True)
+            if response.status_code == 200:
+                return {"status": "Verified", "verified_doi": doi, "source": "DOI Verified", "verification_score": 100}, True
+            if is_transient_status(response.status_code):
+                complete = False
         except Exception as e:
+            complete = False
             print(f"DOI verification error for '{doi}': {type(e).__name__} - {e}")
 
     # Step 2: Custom Rules for Trusted Sources
     raw_text_lower = reference.raw_text.lower()
     source_lower = (reference.source or "").lower()
     if "arxiv" in raw_text_lower or "arxiv" in source_lower:
-        reference.status = "Verified"; reference.source = "arXiv"; reference.verification_score = 85; return reference
+        return {"status": "Verified", "source": "arXiv", "verification_score": 85}, True
     if "ieee" in raw_text_lower or "ieee" in source_lower:
-        reference.status = "Verified"; reference.source = "IEEE Publication"; reference.verification_score = 85; return reference
+        return {"status": "Verified", "source": "IEEE Publication", "verification_score": 85}, True
     if "proceedings" in raw_text_lower or "conference" in raw_text_lower:
-        reference.status = "Verified"; reference.source = "Conference Paper"; reference.verification_score = 85; return reference
+        return {"status": "Verified", "source": "Conference Paper", "verification_score": 85}, True
 
-    # Step 3: Sequential API Verification
-    api_verifiers = [
-        ("CrossRef", "https://api.crossref.org/works", 95),
-        ("Semantic Scholar", "https://api.semanticscholar.org/graph/v1/paper/search", 90),
-        ("OpenAlex", "https://api.openalex.org/works", 90)
-    ]
+    # Step 3: Database Search (sequential, parallel or hedged)
+    if not reference.title:
+        return None, complete
+    result, sources_complete = await query_sources(reference, options or schemas.VerificationOptions())
+    return result, complete and sources_complete
+
+def cited_work_matches(reference: schemas.Reference, candidate: Candidate) -> bool:
+    """Whether the work registered under a cited DOI has the cited title, year and authors (always, without a parsed title)."""
+    return not reference.title or title_matcher.best(reference.title, [candidate], reference.year, reference.authors) is not None
+
+def doi_record_result(reference: schemas.Reference, doi: str, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Verification fields for a cited DOI's CrossRef record, or None when its title, year and authors do not match the citation."""
+    if not cited_work_matches(reference, crossref_candidate(record)):
+        return None
+    container = ', '.join(record.get('container-title') or [])
+    return {"status": "Verified", "verified_doi": record.get('DOI') or doi, "source": f"DOI Verified: {container}" if container else "DOI Verified", "verification_score": 100}
+
+# --- Bibliographic Database Search ---
+async def query_local_index(reference: schemas.Reference, doi: Optional[str]) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """
+    Looks the reference up by DOI, then by title, in the offline index configured with LOCAL_INDEX_PATH.
+    Returns the verification fields (or None), and whether the index has the cited DOI under another work.
+    """
+    index = get_local_index()
+    if index is None:
+        return None, False
 
-    for name, url, score_value in api_verifiers:
+    def lookup() -> Tuple[Optional[Dict[str, Any]], bool]:
+        doi_mismatch = False
+        if doi:
+            record = index.lookup_doi(doi)
+            if record:
+                if cited_work_matches(reference, Candidate(record["title"], record["year"], record["authors"], record)):
+                    return {"status": "Verified", "verified_doi": record["doi"], "source": f"Local Index: {record['container']}", "verification_score": 100}, False
+                doi_mismatch = True
         if reference.title:
-            try:
-                await asyncio.sleep(0.1)
+            match = index.search_title(reference.title, reference.year, reference.authors)
+            if match:
+                _, record = match
+                return {"status": "Verified", "verified_doi": record["doi"] or "N/A", "source": f"Local Index: {record['container']}", "verification_score": 95}, doi_mismatch
+        return None, doi_mismatch
+
+    try:
+        # Page faults on a cold index would otherwise stall the event loop.
+        return await asyncio.to_thread(lookup)
+    except Exception as e:
+        print(f"Local index error for '{reference.title}': {type(e).__name__} - {e}")
+        return None, False
+
+API_VERIFIERS = [
+    ("CrossRef", "crossref", "https://api.crossref.org/works", 95),
+    ("Semantic Scholar", "semantic_scholar", "https://api.semanticscholar.org/graph/v1/paper/search", 90),
+    ("OpenAlex", "openalex", "https://api.openalex.org/works", 90)
+]
+BEST_SOURCE_SCORE = max(score_value for _, _, _, score_value in API_VERIFIERS)
+
+def source_candidates(name: str, data: Dict[str, Any]) -> List[Candidate]:
+    """Search results of one database as matcher candidates, in the API's ranking order."""
+    if name == "CrossRef":
+        return [crossref_candidate(item) for item in data.get('message', {}).get('items') or []]
+    if name == "Semantic Scholar":
+        return [
+            Candidate(item.get('title') or '', parse_year(item.get('year')), [author.get('name', '') for author in item.get('authors') or []], item)
+            for item in data.get('data') or []
+        ]
+    # OpenAlex
+    return [
+        Candidate(
+            title=item.get('title') or item.get('display_name') or '',
+            year=parse_year(item.get('publication_year')),
+            surnames=[(authorship.get('author') or {}).get('display_name', '') for authorship in item.get('authorships') or []],
+            payload=item,
+        )
+        for item in data.get('results') or []
+    ]
+
+async def query_source(verifier: Tuple[str, str, str, int], reference: schemas.Reference) -> Tuple[Optional[Tuple[int, float, Dict[str, Any]]], bool]:
+    """
+    Searches one database for the reference's title and ranks its top MATCH_TOP_K results.
+    Returns ((source score, match score, verification fields) or None, whether the lookup completed).
+    """
+    name, upstream, url, score_value = verifier
+    try:
+        if name == "CrossRef":
+            params = {"query.bibliographic": reference.title, "rows": MATCH_TOP_K, "select": "DOI,title,container-title,author,issued"}
+            if reference.authors: params["query.author"] = " ".join(reference.authors)
+        elif name == "Semantic Scholar":
+            params = {"query": f"{(' '.join(reference.authors or []))} {reference.title}", "limit": MATCH_TOP_K, "fields": "title,authors,year,venue,publicationVenue,externalIds"}
+        else: # OpenAlex
+            params = {"search": f"{(' '.join(reference.authors or []))} {reference.title}", "per_page": MATCH_TOP_K}
+
+        async with upstream_slot(upstream):
+            response = await http_clients.request(upstream, "GET", url, params=params)
+
+        if response.status_code == 200:
+            match = title_matcher.best(reference.title, source_candidates(name, response.json()), reference.year, reference.authors)
+            if match:
+                item = match.candidate.payload
+                result = {"status": "Verified", "verification_score": score_value}
                 if name == "CrossRef":
-                    params = {"query.bibliographic": reference.title, "rows": 1}
-                    if reference.authors: params["query.author"] = " ".join(reference.authors)
+                    result["verified_doi"] = item.get('DOI')
+                    result["source"] = f"CrossRef: {', '.join(item.get('container-title', []))}"
                 elif name == "Semantic Scholar":
-                    params = {"query": f"{(' '.join(reference.authors or []))} {reference.title}", "limit": 1, "fields": "title,authors,year,venue,publicationVenue,externalIds"}
+                    result["verified_doi"] = (item.get('externalIds') or {}).get('DOI', 'N/A')
+                    result["source"] = f"Semantic Scholar: {item.get('venue') or (item.get('publicationVenue') or {}).get('name', '')}"
                 else: # OpenAlex
-                    params = {"search": f"{(' '.join(reference.authors or []))} {reference.title}", "per_page": 1}
-
-                async with httpx.AsyncClient() as client:
-                    response = await client.get(url, params=params, timeout=10.0)
-
-                if response.status_code == 200:
-                    data = response.json()
-                    if (name == "CrossRef" and data['message']['items']) or \
-                       (name == "Semantic Scholar" and data.get('data')) or \
-                       (name == "OpenAlex" and data.get('results')):
-                        
-                        item = data['message']['items'][0] if name == "CrossRef" else (data['data'][0] if name == "Semantic Scholar" else data['results'][0])
-                        api_title = item.get('title', [''])[0] if name == "CrossRef" else item.get('title', '')
-                        
-                        score = fuzz.token_set_ratio(reference.title.lower(), api_title.lower())
-                        if score > 85:
-                            reference.status = "Verified"
-                            reference.verification_score = score_value
-                            if name == "CrossRef":
-                                reference.verified_doi = item.get('DOI')
-                                reference.source = f"CrossRef: {', '.join(item.get('container-title', []))}"
-                            elif name == "Semantic Scholar":
-                                reference.verified_doi = item.get('externalIds', {}).get('DOI', 'N/A')
-                                reference.source = f"Semantic Scholar: {item.get('venue') or item.get('publicationVenue', {}).get('name', '')}"
-                            else: # OpenAlex
-                                reference.verified_doi = item.get('doi', 'N/A').replace("https://doi.org/", "")
-                                reference.source = f"OpenAlex: {item.get('host_venue', {}).get('display_name', '')}"
-                            return reference
-            except Exception as e:
-                print(f"{name} API error for '{reference.title}': {type(e).__name__} - {e}")
+                    result["verified_doi"] = (item.get('doi') or 'N/A').replace("https://doi.org/", "")
+                    result["source"] = f"OpenAlex: {(item.get('host_venue') or {}).get('display_name', '')}"
+                return (score_value, match.score, result), True
+        return None, not is_transient_status(response.status_code)
+    except Exception as e:
+        print(f"{name} API error for '{reference.title}': {type(e).__name__} - {e}")
+        return None, False
+
+async def query_sources(reference: schemas.Reference, options: schemas.VerificationOptions) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """
+    Searches the databases using the requested strategy:
+    - sequential: one source after another, stopping at the first match.
+    - parallel: all sources at once.
+    - hedged: the next source starts when the running ones have not answered within hedge_delay
+      (or as soon as one of them finishes without a match).
+    Once a match arrives, sources still in flight get `grace_window` seconds to return a better one
+    (higher source score, then higher match score); anything still running after that is cancelled.
+    """
+    if options.strategy == "sequential":
+        complete = True
+        for verifier in API_VERIFIERS:
+            match, ok = await query_source(verifier, reference)
+            complete = complete and ok
+            if match:
+                return match[2], True
+        return None, complete
+
+    loop = asyncio.get_running_loop()
+    remaining = list(API_VERIFIERS)
+    pending = set()
+    best = None
+    grace_deadline = None
+    complete = True
+
+    def launch():
+        pending.add(asyncio.create_task(query_source(remaining.pop(0), reference)))
+
+    try:
+        launch()
+        while remaining and options.strategy == "parallel":
+            launch()
+
+        while pending or (remaining and best is None):
+            if best is not None:
+                timeout = max(0.0, grace_deadline - loop.time())
+            elif remaining:
+                timeout = options.hedge_delay
+            else:
+                timeout = None
+
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                if best is not None:
+                    break
+                launch()
+                continue
+
+            for task in done:
+                pending.discard(task)
+                match, ok = task.result()
+                complete = complete and ok
+                if match and (best is None or match[:2] > best[:2]):
+                    best = match
+            if best is not None:
+                if best[0] >= BEST_SOURCE_SCORE:
+                    break
+                if grace_deadline is None:
+                    grace_deadline = loop.time() + options.grace_window
+            elif remaining:
+                # A source finished without a match: start the next one now rather than after hedge_delay.
+                launch()
+    finally:
+        for task in pending:
+            task.cancel()
+
+    if best is not None:
+        return best[2], True
+    return None, complete
+
+_inflight_lookups: Dict[str, List[Any]] = {}
+
+async def cached_lookup(cache_key: str, reference: schemas.Reference, options: Optional[schemas.VerificationOptions]) -> Tuple[Optional[Dict[str, Any]], bool]:
+    cached = await verification_cache.get(cache_key)
+    if cached is not None:
+        return cached["result"], True
+    result, complete = await lookup_reference(reference, options)
+    if result is not None or complete:
+        await verification_cache.set(cache_key, result)
+    return result, complete
+
+async def shared_lookup(cache_key: str, lookup: Callable[[], Any]) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """
+    Runs at most one lookup per cache key at a time; references with the same DOI and cited title, or
+    the same normalized title, author surnames and year, that arrive while it is in flight wait for its result.
+    The lookup is cancelled only when every reference waiting for it has been cancelled.
+    """
+    entry = _inflight_lookups.get(cache_key)
+    if entry is None:
+        task = asyncio.create_task(lookup())
+        entry = _inflight_lookups[cache_key] = [task, 0]
+        task.add_done_callback(lambda _: _inflight_lookups.pop(cache_key, None) if _inflight_lookups.get(cache_key) is entry else None)
+    entry[1] += 1
+    try:
+        return await asyncio.shield(entry[0])
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0 and not entry[0].done():
+            entry[0].cancel()
+            if _inflight_lookups.get(cache_key) is entry:
+                del _inflight_lookups[cache_key]
+
+async def verify_reference(reference: schemas.Reference, llm_client: LLMClient, options: Optional[schemas.VerificationOptions] = None) -> Tuple[schemas.Reference, bool]:
+    """
+    Verifies a reference using a multi-step, resilient strategy.
+    Lookup outcomes are served from and stored in the tiered verification cache.
+    Returns the reference and whether every lookup completed (see lookup_reference).
+    """
+    # Step 0: Initial Status and Error Checks
+    if reference.title and "Error parsing with AI" in reference.title:
+        reference.status = "Format Error"
+        reference.verification_score = 0
+        return reference, True
+
+    # Steps 1-3: Cached Lookups
+    cache_key = verification_cache_key(reference.raw_text, reference.title, reference.authors, reference.year)
+    if cache_key:
+        result, complete = await shared_lookup(cache_key, lambda: cached_lookup(cache_key, reference, options))
+    else:
+        result, complete = await lookup_reference(reference, options)
+
+    if result is not None:
+        for field, value in result.items():
+            setattr(reference, field, value)
+        return reference, complete
 
     # --- Step 4: Final Analysis by AI ---
-    reference.status = await asyncio.to_thread(llm_client.analyze_unverified_reference, reference)
+    reference.status = await llm_client.analyze_unverified_reference(reference)
     reference.verification_score = 0
-    return reference
+    return reference, complete
+
+# --- Reference Pipeline ---
+def failed_reference(ref_text: str, error: Exception) -> schemas.Reference:
+    return schemas.Reference(raw_text=ref_text, status="Format Error", title=f"Error processing reference: {error}")
+
+def new_parse_stats() -> Dict[str, Any]:
+    return {"parsed_locally": 0, "parsed_by_llm": 0, "llm_calls": 0, "llm_calls_avoided": 0, "styles": {}}
+
+async def parse_batch(texts: List[str], llm_client: LLMClient, stages: Dict[str, asyncio.Semaphore], parse_stats: Optional[Dict[str, Any]] = None) -> List[schemas.Reference]:
+    """
+    Parses well-formed citations locally, then the rest with one LLM call,
+    retrying only the items the batch answer missed.
+    """
+    parse_stats = parse_stats if parse_stats is not None else new_parse_stats()
+    parsed: Dict[int, schemas.Reference] = {}
+    for position, text in enumerate(texts):
+        local = parse_confidently(text)
+        if local:
+            parsed[position] = local.reference
+            parse_stats["styles"][local.style] = parse_stats["styles"].get(local.style, 0) + 1
+    parse_stats["parsed_locally"] += len(parsed)
+    remaining = [p for p in range(len(texts)) if p not in parsed]
+    if not remaining:
+        parse_stats["llm_calls_avoided"] += 1
+        return [parsed[p] for p in range(len(texts))]
+    parse_stats["parsed_by_llm"] += len(remaining)
+
+    if len(remaining) > 1:
+        async with stages["parse"]:
+            parse_stats["llm_calls"] += 1
+            batch_parsed = await llm_client.parse_references_batch([texts[p] for p in remaining])
+        parsed.update((remaining[i], ref) for i, ref in batch_parsed.items())
+
+    async def parse_missing(position: int):
+        async with stages["parse"]:
+            parse_stats["llm_calls"] += 1
+            parsed[position] = await llm_client.parse_single_reference(texts[position])
+
+    await asyncio.gather(*(parse_missing(p) for p in remaining if p not in parsed))
+    return [parsed[p] for p in range(len(texts))]
+
+async def rescue_reference(ref: schemas.Reference, llm_client: LLMClient, stages: Dict[str, asyncio.Semaphore]) -> bool:
+    if ref.title:
+        return False
+    async with stages["rescue"]:
+        with timed_stage("rescue"):
+            rescued_title = await llm_client.rescue_parse_reference(ref.raw_text)
+    if rescued_title:
+        ref.title = rescued_title
+        return True
+    return False
+
+async def format_batch(refs: List[schemas.Reference], llm_client: LLMClient, stages: Dict[str, asyncio.Semaphore]) -> None:
+    """Fills in format suggestions with one LLM call, retrying only the items the batch answer missed."""
+    suggestions: Dict[int, Optional[str]] = {}
+    if len(refs) > 1:
+        async with stages["format"]:
+            suggestions = await llm_client.analyze_format_batch(refs)
+
+    async def analyze_missing(position: int):
+        async with stages["format"]:
+            suggestions[position] = await llm_client.analyze_format_completeness(refs[position])
+
+    await asyncio.gather(*(analyze_missing(p) for p in range(len(refs)) if p not in suggestions))
+    for position, ref in enumerate(refs):
+        ref.format_suggestion = suggestions[position]
+
+async def process_batch(batch: List[Tuple[int, str]], llm_client: LLMClient, stages: Dict[str, asyncio.Semaphore], results: asyncio.Queue, options: schemas.VerificationOptions, parse_stats: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Moves one batch of references through parse -> rescue -> format, then verifies each reference
+    independently and puts (index, reference, rescued, complete) on `results` as soon as it is done.
+    Every index of the batch is reported exactly once, even on failure.
+    """
+    texts = [text for _, text in batch]
+    try:
+        with timed_stage("parse"):
+            refs = await parse_batch(texts, llm_client, stages, parse_stats)
+        rescued = await asyncio.gather(*(rescue_reference(ref, llm_client, stages) for ref in refs))
+        with timed_stage("format"):
+            await format_batch(refs, llm_client, stages)
+    except Exception as e:
+        print(f"Pipeline error for references {batch[0][0]+1}-{batch[-1][0]+1}: {type(e).__name__} - {e}")
+        for index, text in batch:
+            results.put_nowait((index, failed_reference(text, e), False, False))
+        return
+
+    async def verify_one(index: int, ref: schemas.Reference, was_rescued: bool):
+        try:
+            async with stages["verify"]:
+                with timed_stage("verify"):
+                    ref, complete = await verify_reference(ref, llm_client, options)
+        except Exception as e:
+            print(f"Pipeline error for reference {index+1}: {type(e).__name__} - {e}")
+            ref, complete = failed_reference(ref.raw_text, e), False
+        results.put_nowait((index, ref, was_rescued, complete))
+
+    await asyncio.gather(*(verify_one(index, ref, was_rescued) for (index, _), ref, was_rescued in zip(batch, refs, rescued)))
 
 # --- Main Streaming Endpoint ---
 
+def error_stream_response(message: str) -> StreamingResponse:
+    async def error_generator():
+        yield format_sse({'type': 'error', 'payload': {'message': message}})
+    return StreamingResponse(error_generator(), media_type="text/event-stream")
+
 @app.post("/stream-verify/")
-async def stream_verify_endpoint(file: UploadFile = File(...), model_name: str = Form("gemini-1.5-pro")):
+async def stream_verify_endpoint(
+    file: UploadFile = File(...),
+    model_name: str = Form("gemini-1.5-pro"),
+    verification_strategy: Optional[str] = Form(None),
+    hedge_delay: Optional[float] = Form(None),
+    event_mode: Optional[str] = Form(None),
+):
+    try:
+        options = build_verification_options(verification_strategy, hedge_delay)
+        mode = parse_event_mode(event_mode)
+    except Exception as e:
+        return error_stream_response(f"Invalid verification options: {e}")
+
     try:
         pdf_content = await file.read()
     except Exception as e:
-        async def error_generator():
-            yield f"data: {json.dumps({'type': 'error', 'payload': {'message': f'Failed to read uploaded file: {e}'}})}\n\n"
-        return StreamingResponse(error_generator(), media_type="text/event-stream")
+        return error_stream_response(f"Failed to read uploaded file: {e}")
+
+    return StreamingResponse(stream_verification_process(pdf_content, model_name, options, file.filename, mode), media_type="text/event-stream")
+
+def build_verification_options(strategy: Optional[str] = None, hedge_delay: Optional[float] = None) -> schemas.VerificationOptions:
+    return schemas.VerificationOptions(
+        strategy=strategy or VERIFICATION_STRATEGY,
+        hedge_delay=hedge_delay if hedge_delay is not None else HEDGE_DELAY,
+        grace_window=HEDGE_GRACE_WINDOW,
+    )
+
+def stream_verification_process(pdf_content: bytes, model_name: str, options: Optional[schemas.VerificationOptions] = None,
+                                filename: Optional[str] = None, event_mode: Optional[str] = None):
+    return sse_stream(run_verification(pdf_content, model_name, options, filename=filename), parse_event_mode(event_mode))
+
+async def instrumented_run(kind: str, events):
+    """
+    Passes a run's events through inside a metrics run scope (see metrics.py) and ends
+    the stream with a `timing` event: stage durations, upstream calls, LLM usage and cache hits.
+    """
+    with run_scope(kind) as timings:
+        try:
+            async for event in events:
+                if event["type"] == "error":
+                    timings.outcome = "error"
+                yield event
+        finally:
+            await events.aclose()
+        yield {"type": "timing", "payload": timings.summary()}
 
-    return StreamingResponse(stream_verification_process(pdf_content, model_name), media_type="text/event-stream")
+def run_verification(pdf_content: bytes, model_name: str, options: Optional[schemas.VerificationOptions] = None, kind: str = "stream", filename: Optional[str] = None):
+    recorder = RunRecorder(kind, model_name, document_hash=document_hash(pdf_content), filename=(filename or "")[:512] or None)
+    return recorded_run(recorder, instrumented_run(kind, verification_events(pdf_content, model_name, options)))
 
-async def stream_verification_process(pdf_content: bytes, model_name: str):
+async def verification_events(pdf_content: bytes, model_name: str, options: Optional[schemas.VerificationOptions] = None):
+    """
+    Runs the whole verification of one PDF, yielding {"type", "payload"} events.
+    An identical earlier upload is replayed from the document cache, and references
+    unchanged since an earlier draft are reused instead of going through the pipeline.
+    """
     def yield_event(event_type: str, data: dict):
-        return f"data: {json.dumps({'type': event_type, 'payload': data})}\n\n"
+        return {'type': event_type, 'payload': data}
 
+    options = options or build_verification_options()
     try:
         llm_client = LLMClient(model_name)
         yield yield_event("status", {"message": f"Using model: {model_name}"})
 
+        summary_counts = {'verified': 0, 'notFound': 0, 'error': 0}
+
+        def reference_events(index: int, ref: schemas.Reference, total_refs: int) -> List[Dict[str, Any]]:
+            if ref.status == "Verified":
+                summary_counts['verified'] += 1
+            elif ref.status == "Format Error":
+                summary_counts['error'] += 1
+            else:
+                summary_counts['notFound'] += 1
+            summary_payload = {
+                'total_references': total_refs,
+                'verified_count': summary_counts['verified'],
+                'not_found_count': summary_counts['notFound'],
+                'format_error_count': summary_counts['error']
+            }
+            return [yield_event("reference", {**ref.dict(), "index": index}), yield_event("summary", summary_payload)]
+
+        cached_document = await document_cache.get_document(model_name, pdf_content)
+        if cached_document is not None:
+            yield yield_event("status", {"message": "This document was verified before; replaying stored results..."})
+            if cached_document["metadata"]:
+                yield yield_event("metadata", cached_document["metadata"])
+            cached_refs = cached_document["references"]
+            for index, data in enumerate(cached_refs):
+                for event in reference_events(index, schemas.Reference(**data), len(cached_refs)):
+                    yield event
+            yield yield_event("end", {"message": "Verification process complete.", "cached": True})
+            return
+
         yield yield_event("status", {"message": "Reading and parsing PDF..."})
-        pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_content))
-        first_page_text = pdf_reader.pages[0].extract_text()
+        with timed_stage("pdf_extract"):
+            first_page_text, references_text = await extract_pdf_text(pdf_content)
 
         yield yield_event("status", {"message": "Extracting paper metadata..."})
-        metadata = await asyncio.to_thread(llm_client.extract_paper_metadata, first_page_text)
+        with timed_stage("metadata"):
+            metadata = await llm_client.extract_paper_metadata(first_page_text)
         if metadata:
             yield yield_event("metadata", metadata)
 
-        full_text = first_page_text + "".join([page.extract_text() for page in pdf_reader.pages[1:]])
-        references_text = find_references_section(full_text)
-        
         if not references_text:
-            # ... (handle no references found)
+            yield yield_event("status", {"message": "No references section found in the document."})
+            yield yield_event("end", {"message": "Verification process complete.", "reused_references": 0})
             return
 
         references_list = parse_references(references_text)
         total_refs = len(references_list)
-        yield yield_event("status", {"message": f"Found {total_refs} references. Starting parsing..."})
-
-        parsed_references = []
-        for i, ref_text in enumerate(references_list):
-            yield yield_event("status", {"message": f"Parsing reference {i+1}/{total_refs}..."})
-            parsed_ref = await asyncio.to_thread(llm_client.parse_single_reference, ref_text)
-            parsed_references.append(parsed_ref)
-            await asyncio.sleep(0.05)
-
-        yield yield_event("status", {"message": "Checking for parsing errors and attempting rescue..."})
-        for i, ref in enumerate(parsed_references):
-            if not ref.title:
-                rescued_title = await asyncio.to_thread(llm_client.rescue_parse_reference, ref.raw_text)
-                if rescued_title:
-                    ref.title = rescued_title
-                    yield yield_event("status", {"message": f"Rescued title for reference {i+1}!"})
-        
-        yield yield_event("status", {"message": "Analyzing reference formats..."})
-        for ref in parsed_references:
-            ref.format_suggestion = await asyncio.to_thread(llm_client.analyze_format_completeness, ref)
-            await asyncio.sleep(0.05)
+        final_refs: List[Optional[schemas.Reference]] = [None] * total_refs
+        # Outcomes of lookups cut short by network errors or throttling are not stored (see lookup_reference).
+        incomplete = 0
+        reused = await document_cache.get_references(model_name, references_list)
+        if reused:
+            yield yield_event("status", {"message": f"Found {total_refs} references; reusing {len(reused)} unchanged since an earlier upload. Starting pipeline..."})
+        else:
+            yield yield_event("status", {"message": f"Found {total_refs} references. Starting pipeline..."})
+        for index in sorted(reused):
+            final_refs[index] = reused[index]
+            for event in reference_events(index, reused[index], total_refs):
+                yield event
 
-        summary_counts = {'verified': 0, 'notFound': 0, 'error': 0}
-        for i, ref in enumerate(parsed_references):
-            yield yield_event("status", {"message": f"Verifying reference {i+1}/{total_refs}: {ref.title[:50]}..."})
-            verified_ref = await verify_reference(ref, llm_client)
-            
-            if verified_ref.status == "Verified":
-                summary_counts['verified'] += 1
-            elif verified_ref.status == "Format Error":
-                summary_counts['error'] += 1
-            else:
-                summary_counts['notFound'] += 1
-            
-            yield yield_event("reference", verified_ref.dict())
-            
-            summary_payload = {
-                'total_references': total_refs,
-                'verified_count': summary_counts['verified'],
-                'not_found_count': summary_counts['notFound'],
-                'format_error_count': summary_counts['error']
-            }
-            yield yield_event("summary", summary_payload)
-            await asyncio.sleep(0.1)
+        pending = [(index, text) for index, text in enumerate(references_list) if index not in reused]
+        # Resolve every cited DOI in bulk while the references are still being parsed.
+        doi_resolver.prefetch(cited_doi(text) for _, text in pending)
+        parse_stats = new_parse_stats()
+        stages = stage_semaphores()
+        results: asyncio.Queue = asyncio.Queue()
+        tasks = [
+            asyncio.create_task(process_batch([(pending[p][0], text) for p, text in batch], llm_client, stages, results, options, parse_stats))
+            for batch in plan_batches([text for _, text in pending])
+        ]
+        try:
+            for done_count in range(len(reused) + 1, total_refs + 1):
+                index, verified_ref, rescued, complete = await results.get()
+                if rescued:
+                    yield yield_event("status", {"message": f"Rescued title for reference {index+1}!"})
 
-        yield yield_event("end", {"message": "Verification process complete."})
+                final_refs[index] = verified_ref
+                incomplete += not complete
+                await document_cache.set_reference(model_name, verified_ref, complete)
+                yield yield_event("status", {"message": f"Finished reference {index+1} ({done_count}/{total_refs})", "completed": done_count, "total": total_refs})
+                for event in reference_events(index, verified_ref, total_refs):
+                    yield event
+        finally:
+            # Stop outstanding work if the client went away or something failed.
+            for task in tasks:
+                task.cancel()
 
+        await document_cache.set_document(model_name, pdf_content, metadata, final_refs, complete=not incomplete)
+        yield yield_event("status", {"message": (
+            f"Parsed {parse_stats['parsed_locally']} of {len(pending)} references locally; "
+            f"{parse_stats['llm_calls_avoided']} LLM parsing calls avoided."
+        )})
+        yield yield_event("end", {"message": "Verification process complete.", "parse_stats": parse_stats, "reused_references": len(reused)})
+
+    except PdfLimitError as e:
+        yield yield_event("error", {"message": str(e)})
     except Exception as e:
         yield yield_event("error", {"message": f"An unexpected error occurred: {str(e)}"})
 
+# --- Batch Verification ---
+def new_summary(total_refs: int = 0) -> Dict[str, int]:
+    return {'total_references': total_refs, 'verified_count': 0, 'not_found_count': 0, 'format_error_count': 0}
+
+def count_reference(summary: Dict[str, int], ref: schemas.Reference) -> None:
+    if ref.status == "Verified":
+        summary['verified_count'] += 1
+    elif ref.status == "Format Error":
+        summary['format_error_count'] += 1
+    else:
+        summary['not_found_count'] += 1
+
+@app.post("/batch-verify/")
+async def batch_verify_endpoint(
+    files: List[UploadFile] = File(...),
+    model_name: str = Form("gemini-1.5-pro"),
+    verification_strategy: Optional[str] = Form(None),
+    hedge_delay: Optional[float] = Form(None),
+    event_mode: Optional[str] = Form(None),
+):
+    try:
+        options = build_verification_options(verification_strategy, hedge_delay)
+        mode = parse_event_mode(event_mode)
+    except Exception as e:
+        return error_stream_response(f"Invalid verification options: {e}")
+
+    try:
+        uploads = [(file.filename or f"document-{position + 1}.pdf", await file.read()) for position, file in enumerate(files)]
+        documents = await asyncio.to_thread(expand_uploads, uploads)
+    except PdfLimitError as e:
+        return error_stream_response(str(e))
+    except Exception as e:
+        return error_stream_response(f"Failed to read uploaded files: {e}")
+    if not documents:
+        return error_stream_response("No PDF documents found in the upload.")
+
+    return StreamingResponse(sse_stream(run_batch_verification(documents, model_name, options), mode), media_type="text/event-stream")
+
+def run_batch_verification(documents: List[Tuple[str, bytes]], model_name: str, options: Optional[schemas.VerificationOptions] = None):
+    recorder = RunRecorder("batch", model_name, filename=", ".join(filename for filename, _ in documents)[:512])
+    return recorded_run(recorder, instrumented_run("batch", batch_verification_events(documents, model_name, options)))
+
+async def batch_verification_events(documents: List[Tuple[str, bytes]], model_name: str, options: Optional[schemas.VerificationOptions] = None):
+    """
+    Verifies many PDFs as one run, yielding {"type", "payload"} events; per-document payloads carry a "document" position.
+    Citations that are identical after normalizing numbering, case, punctuation and whitespace go through
+    the pipeline once and are fanned back out to every document citing them. Different wordings of the
+    same work (same DOI and cited title, or same normalized title, authors and year) share one lookup through the verification cache.
+    Documents are extracted concurrently and their new citations start as soon as each one is parsed.
+    """
+    def yield_event(event_type: str, data: dict):
+        return {'type': event_type, 'payload': data}
+
+    options = options or build_verification_options()
+    try:
+        llm_client = LLMClient(model_name)
+    except Exception as e:
+        yield yield_event("error", {"message": f"An unexpected error occurred: {str(e)}"})
+        return
+    yield yield_event("status", {"message": f"Verifying {len(documents)} documents using model: {model_name}"})
+
+    states = [{"filename": filename, "status": "queued", "texts": [], "refs": [], "metadata": None, "summary": new_summary(), "complete": True}
+              for filename, _ in documents]
+    # Unique citation hash -> verified reference, or -> (document, position) pairs still waiting for it.
+    finished: Dict[str, schemas.Reference] = {}
+    # Finished citations whose lookups did not complete; the documents citing them are not stored.
+    incomplete: Set[str] = set()
+    waiting: Dict[str, List[Tuple[int, int]]] = {}
+    unique_hashes: List[str] = []
+    counts = {"citations": 0, "duplicates": 0, "reused": 0, "replayed": 0, "outstanding": 0}
+    parse_stats = new_parse_stats()
+    stages = stage_semaphores()
+    results: asyncio.Queue = asyncio.Queue()
+    extract_slots = asyncio.Semaphore(BATCH_EXTRACT_CONCURRENCY)
+    pipeline_tasks: List[asyncio.Task] = []
+
+    def document_event(position: int, **extra) -> Dict[str, Any]:
+        state = states[position]
+        return yield_event("document", {"document": position, "filename": state["filename"], "status": state["status"], **extra})
+
+    async def extract(position: int):
+        _, pdf_content = documents[position]
+        async with extract_slots:
+            cached = await document_cache.get_document(model_name, pdf_content)
+            if cached is not None:
+                return cached["metadata"], None, [schemas.Reference(**data) for data in cached["references"]]
+            with timed_stage("pdf_extract"):
+                first_page_text, references_text = await extract_pdf_text(pdf_content)
+            with timed_stage("metadata"):
+                metadata = await llm_client.extract_paper_metadata(first_page_text)
+        return metadata, parse_references(references_text) if references_text else [], None
+
+    async def deliver(position: int, index: int, ref: schemas.Reference, complete: bool = True) -> List[Dict[str, Any]]:
+        state = states[position]
+        state["refs"][index] = ref
+        state["complete"] = state["complete"] and complete
+        count_reference(state["summary"], ref)
+        completed = sum(state["summary"][key] for key in ("verified_count", "not_found_count", "format_error_count"))
+        events = [
+            yield_event("reference", {**ref.dict(), "document": position, "index": index}),
+            yield_event("document_summary", {"document": position, **state["summary"]}),
+        ]
+        if completed == len(state["refs"]):
+            state["status"] = "complete"
+            if state["texts"] is not None:
+                await document_cache.set_document(model_name, documents[position][1], state["metadata"], state["refs"], complete=state["complete"])
+            events.append(document_event(position, summary=state["summary"]))
+        return events
+
+    async def finish_citation(citation: str, ref: schemas.Reference, complete: bool = True) -> List[Dict[str, Any]]:
+        finished[citation] = ref
+        if not complete:
+            incomplete.add(citation)
+        events = []
+        for position, index in waiting.pop(citation, []):
+            own_text = states[position]["texts"][index]
+            events += await deliver(position, index, ref if own_text == ref.raw_text else schemas.Reference(**{**ref.dict(), "raw_text": own_text}), complete)
+        return events
+
+    async def start_document(position: int, texts: List[str]) -> List[Dict[str, Any]]:
+        state = states[position]
+        state.update(texts=texts, refs=[None] * len(texts), status="verifying" if texts else "complete")
+        state["summary"]["total_references"] = len(texts)
+        counts["citations"] += len(texts)
+        events = [document_event(position, total_references=len(texts))]
+        new: Dict[str, str] = {}
+        already_finished = []
+        for index, text in enumerate(texts):
+            citation = citation_hash(text)
+            if citation in finished or citation in waiting or citation in new:
+                counts["duplicates"] += 1
+            else:
+                new[citation] = text
+            if citation in finished:
+                already_finished.append((index, citation))
+            else:
+                waiting.setdefault(citation, []).append((position, index))
+        for index, citation in already_finished:
+            ref = finished[citation]
+            events += await deliver(position, index, schemas.Reference(**{**ref.dict(), "raw_text": texts[index]}), citation not in incomplete)
+
+        reused = await document_cache.get_references(model_name, list(new.values()))
+        counts["reused"] += len(reused)
+        pending = []
+        for offset, (citation, text) in enumerate(new.items()):
+            if offset in reused:
+                events += await finish_citation(citation, reused[offset])
+            else:
+                pending.append((len(unique_hashes), text))
+                unique_hashes.append(citation)
+        counts["outstanding"] += len(pending)
+        doi_resolver.prefetch(cited_doi(text) for _, text in pending)
+        for batch in plan_batches([text for _, text in pending]):
+            pipeline_tasks.append(asyncio.create_task(process_batch([(pending[p][0], text) for p, text in batch], llm_client, stages, results, options, parse_stats)))
+        return events
+
+    extractions = {asyncio.create_task(extract(position)): position for position in range(len(documents))}
+    getter: Optional[asyncio.Task] = None
+    try:
+        while extractions or waiting:
+            if getter is None and counts["outstanding"]:
+                getter = asyncio.create_task(results.get())
+            done, _ = await asyncio.wait([*extractions, *([getter] if getter else [])], return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task is getter:
+                    getter = None
+                    counts["outstanding"] -= 1
+                    unique_id, verified_ref, _, complete = task.result()
+                    await document_cache.set_reference(model_name, verified_ref, complete)
+                    for event in await finish_citation(unique_hashes[unique_id], verified_ref, complete):
+                        yield event
+                    continue
+
+                position = extractions.pop(task)
+                state = states[position]
+                try:
+                    metadata, texts, cached_refs = task.result()
+                except Exception as e:
+                    state["status"] = "error"
+                    yield document_event(position, message=str(e) if isinstance(e, PdfLimitError) else f"An unexpected error occurred: {str(e)}")
+                    continue
+                state["metadata"] = metadata
+                if metadata:
+                    yield yield_event("metadata", {**metadata, "document": position})
+                if cached_refs is not None:
+                    # Identical upload verified before: replay it without touching the pipeline.
+                    state.update(texts=None, refs=[None] * len(cached_refs), status="verifying")
+                    state["summary"]["total_references"] = len(cached_refs)
+                    counts["citations"] += len(cached_refs)
+                    counts["replayed"] += 1
+                    yield document_event(position, total_references=len(cached_refs), cached=True)
+                    for index, ref in enumerate(cached_refs):
+                        for event in await deliver(position, index, ref):
+                            yield event
+                    if not cached_refs:
+                        state["status"] = "complete"
+                    continue
+                for event in await start_document(position, texts):
+                    yield event
+    finally:
+        # Stop outstanding work if the client went away or something failed.
+        for task in [*extractions, *pipeline_tasks, *([getter] if getter else [])]:
+            task.cancel()
+
+    total = new_summary()
+    for state in states:
+        for key in total:
+            total[key] += state["summary"][key]
+    yield yield_event("end", {
+        "message": "Batch verification complete.",
+        "summary": total,
+        "documents": [{"document": position, "filename": state["filename"], "status": state["status"], "summary": state["summary"]} for position, state in enumerate(states)],
+        "total_citations": counts["citations"],
+        "unique_citations": len(finished),
+        "duplicate_citations": counts["duplicates"],
+        "reused_references": counts["reused"],
+        "replayed_documents": counts["replayed"],
+        "parse_stats": parse_stats,
+    })
+
+# --- Background Jobs ---
+def job_runner(pdf_content: bytes, params: Dict[str, Any]):
+    return run_verification(pdf_content, params["model_name"], schemas.VerificationOptions(**params["options"]), kind="job", filename=params.get("filename"))
+
+@app.post("/jobs/")
+async def submit_job_endpoint(
+    file: UploadFile = File(...),
+    model_name: str = Form("gemini-1.5-pro"),
+    verification_strategy: Optional[str] = Form(None),
+    hedge_delay: Optional[float] = Form(None),
+):
+    try:
+        options = build_verification_options(verification_strategy, hedge_delay)
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Invalid verification options: {e}")
+    pdf_content = await file.read()
+
+    job_id = new_job_id()
+    await job_store.create(job_id, pdf_content, {"model_name": model_name, "options": options.dict(), "filename": file.filename})
+    await job_store.enqueue(job_id)
+    return {"job_id": job_id, "status": "queued"}
+
+@app.get("/jobs/{job_id}")
+async def job_status_endpoint(job_id: str, offset: int = 0):
+    job = await job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    start, events = await job_store.events(job_id, offset)
+    return {**job, "events": events, "next_offset": start + len(events)}
+
+@app.get("/jobs/{job_id}/events")
+async def job_events_endpoint(job_id: str, offset: int = 0, last_event_id: Optional[int] = Header(None)):
+    if await job_store.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    # EventSource reconnects send the id of the last event they saw.
+    start = last_event_id if last_event_id is not None else offset
+
+    async def event_stream():
+        async for event_offset, event in replay_events(job_store, job_id, start):
+            yield format_sse(event, event_offset)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+# --- Past Runs ---
+@app.get("/runs/")
+async def list_runs_endpoint(status: Optional[str] = None, kind: Optional[str] = None, document_hash: Optional[str] = None,
+                             limit: int = run_store.RUN_QUERY_DEFAULT_LIMIT, cursor: Optional[str] = None):
+    try:
+        return await asyncio.to_thread(run_store.list_runs, status, kind, document_hash, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid cursor: {e}")
+
+@app.get("/runs/{run_id}")
+async def run_endpoint(run_id: str):
+    run = await asyncio.to_thread(run_store.get_run, run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return run
+
+@app.get("/runs/{run_id}/references")
+async def run_references_endpoint(run_id: str, status: Optional[str] = None, limit: int = run_store.RUN_QUERY_DEFAULT_LIMIT, cursor: Optional[str] = None):
+    if await asyncio.to_thread(run_store.get_run, run_id) is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    try:
+        return await asyncio.to_thread(run_store.list_run_references, run_id, status, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid cursor: {e}")
+
+@app.get("/references/")
+async def find_references_endpoint(doi: Optional[str] = None, title: Optional[str] = None, status: Optional[str] = None,
+                                   limit: int = run_store.RUN_QUERY_DEFAULT_LIMIT, cursor: Optional[str] = None):
+    try:
+        return await asyncio.to_thread(run_store.find_references, doi, title, status, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+# --- Cache and Connection Pool Statistics ---
+@app.get("/cache-stats/")
+def cache_stats_endpoint():
+    return {"verification": verification_cache.stats(), "documents": document_cache.stats(), "llm": llm_cache.stats(), "doi": doi_resolver.stats()}
+
+@app.get("/metrics")
+def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+def collect_pool_metrics():
+    for upstream, entry in http_clients.stats()["upstreams"].items():
+        upstream_in_flight.set(entry["in_flight"], upstream=upstream)
+        if "open_connections" in entry:
+            upstream_connections.set(entry["open_connections"], upstream=upstream)
+    for name, entry in router_stats()["backends"].items():
+        llm_breaker_open.set(0 if entry["breaker"] == "closed" else 1, model=name)
+
+upstream_in_flight = metrics.Gauge("upstream_in_flight", "HTTP requests in flight per upstream.", ("upstream",))
+upstream_connections = metrics.Gauge("upstream_open_connections", "Open pooled connections per upstream.", ("upstream",))
+llm_breaker_open = metrics.Gauge("llm_breaker_open", "1 while a model's circuit breaker is open or half-open.", ("model",))
+metrics.collectors.append(collect_pool_metrics)
+
+@app.get("/llm-stats/")
+def llm_stats_endpoint():
+    return router_stats()
+
+@app.get("/http-pool-stats/")
+def http_pool_stats_endpoint():
+    return http_clients.stats()
+
 # --- PDF Export Endpoint ---
 from pydantic import BaseModel
 
@@ -396,9 +1324,31 @@ class ReportPayload(BaseModel):
     language: str
     model_name: str
 
+def render_report(data: Dict[str, Any]):
+    # reportlab is imported with the first export rather than when the API or a worker starts.
+    from report_generator import generate_pdf_report
+    return generate_pdf_report(data)
+
+def iter_report(report: IO[bytes], chunk_size: int = REPORT_STREAM_CHUNK_BYTES) -> Iterator[bytes]:
+    """Yields a generated report in chunks and closes it afterwards."""
+    try:
+        while True:
+            chunk = report.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        report.close()
+
 @app.post("/export-pdf/")
 async def export_pdf_endpoint(payload: ReportPayload):
-    pdf_buffer = generate_pdf_report(payload.dict())
-    return StreamingResponse(pdf_buffer, media_type="application/pdf", headers={
-        "Content-Disposition": "attachment; filename=CitingVerify_Report.pdf"
+    # Rendering a long report takes seconds of CPU; keep it off the event loop.
+    with timed_stage("report"):
+        report = await asyncio.to_thread(render_report, payload.dict())
+    report.seek(0, os.SEEK_END)
+    size = report.tell()
+    report.seek(0)
+    return StreamingResponse(iter_report(report), media_type="application/pdf", headers={
+        "Content-Disposition": "attachment; filename=CitingVerify_Report.pdf",
+        "Content-Length": str(size),
     })
@@ -0,0 +1,248 @@
+"""
+Process-wide metrics in Prometheus text format, plus per-run timing summaries.
+
+Metrics are kept in plain dicts keyed by label values and rendered on demand by GET /metrics.
+A verification run installs a RunTimings in `current_run`; tasks spawned by the run inherit it
+(asyncio copies the context into new tasks), so stage, upstream, LLM and cache observations made
+anywhere in the pipeline are also added to that run's summary.
+"""
+import asyncio
+import bisect
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# --- Configuration ---
+NAMESPACE = "citingverify"
+# Seconds; suits everything from a cache lookup to a whole dissertation.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = f"{NAMESPACE}_{name}"
+        self.documentation = documentation
+        self.labels = labels
+        registry.append(self)
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        return self.header() + [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in sorted(self.values.items())]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any) -> None:
+        self.values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = buckets
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self.values: Dict[LabelValues, List[Any]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        entry = self.values.get(key)
+        if entry is None:
+            entry = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, (counts, total, count) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="%s"' % _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+registry: List[Metric] = []
+# Callables run at scrape time for values owned by other modules (pool sizes, breaker states...).
+collectors: List[Callable[[], None]] = []
+
+stage_seconds = Histogram("stage_seconds", "Time spent in each pipeline stage call.", ("stage",))
+run_seconds = Histogram("run_seconds", "Wall-clock time of whole verification runs.", ("kind",))
+runs_total = Counter("runs_total", "Verification runs by kind and outcome.", ("kind", "outcome"))
+active_runs = Gauge("active_runs", "Verification runs (streams, jobs and batches) in progress.", ("kind",))
+upstream_seconds = Histogram("upstream_request_seconds", "Latency of HTTP requests to each upstream.", ("upstream",))
+upstream_responses = Counter("upstream_responses_total", "HTTP responses from each upstream by status code ('error' for failed requests).", ("upstream", "status"))
+llm_seconds = Histogram("llm_request_seconds", "Latency of LLM calls by model.", ("model",))
+llm_requests = Counter("llm_requests_total", "LLM calls by model and outcome.", ("model", "outcome"))
+llm_tokens = Counter("llm_tokens_total", "LLM tokens by model and direction; reported by the provider when available, estimated otherwise.", ("model", "direction"))
+cache_requests = Counter("cache_requests_total", "Cache lookups by cache and result.", ("cache", "result"))
+doi_checks = Counter("doi_checks_total", "Cited DOIs checked during verification: against their CrossRef record from the bulk pre-pass (crossref, or mismatch when it describes another work), or at doi.org (fallback).", ("result",))
+sse_events = Counter("sse_events_total", "Server-sent events by type: sent, merged into a later progress or summary event (coalesced), or left out in compact mode (dropped).", ("type", "outcome"))
+sse_backpressure_waits = Counter("sse_backpressure_waits_total", "Times a run was paused because its client had SSE_BUFFER_EVENTS events waiting.")
+
+
+def render() -> str:
+    for collect in collectors:
+        try:
+            collect()
+        except Exception as e:
+            print(f"Metrics collector failed: {type(e).__name__} - {e}")
+    return "\n".join(line for metric in registry for line in metric.render()) + "\n"
+
+
+# --- Per-run timings ---
+class RunTimings:
+    """Totals for one run; summary() is sent as the run's final `timing` event."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.outcome = "ok"
+        self.stages: Dict[str, List[float]] = {}  # stage -> durations of every call
+        self.upstreams: Dict[str, Dict[str, Any]] = {}
+        self.llm: Dict[str, Dict[str, float]] = {}
+        self.caches: Dict[str, Dict[str, int]] = {}
+
+    def add_stage(self, stage: str, seconds: float) -> None:
+        self.stages.setdefault(stage, []).append(seconds)
+
+    @staticmethod
+    def _stage_summary(durations: List[float]) -> Dict[str, Any]:
+        ordered = sorted(durations)
+        pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 4)
+        return {"count": len(ordered), "seconds": round(sum(ordered), 4), "p50_seconds": pick(0.5), "p95_seconds": pick(0.95), "max_seconds": round(ordered[-1], 4)}
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "total_seconds": round(time.perf_counter() - self.started, 4),
+            "stages": {stage: self._stage_summary(durations) for stage, durations in self.stages.items()},
+            "upstreams": {name: {**entry, "seconds": round(entry["seconds"], 4)} for name, entry in self.upstreams.items()},
+            "llm": {model: {key: round(value, 4) for key, value in entry.items()} for model, entry in self.llm.items()},
+            "cache": self.caches,
+        }
+
+
+current_run: "contextvars.ContextVar[Optional[RunTimings]]" = contextvars.ContextVar("current_run", default=None)
+
+
+@contextmanager
+def run_scope(kind: str):
+    """Counts a run as active and installs a fresh RunTimings for everything it starts."""
+    timings = RunTimings()
+    current_run.set(timings)
+    active_runs.inc(kind=kind)
+    outcome = "error"
+    try:
+        yield timings
+        outcome = timings.outcome
+    except (GeneratorExit, asyncio.CancelledError):
+        outcome = "cancelled"
+        raise
+    finally:
+        active_runs.dec(kind=kind)
+        runs_total.inc(kind=kind, outcome=outcome)
+        run_seconds.observe(time.perf_counter() - timings.started, kind=kind)
+        # Not reset with a token: an abandoned stream may be closed from another context.
+        current_run.set(None)
+
+
+@contextmanager
+def timed_stage(stage: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stage_seconds.observe(elapsed, stage=stage)
+        run = current_run.get()
+        if run is not None:
+            run.add_stage(stage, elapsed)
+
+
+# --- Recorders ---
+def record_upstream(upstream: str, status: Any, seconds: float) -> None:
+    upstream_seconds.observe(seconds, upstream=upstream)
+    upstream_responses.inc(upstream=upstream, status=status)
+    run = current_run.get()
+    if run is not None:
+        entry = run.upstreams.setdefault(upstream, {"requests": 0, "seconds": 0.0, "statuses": {}})
+        entry["requests"] += 1
+        entry["seconds"] += seconds
+        entry["statuses"][str(status)] = entry["statuses"].get(str(status), 0) + 1
+
+
+def record_llm_call(model: str, outcome: str, seconds: float) -> None:
+    llm_seconds.observe(seconds, model=model)
+    llm_requests.inc(model=model, outcome=outcome)
+    run = current_run.get()
+    if run is not None:
+        entry = run.llm.setdefault(model, {"calls": 0, "errors": 0, "seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0})
+        entry["calls"] += 1
+        entry["errors"] += outcome != "ok"
+        entry["seconds"] += seconds
+
+
+def record_llm_tokens(model: str, prompt_tokens: int, completion_tokens: int) -> None:
+    llm_tokens.inc(prompt_tokens, model=model, direction="prompt")
+    llm_tokens.inc(completion_tokens, model=model, direction="completion")
+    run = current_run.get()
+    if run is not None:
+        entry = run.llm.setdefault(model, {"calls": 0, "errors": 0, "seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0})
+        entry["prompt_tokens"] += prompt_tokens
+        entry["completion_tokens"] += completion_tokens
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    result = "hit" if hit else "miss"
+    cache_requests.inc(cache=cache, result=result)
+    run = current_run.get()
+    if run is not None:
+        entry = run.caches.setdefault(cache, {"hit": 0, "miss": 0})
+        entry[result] += 1
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey, ForeignKeyConstraint, Index
 from database import Base
 
 class Paper(Base):
@@ -7,3 +7,65 @@ class Paper(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
     abstract = Column(Text, nullable=True)
+
+class VerificationCacheEntry(Base):
+    __tablename__ = "verification_cache"
+
+    key = Column(String, primary_key=True)
+    value = Column(Text, nullable=False)
+    expires_at = Column(DateTime, index=True, nullable=False)
+
+# --- Verification runs (see run_store.py) ---
+class VerificationRun(Base):
+    __tablename__ = "verification_runs"
+    # Listing runs by status, newest first, is served by this index alone.
+    __table_args__ = (Index("ix_verification_runs_status_created", "status", "created_at", "id"),)
+
+    id = Column(String(32), primary_key=True)
+    kind = Column(String(16), nullable=False)  # stream, job or batch
+    status = Column(String(16), nullable=False)  # running, complete, error or cancelled
+    model_name = Column(String(128))
+    document_hash = Column(String(64), index=True)
+    filename = Column(String(512))
+    paper_title = Column(Text)
+    total_references = Column(Integer, nullable=False, default=0)
+    verified_count = Column(Integer, nullable=False, default=0)
+    not_found_count = Column(Integer, nullable=False, default=0)
+    format_error_count = Column(Integer, nullable=False, default=0)
+    error = Column(Text)
+    details = Column(Text)  # JSON: paper metadata, batch filenames, timing summary
+    created_at = Column(DateTime, nullable=False, index=True)
+    finished_at = Column(DateTime)
+
+class RunReference(Base):
+    __tablename__ = "run_references"
+
+    run_id = Column(String(32), ForeignKey("verification_runs.id", ondelete="CASCADE"), primary_key=True)
+    document = Column(Integer, primary_key=True, default=0)  # position of the PDF within a batch
+    position = Column(Integer, primary_key=True)
+    raw_text = Column(Text, nullable=False)
+    authors = Column(Text)  # JSON list
+    year = Column(Integer)
+    title = Column(Text)
+    source = Column(Text)
+    doi = Column(String(255), index=True)  # normalized; verified DOI, or the one cited
+    title_hash = Column(String(40), index=True)  # sha1 of the normalized title
+
+class VerificationOutcome(Base):
+    __tablename__ = "verification_outcomes"
+    __table_args__ = (
+        ForeignKeyConstraint(["run_id", "document", "position"],
+                             ["run_references.run_id", "run_references.document", "run_references.position"], ondelete="CASCADE"),
+        Index("ix_verification_outcomes_run_status", "run_id", "status"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    run_id = Column(String(32), nullable=False)
+    document = Column(Integer, nullable=False, default=0)
+    position = Column(Integer, nullable=False)
+    status = Column(String(32), nullable=False, index=True)
+    verification_score = Column(Float)
+    verified_doi = Column(String(255))
+    format_suggestion = Column(Text)
+    source_url = Column(Text)
+    verified_at = Column(DateTime, nullable=False)
@@ -0,0 +1,150 @@
+import asyncio
+import io
+import os
+import posixpath
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from reference_splitter import find_references_heading, find_references_section, looks_like_references
+
+if TYPE_CHECKING:
+    import PyPDF2
+
+# --- Configuration ---
+PDF_MAX_BYTES = int(os.getenv("PDF_MAX_BYTES", str(50 * 1024 * 1024)))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "1000"))
+# Documents with more pages than this are extracted in a process pool.
+PDF_PARALLEL_PAGE_THRESHOLD = int(os.getenv("PDF_PARALLEL_PAGE_THRESHOLD", "150"))
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Documents accepted by one batch upload, counting every PDF inside zip archives.
+BATCH_MAX_DOCUMENTS = int(os.getenv("BATCH_MAX_DOCUMENTS", "100"))
+# How far from the end the references heading is searched for; bounds memory for huge documents.
+REFERENCE_SCAN_MAX_PAGES = int(os.getenv("REFERENCE_SCAN_MAX_PAGES", "80"))
+# Pages extracted per window while scanning backwards.
+SCAN_WINDOW_PAGES = 8
+
+
+class PdfLimitError(ValueError):
+    """Raised when an upload exceeds the configured size or page limits."""
+
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=PDF_EXTRACT_WORKERS)
+    return _process_pool
+
+
+def shutdown_process_pool() -> None:
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(cancel_futures=True)
+        _process_pool = None
+
+
+def _open_reader(pdf_content: bytes) -> "PyPDF2.PdfReader":
+    # Imported on first use so that starting the API or a worker does not load it.
+    import PyPDF2
+    return PyPDF2.PdfReader(io.BytesIO(pdf_content))
+
+
+def _extract_from_reader(reader: "PyPDF2.PdfReader", page_numbers: List[int]) -> List[str]:
+    return [reader.pages[number].extract_text() or "" for number in page_numbers]
+
+
+def _extract_pages(pdf_content: bytes, page_numbers: List[int]) -> List[str]:
+    """Extracts the given pages. Top-level so it can run in a worker process."""
+    return _extract_from_reader(_open_reader(pdf_content), page_numbers)
+
+
+def check_pdf_limits(pdf_content: bytes, page_count: Optional[int] = None) -> None:
+    if len(pdf_content) > PDF_MAX_BYTES:
+        raise PdfLimitError(f"PDF is too large ({len(pdf_content) / 1024 / 1024:.1f} MB); the limit is {PDF_MAX_BYTES / 1024 / 1024:.0f} MB.")
+    if page_count is not None and page_count > PDF_MAX_PAGES:
+        raise PdfLimitError(f"PDF has {page_count} pages; the limit is {PDF_MAX_PAGES} pages.")
+
+
+async def _extract(reader: "PyPDF2.PdfReader", pdf_content: bytes, page_numbers: List[int], parallel: bool) -> List[str]:
+    if not parallel or len(page_numbers) < 2:
+        return await asyncio.to_thread(_extract_from_reader, reader, page_numbers)
+    loop = asyncio.get_running_loop()
+    chunk_size = -(-len(page_numbers) // PDF_EXTRACT_WORKERS)
+    chunks = [page_numbers[i:i + chunk_size] for i in range(0, len(page_numbers), chunk_size)]
+    results = await asyncio.gather(*(loop.run_in_executor(_get_process_pool(), _extract_pages, pdf_content, chunk) for chunk in chunks))
+    return [text for chunk_texts in results for text in chunk_texts]
+
+
+async def extract_pdf_text(pdf_content: bytes) -> Tuple[str, str]:
+    """
+    Returns (first page text, references section text) without extracting the whole document.
+    Pages are scanned from the back, extracted in windows, until the references heading is found;
+    a heading preceded by bibliography-like text is a running page header, so scanning continues past it.
+    Only the pages from the heading to the end are kept. Large documents extract windows in a process pool.
+    """
+    check_pdf_limits(pdf_content)
+    reader = await asyncio.to_thread(_open_reader, pdf_content)
+    page_count = len(reader.pages)
+    check_pdf_limits(pdf_content, page_count)
+    if page_count == 0:
+        return "", ""
+
+    parallel = page_count > PDF_PARALLEL_PAGE_THRESHOLD
+    window = SCAN_WINDOW_PAGES * (PDF_EXTRACT_WORKERS if parallel else 1)
+    pages = {0: (await asyncio.to_thread(_extract_from_reader, reader, [0]))[0]}
+    lowest = max(0, page_count - REFERENCE_SCAN_MAX_PAGES)
+
+    async def page_text(number: int) -> str:
+        if number not in pages:
+            page_numbers = [n for n in range(max(lowest, number - window + 1), number + 1) if n not in pages]
+            pages.update(zip(page_numbers, await _extract(reader, pdf_content, page_numbers, parallel)))
+        return pages[number]
+
+    heading: Optional[Tuple[int, int]] = None
+    number = page_count - 1
+    while number >= lowest:
+        text = await page_text(number)
+        position = find_references_heading(text)
+        if position != -1:
+            heading = (number, position)
+            preceding = text[:position]
+            if len(preceding.strip()) < 200 and number - 1 >= lowest:
+                preceding = (await page_text(number - 1))[-1500:] + preceding
+            if not looks_like_references(preceding):
+                break
+        number -= 1
+
+    if heading is None:
+        return pages[0], ""
+    start_page, position = heading
+    section = "\n".join([pages[start_page][position:]] + [pages[n] for n in range(start_page + 1, page_count)])
+    return pages[0], find_references_section(section)
+
+
+def expand_uploads(uploads: List[Tuple[str, bytes]]) -> List[Tuple[str, bytes]]:
+    """
+    (filename, content) of every document in a batch upload; zip archives are replaced by the PDFs inside them.
+    Entry sizes and the document count are checked before anything is decompressed.
+    """
+    too_many = PdfLimitError(f"A batch may contain at most {BATCH_MAX_DOCUMENTS} documents.")
+    documents: List[Tuple[str, bytes]] = []
+    for filename, content in uploads:
+        if not zipfile.is_zipfile(io.BytesIO(content)):
+            if len(documents) >= BATCH_MAX_DOCUMENTS:
+                raise too_many
+            documents.append((filename, content))
+            continue
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            for entry in archive.infolist():
+                name = posixpath.basename(entry.filename)
+                if entry.is_dir() or not name.lower().endswith(".pdf") or name.startswith(".") or entry.filename.startswith("__MACOSX/"):
+                    continue
+                if entry.file_size > PDF_MAX_BYTES:
+                    raise PdfLimitError(f"{entry.filename} in {filename} is too large ({entry.file_size / 1024 / 1024:.1f} MB); the limit is {PDF_MAX_BYTES / 1024 / 1024:.0f} MB.")
+                if len(documents) >= BATCH_MAX_DOCUMENTS:
+                    raise too_many
+                documents.append((entry.filename, archive.read(entry)))
+    return documents
@@ -0,0 +1,142 @@
+import asyncio
+import os
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+# Requests per second and burst size per upstream; override with e.g. CROSSREF_RATE_LIMIT / CROSSREF_BURST.
+DEFAULT_RATE_LIMITS: Dict[str, Tuple[float, float]] = {
+    "doi": (10.0, 10.0),
+    "crossref": (45.0, 20.0),        # polite pool allows 50 req/s
+    "semantic_scholar": (1.0, 1.0),  # unauthenticated shared pool
+    "openalex": (10.0, 10.0),
+    "gemini": (5.0, 5.0),
+    "deepseek": (5.0, 5.0),
+    "fake": (1000.0, 1000.0),        # local test/benchmark backend
+}
+
+UPSTREAM_MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", "3"))
+BACKOFF_BASE = _env_float("UPSTREAM_BACKOFF_BASE", 0.5)
+BACKOFF_MAX = _env_float("UPSTREAM_BACKOFF_MAX", 30.0)
+RETRYABLE_STATUS_CODES = (429, 503)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parses a Retry-After header given either as seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Jittered exponential backoff; a server-provided Retry-After is used as the floor."""
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+    if retry_after is not None:
+        delay += min(retry_after, BACKOFF_MAX)
+    return delay
+
+
+class TokenBucket:
+    """
+    Token bucket with an adaptive rate: a throttling response halves the rate and blocks the
+    bucket for the backoff delay, and each successful request recovers a little of the configured rate.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.throttled = 0
+        self.waited_seconds = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                else:
+                    wait = (1 - self.tokens) / self.rate
+                self.waited_seconds += wait
+                await asyncio.sleep(wait)
+
+    def penalize(self, delay: float) -> None:
+        self.throttled += 1
+        self.rate = max(self.max_rate / 16, self.rate / 2)
+        self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+
+    def reward(self) -> None:
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+class RateLimiterRegistry:
+    """Process-wide token buckets keyed by upstream name."""
+
+    def __init__(self):
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def bucket(self, upstream: str) -> TokenBucket:
+        bucket = self._buckets.get(upstream)
+        if bucket is None:
+            rate, burst = DEFAULT_RATE_LIMITS.get(upstream, (5.0, 5.0))
+            key = upstream.upper()
+            bucket = self._buckets[upstream] = TokenBucket(
+                _env_float(f"{key}_RATE_LIMIT", rate), _env_float(f"{key}_BURST", burst)
+            )
+        return bucket
+
+    async def acquire(self, upstream: str) -> None:
+        await self.bucket(upstream).acquire()
+
+    def penalize(self, upstream: str, delay: float) -> None:
+        self.bucket(upstream).penalize(delay)
+
+    def reward(self, upstream: str) -> None:
+        self.bucket(upstream).reward()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            upstream: {
+                "rate": round(bucket.rate, 3),
+                "max_rate": bucket.max_rate,
+                "throttled": bucket.throttled,
+                "waited_seconds": round(bucket.waited_seconds, 3),
+            }
+            for upstream, bucket in self._buckets.items()
+        }
+
+
+rate_limiters = RateLimiterRegistry()
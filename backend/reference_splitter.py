@@ -0,0 +1,157 @@
+"""
+Reference section detection and splitting.
+
+Every pattern is compiled once at import. Heading candidates are found in a single pass over
+the text, and the bibliography is split by the first style that fits: bracketed numbers ([12]),
+numbered entries (12. / 12)), author-year entries, hanging indents, and finally one entry per line.
+"""
+import re
+from typing import List, Optional
+
+# --- Headings ---
+_HEADING_WORDS = [
+    "references", "reference list", "bibliography", "works cited", "literature cited", "sources cited", "cited literature",
+    "參考文獻", "参考文献", "參考資料", "参考资料", "引用文獻", "引用文献", "参考文献一覧",
+]
+_HEADING_NUMBERING = r"(?:(?:\d{1,2}|[IVXL]{1,4})[.)]?[ \t]+|第[一二三四五六七八九十百\d]+[章節节][ \t]*|[一二三四五六七八九十]+[、.．][ \t]*)?"
+HEADING_PATTERN = re.compile(
+    r"^[ \t]*" + _HEADING_NUMBERING
+    + r"(?:" + "|".join(re.escape(word) for word in sorted(_HEADING_WORDS, key=len, reverse=True)) + r")"
+    + r"[ \t]*[:：]?(?=[ \t]*(?:\n|$)|[ \t]+(?:\[\d|\d+[.)]|[A-Z\u4e00-\u9fff]))",
+    re.IGNORECASE | re.MULTILINE,
+)
+# Sections that follow the bibliography and must not be split into references.
+TRAILING_SECTION_PATTERN = re.compile(r"^[ \t]*(?:appendix|appendices|附錄|附录|付録)\b", re.IGNORECASE | re.MULTILINE)
+_YEAR_PATTERN = re.compile(r"\b(?:1[89]|20)\d{2}[a-z]?\b")
+
+# --- Entry markers ---
+_BRACKET_MARKER = re.compile(r"^[ \t]*\[(\d{1,4})\]", re.MULTILINE)
+_NUMBER_MARKER = re.compile(r"^[ \t]*(\d{1,4})[.)](?!\d)", re.MULTILINE)
+_NAME_PARTICLES = r"(?:(?:van|von|der|den|de|da|di|du|del|la|le)[ \t]+)*"
+_AUTHOR_START = re.compile(
+    r"^(?:" + _NAME_PARTICLES + r"[A-Z][A-Za-z'’\-]+(?:[ \t]+[A-Z][A-Za-z'’\-]+)*,[ \t]+(?:[A-Z]\.|[A-Z][a-z]+)"
+    r"|[\u4e00-\u9fff\u3040-\u30ff]{2,5}[，,、．.（(]"
+    r"|[A-Z][A-Za-z'’\-]+[ \t]+[A-Z]{1,3}[,.][ \t])"
+)
+# Starts with the literal "-" so the regex engine can scan for it quickly.
+_HYPHENATION = re.compile(r"-(?<=[a-z]-)\n(?=[a-z])")
+_LETTER = re.compile(r"[^\W\d_]")
+_MIN_ENTRY_LENGTH = 20
+
+
+def looks_like_references(segment: str) -> bool:
+    """True when a stretch of text is dense with publication years, as a bibliography is."""
+    return len(_YEAR_PATTERN.findall(segment)) >= max(2, len(segment) / 400)
+
+
+def find_references_heading(text: str) -> int:
+    """
+    Position of the references heading, or -1.
+    The last heading candidate wins, except that earlier candidates are preferred when the text
+    between them already reads like a bibliography (running page headers repeat the heading).
+    """
+    candidates = [match.start() for match in HEADING_PATTERN.finditer(text)]
+    if not candidates:
+        return -1
+    position = candidates[-1]
+    for previous in reversed(candidates[:-1]):
+        if not looks_like_references(text[previous:position]):
+            break
+        position = previous
+    return position
+
+
+def find_references_section(text: str) -> str:
+    position = find_references_heading(text)
+    if position == -1:
+        return ""
+    section = text[position:]
+    trailing = TRAILING_SECTION_PATTERN.search(section, 1)
+    return section[:trailing.start()] if trailing else section
+
+
+# --- Splitting ---
+def _strip_heading(text: str) -> str:
+    match = HEADING_PATTERN.match(text)
+    return text[match.end():] if match else text
+
+
+def _sequential_starts(pattern: re.Pattern, text: str) -> List[int]:
+    """Start offsets of markers that continue an ascending 1, 2, 3... sequence; stray numbers are skipped."""
+    matches = list(pattern.finditer(text))
+    first = next((i for i, match in enumerate(matches) if int(match.group(1)) == 1), 0)
+    starts: List[int] = []
+    expected: Optional[int] = None
+    for match in matches[first:]:
+        number = int(match.group(1))
+        if expected is None or number == expected:
+            starts.append(match.start())
+            expected = number + 1
+    return starts
+
+
+def _split_at(text: str, starts: List[int]) -> List[str]:
+    bounds = starts + [len(text)]
+    return [text[bounds[i]:bounds[i + 1]] for i in range(len(starts))]
+
+
+def _split_author_year(lines: List[str]) -> List[str]:
+    entries: List[List[str]] = []
+    entry_has_year = False
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if entries and not (entry_has_year and _AUTHOR_START.match(stripped)):
+            entries[-1].append(stripped)
+            entry_has_year = entry_has_year or _YEAR_PATTERN.search(stripped) is not None
+        else:
+            entries.append([stripped])
+            entry_has_year = _YEAR_PATTERN.search(stripped) is not None
+    return ["\n".join(entry) for entry in entries]
+
+
+def _split_hanging_indent(lines: List[str]) -> Optional[List[str]]:
+    content = [line for line in lines if line.strip()]
+    indented = sum(1 for line in content if line[:1] in (" ", "\t"))
+    if not content or content[0][:1] in (" ", "\t") or not (0.2 <= indented / len(content) <= 0.8):
+        return None
+    entries: List[List[str]] = []
+    for line in content:
+        if line[:1] in (" ", "\t") and entries:
+            entries[-1].append(line.strip())
+        else:
+            entries.append([line.strip()])
+    return ["\n".join(entry) for entry in entries]
+
+
+def _clean(entries: List[str]) -> List[str]:
+    cleaned = []
+    for entry in entries:
+        entry = " ".join(entry.split())
+        if len(entry) >= _MIN_ENTRY_LENGTH and len(_LETTER.findall(entry, 0, 100)) >= 5:
+            cleaned.append(entry)
+    return cleaned
+
+
+def parse_references(text: str) -> List[str]:
+    """Splits a references section (heading included or not) into individual citation strings."""
+    if not text:
+        return []
+    body = _HYPHENATION.sub("", _strip_heading(text))
+
+    for pattern in (_BRACKET_MARKER, _NUMBER_MARKER):
+        starts = _sequential_starts(pattern, body)
+        if len(starts) >= 2:
+            return _clean(_split_at(body, starts))
+
+    lines = body.split("\n")
+    hanging = _split_hanging_indent(lines)
+    if hanging and len(hanging) >= 2:
+        return _clean(hanging)
+
+    author_year = _split_author_year(lines)
+    if len(author_year) >= 2:
+        return _clean(author_year)
+
+    return _clean(lines)
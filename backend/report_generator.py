@@ -1,28 +1,113 @@
-import io
+"""
+PDF export of a verification run.
+
+Styles and the Chinese font are set up once per process. Result cells are wrapped once into plain
+text lines instead of being Paragraphs, which reportlab re-wraps several times per cell while laying
+out and splitting a table. The results are split into tables of REPORT_TABLE_CHUNK_ROWS rows that
+share one style command list, because reportlab re-splits one huge table page by page. The PDF is
+written to a spooled temporary file, which stays in memory for small reports and moves to disk for
+large ones, so it can be streamed back in chunks.
+"""
+import os
+import tempfile
+from functools import lru_cache
+from typing import IO
+
 from reportlab.lib.pagesizes import letter, landscape
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
+from reportlab.lib.utils import simpleSplit
 from reportlab.graphics.shapes import Drawing
 from reportlab.graphics.charts.piecharts import Pie
 from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from reportlab.pdfbase.ttfonts import TTFont
 
-# Register Chinese font
+# --- Configuration ---
+REPORT_TABLE_CHUNK_ROWS = int(os.getenv("REPORT_TABLE_CHUNK_ROWS", "100"))
+# Reports larger than this are spooled to disk while they are written.
+REPORT_SPOOL_MAX_BYTES = int(os.getenv("REPORT_SPOOL_MAX_BYTES", str(8 * 1024 * 1024)))
+
 # Use the font installed in the Dockerfile
-pdfmetrics.registerFont(TTFont('WQYZenHei', '/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc'))
+CHINESE_FONT_PATH = '/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc'
 
-def generate_pdf_report(data):
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=landscape(letter), topMargin=0.5*inch, bottomMargin=0.5*inch)
-    
-    # Define styles
+HEADER_BACKGROUND = colors.HexColor('#4F81BD')
+STRIPE_BACKGROUND = colors.HexColor('#DCE6F1')
+COLUMN_WIDTHS = [1*inch, 2*inch, 0.5*inch, 3.5*inch, 2*inch]
+# Default left plus right padding of a table cell.
+CELL_PADDING = 12
+
+
+@lru_cache(maxsize=None)
+def chinese_font() -> str:
+    """Registers the Chinese font on first use; falls back to Helvetica outside the Docker image."""
+    try:
+        pdfmetrics.registerFont(TTFont('WQYZenHei', CHINESE_FONT_PATH))
+        return 'WQYZenHei'
+    except Exception as e:
+        print(f"Chinese report font unavailable: {e}")
+        return 'Helvetica'
+
+
+@lru_cache(maxsize=None)
+def report_styles(is_chinese: bool):
+    """(title, h2, body, table header) paragraph styles and the table style commands for one language."""
     styles = getSampleStyleSheet()
-    styles.add(ParagraphStyle(name='ChineseTitle', parent=styles['h1'], fontName='WQYZenHei'))
-    styles.add(ParagraphStyle(name='ChineseBody', parent=styles['BodyText'], fontName='WQYZenHei'))
-    styles.add(ParagraphStyle(name='ChineseH2', parent=styles['h2'], fontName='WQYZenHei'))
-    styles.add(ParagraphStyle(name='ChineseH4', parent=styles['h4'], fontName='WQYZenHei'))
+    if not is_chinese:
+        title, h2, body, header = styles['h1'], styles['h2'], styles['BodyText'], styles['h4']
+        header_font = 'Helvetica-Bold'
+    else:
+        font = header_font = chinese_font()
+        title = ParagraphStyle(name='ChineseTitle', parent=styles['h1'], fontName=font)
+        body = ParagraphStyle(name='ChineseBody', parent=styles['BodyText'], fontName=font)
+        h2 = ParagraphStyle(name='ChineseH2', parent=styles['h2'], fontName=font)
+        header = ParagraphStyle(name='ChineseH4', parent=styles['h4'], fontName=font)
+    table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), HEADER_BACKGROUND),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('FONTNAME', (0, 0), (-1, 0), header_font),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('TOPPADDING', (0, 0), (-1, 0), 12),
+        ('FONTNAME', (0, 1), (-1, -1), body.fontName),
+        ('FONTSIZE', (0, 1), (-1, -1), body.fontSize),
+        ('LEADING', (0, 1), (-1, -1), body.leading),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        # Zebra stripes, alternating from the first row after the header
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [STRIPE_BACKGROUND, colors.white]),
+    ])
+    return title, h2, body, header, table_style
+
+
+def wrap_cell(text: str, style: ParagraphStyle, width: float) -> str:
+    """`text` broken into lines that fit a column, as a table cell with the style's font draws them."""
+    width -= CELL_PADDING
+    lines = []
+    for line in simpleSplit(text, style.fontName, style.fontSize, width):
+        if stringWidth(line, style.fontName, style.fontSize) <= width:
+            lines.append(line)
+            continue
+        # simpleSplit only breaks at spaces, so a wider token (a CJK run, a URL or DOI) is on a line
+        # of its own; it is broken between characters instead.
+        current, current_width = "", 0.0
+        for char in line:
+            char_width = stringWidth(char, style.fontName, style.fontSize)
+            if current and current_width + char_width > width:
+                lines.append(current)
+                current, current_width = "", 0.0
+            current += char
+            current_width += char_width
+        lines.append(current)
+    return "\n".join(lines)
+
+
+def generate_pdf_report(data) -> IO[bytes]:
+    """Builds the report and returns it as a file positioned at the start; the caller closes it."""
+    buffer = tempfile.SpooledTemporaryFile(max_size=REPORT_SPOOL_MAX_BYTES)
+    doc = SimpleDocTemplate(buffer, pagesize=landscape(letter), topMargin=0.5*inch, bottomMargin=0.5*inch)
 
     is_chinese = data.get('language', 'en').startswith('zh')
 
@@ -50,15 +135,13 @@ def generate_pdf_report(data):
 
     story = []
 
+    title_style, h2_style, body_style, header_style, table_style = report_styles(is_chinese)
+
     # --- Report Title ---
-    title_style = styles['ChineseTitle'] if is_chinese else styles['h1']
     story.append(Paragraph(translations['report_title'], title_style))
     story.append(Spacer(1, 0.2*inch))
 
     # --- Paper Metadata and Verification Summary ---
-    meta_style = styles['ChineseBody'] if is_chinese else styles['BodyText']
-    h2_style = styles['ChineseH2'] if is_chinese else styles['h2']
-    
     story.append(Paragraph(translations['paper_info'], h2_style))
     meta = data.get('paperMetadata', {})
     meta_text = f"""
@@ -66,7 +149,7 @@ def generate_pdf_report(data):
     <b>{translations['authors']}:</b> {', '.join(meta.get('authors') or [])}<br/>
     <b>{translations['year']}:</b> {meta.get('year', 'N/A')} | <b>{translations['affiliation']}:</b> {meta.get('affiliation', 'N/A')}
     """
-    story.append(Paragraph(meta_text, meta_style))
+    story.append(Paragraph(meta_text, body_style))
     story.append(Spacer(1, 0.2*inch))
 
     story.append(Paragraph(translations['verification_summary'], h2_style))
@@ -78,7 +161,7 @@ def generate_pdf_report(data):
     <b>{translations['not_found']}:</b> {summary_data['not_found_count']} | 
     <b>{translations['format_error']}:</b> {summary_data['format_error_count']}
     """
-    story.append(Paragraph(summary_text, meta_style))
+    story.append(Paragraph(summary_text, body_style))
     story.append(Spacer(1, 0.2*inch))
 
     # --- Pie Chart ---
@@ -112,47 +195,27 @@ def generate_pdf_report(data):
     # --- Detailed Results Table ---
     story.append(Paragraph(translations['detailed_results'], h2_style))
     
-    body_style = styles['ChineseBody'] if is_chinese else styles['BodyText']
-    header_style = styles['ChineseH4'] if is_chinese else styles['h4']
-
     header = [Paragraph(cell, header_style) for cell in [
-        translations['table_status'], translations['table_authors'], translations['table_year'], 
+        translations['table_status'], translations['table_authors'], translations['table_year'],
         translations['table_title'], translations['table_source']
     ]]
-    table_data = [header]
-
-    for ref in data['references']:
-        table_data.append([
-            Paragraph(str(ref.get('status', 'N/A')), body_style),
-            Paragraph(', '.join(ref.get('authors') or []), body_style),
-            Paragraph(str(ref.get('year', 'N/A')), body_style),
-            Paragraph(str(ref.get('title', 'N/A')), body_style),
-            Paragraph(str(ref.get('source', 'N/A')), body_style)
-        ])
-
-    table = Table(table_data, colWidths=[1*inch, 2*inch, 0.5*inch, 3.5*inch, 2*inch], repeatRows=1)
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4F81BD')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('FONTNAME', (0, 0), (-1, 0), 'WQYZenHei' if is_chinese else 'Helvetica-Bold'),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('TOPPADDING', (0, 0), (-1, 0), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        # Zebra stripes
-        ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#DCE6F1')),
-    ]))
-
-    # Apply zebra stripes to the rest of the table
-    for i in range(1, len(table_data)):
-        if i % 2 == 0:
-            bg_color = colors.white
-        else:
-            bg_color = colors.HexColor('#DCE6F1')
-        table.setStyle(TableStyle([('BACKGROUND', (0, i), (-1, i), bg_color)]))
-
-    story.append(table)
+    references = data['references']
+    # An even chunk size keeps the stripes alternating across chunk boundaries.
+    chunk_rows = max(2, REPORT_TABLE_CHUNK_ROWS - REPORT_TABLE_CHUNK_ROWS % 2)
+    for start in range(0, max(len(references), 1), chunk_rows):
+        table_data = [header]
+        for ref in references[start:start + chunk_rows]:
+            cells = [
+                str(ref.get('status', 'N/A')),
+                ', '.join(ref.get('authors') or []),
+                str(ref.get('year', 'N/A')),
+                str(ref.get('title', 'N/A')),
+                str(ref.get('source', 'N/A')),
+            ]
+            table_data.append([wrap_cell(cell, body_style, width) for cell, width in zip(cells, COLUMN_WIDTHS)])
+        table = Table(table_data, colWidths=COLUMN_WIDTHS, repeatRows=1)
+        table.setStyle(table_style)
+        story.append(table)
 
     doc.build(story)
     buffer.seek(0)
@@ -0,0 +1,312 @@
+"""
+Persists verification runs: one `verification_runs` row per run, and a `run_references` plus a
+`verification_outcomes` row per delivered reference (see models.py).
+
+A RunRecorder watches a run's events. The run row is written when the run starts; the stream waits
+at most RUN_STORE_START_TIMEOUT seconds for that insert, and later writes wait for the rest. References are
+buffered and written with one multi-row INSERT per table when the run ends, or earlier once
+RUN_STORE_FLUSH_ROWS are waiting. Totals, metadata and the timing summary are written with the final
+status. Database work runs in worker threads on the pooled engine from database.py. A failing
+database only stops the recording of that run, never the verification itself.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from sqlalchemy import and_, insert, or_, select, update
+
+import models
+from metrics import timed_stage
+from verification_cache import cited_doi, normalize_doi, normalize_text
+
+# --- Configuration ---
+RUN_STORE_ENABLED = os.getenv("RUN_STORE_ENABLED", "1") == "1"
+# Buffered references that trigger a write before the run ends (bounds memory on huge batches).
+RUN_STORE_FLUSH_ROWS = int(os.getenv("RUN_STORE_FLUSH_ROWS", "500"))
+# Seconds a run's first event waits for its row to be inserted (a slow or unreachable database).
+RUN_STORE_START_TIMEOUT = float(os.getenv("RUN_STORE_START_TIMEOUT", "0.5"))
+# Cleared when the tables could not be created at startup (see main.create_database_schema).
+schema_ready = True
+RUN_QUERY_DEFAULT_LIMIT = 50
+RUN_QUERY_MAX_LIMIT = 500
+
+OUTCOMES = ("Verified", "Not Found", "Format Error")
+
+
+def title_hash(title: Optional[str]) -> Optional[str]:
+    normalized = normalize_text(title or "")
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest() if normalized else None
+
+
+def reference_doi(reference: Dict[str, Any]) -> Optional[str]:
+    """The verified DOI, or else the DOI written in the citation, normalized."""
+    verified = reference.get("verified_doi")
+    if verified and verified != "N/A":
+        return normalize_doi(verified)[:255]
+    doi = cited_doi(reference.get("raw_text") or "")
+    return doi[:255] if doi else None
+
+
+def _session_factory():
+    from database import SessionLocal
+    return SessionLocal
+
+
+# --- Recording ---
+class RunRecorder:
+    def __init__(self, kind: str, model_name: str, document_hash: Optional[str] = None, filename: Optional[str] = None,
+                 session_factory: Optional[Callable[[], Any]] = None, enabled: bool = RUN_STORE_ENABLED):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.model_name = model_name
+        self.document_hash = document_hash
+        self.filename = filename
+        self.enabled = enabled
+        self._session_factory = session_factory
+        self.status = "running"
+        self.error: Optional[str] = None
+        self.paper_title: Optional[str] = None
+        self.details: Dict[str, Any] = {}
+        self.counts = {"total_references": 0, "verified_count": 0, "not_found_count": 0, "format_error_count": 0}
+        self._references: List[Dict[str, Any]] = []
+        self._outcomes: List[Dict[str, Any]] = []
+        self._starting: Optional[asyncio.Task] = None
+
+    def _session(self):
+        factory = self._session_factory or _session_factory()
+        return factory()
+
+    async def _write(self, work: Callable[[Any], None]) -> None:
+        if not self.enabled:
+            return
+        def run():
+            with self._session() as db:
+                work(db)
+                db.commit()
+        try:
+            with timed_stage("persist"):
+                await asyncio.to_thread(run)
+        except Exception as e:
+            print(f"Run store error for run {self.id}: {type(e).__name__} - {e}")
+            self.enabled = False
+
+    # --- Writes ---
+    async def start(self) -> None:
+        row = {"id": self.id, "kind": self.kind, "status": self.status, "model_name": self.model_name,
+               "document_hash": self.document_hash, "filename": self.filename, "created_at": datetime.utcnow()}
+        await self._write(lambda db: db.execute(insert(models.VerificationRun), [row]))
+
+    async def begin(self, timeout: float = RUN_STORE_START_TIMEOUT) -> None:
+        """Starts inserting the run row and waits at most `timeout` seconds for it."""
+        self._starting = asyncio.create_task(self.start())
+        await asyncio.wait({self._starting}, timeout=timeout)
+
+    async def _started(self) -> None:
+        # References and the final status refer to the run row, so they are written after it.
+        if self._starting is not None:
+            await asyncio.shield(self._starting)
+
+    async def flush(self) -> None:
+        references, outcomes = self._references, self._outcomes
+        self._references, self._outcomes = [], []
+        if not references:
+            return
+        await self._started()
+        def work(db):
+            db.execute(insert(models.RunReference), references)
+            db.execute(insert(models.VerificationOutcome), outcomes)
+        await self._write(work)
+
+    async def finish(self) -> None:
+        await self._started()
+        await self.flush()
+        values = {**self.counts, "status": self.status, "error": self.error, "paper_title": self.paper_title,
+                  "details": json.dumps(self.details, ensure_ascii=False, default=str), "finished_at": datetime.utcnow()}
+        await self._write(lambda db: db.execute(update(models.VerificationRun).where(models.VerificationRun.id == self.id).values(**values)))
+
+    # --- Events ---
+    def observe(self, event: Dict[str, Any]) -> bool:
+        """Records one run event; returns True when enough references are buffered to flush."""
+        event_type, payload = event.get("type"), event.get("payload") or {}
+        if event_type == "reference":
+            self._add_reference(payload)
+        elif event_type == "metadata":
+            metadata = {key: value for key, value in payload.items() if key != "document"}
+            if "document" in payload:
+                self.details.setdefault("documents", {}).setdefault(str(payload["document"]), {})["metadata"] = metadata
+            else:
+                self.details["metadata"] = metadata
+                self.paper_title = str(metadata.get("title") or "")[:2000] or None
+        elif event_type == "document":
+            entry = self.details.setdefault("documents", {}).setdefault(str(payload.get("document")), {})
+            entry.update({key: payload[key] for key in ("filename", "status", "error") if key in payload})
+        elif event_type == "end":
+            self.status = "complete"
+        elif event_type == "error":
+            self.status = "error"
+            self.error = str(payload.get("message"))
+        elif event_type == "timing":
+            self.details["timing"] = payload
+        return len(self._references) >= RUN_STORE_FLUSH_ROWS
+
+    def _add_reference(self, payload: Dict[str, Any]) -> None:
+        document, position = int(payload.get("document", 0)), int(payload.get("index", 0))
+        status = payload.get("status") or "Unprocessed"
+        self.counts["total_references"] += 1
+        if status == "Verified":
+            self.counts["verified_count"] += 1
+        elif status == "Format Error":
+            self.counts["format_error_count"] += 1
+        else:
+            self.counts["not_found_count"] += 1
+        self._references.append({
+            "run_id": self.id, "document": document, "position": position,
+            "raw_text": payload.get("raw_text") or "",
+            "authors": json.dumps(payload.get("authors"), ensure_ascii=False) if payload.get("authors") is not None else None,
+            "year": payload.get("year"), "title": payload.get("title"), "source": payload.get("source"),
+            "doi": reference_doi(payload), "title_hash": title_hash(payload.get("title")),
+        })
+        self._outcomes.append({
+            "run_id": self.id, "document": document, "position": position, "status": status,
+            "verification_score": payload.get("verification_score"), "verified_doi": payload.get("verified_doi"),
+            "format_suggestion": payload.get("format_suggestion"), "source_url": payload.get("source_url"),
+            "verified_at": datetime.utcnow(),
+        })
+
+
+async def recorded_run(recorder: RunRecorder, events: AsyncIterator[Dict[str, Any]]):
+    """Passes a run's events through, preceded by a `run` event with the id it is stored under."""
+    if not schema_ready:
+        recorder.enabled = False
+    # A slow database does not hold up the stream; if the insert is still running, the id is sent anyway.
+    await recorder.begin()
+    if recorder.enabled:
+        yield {"type": "run", "payload": {"run_id": recorder.id}}
+    try:
+        async for event in events:
+            if recorder.observe(event):
+                await recorder.flush()
+            yield event
+    finally:
+        await events.aclose()
+        if recorder.status == "running":
+            recorder.status = "cancelled"
+        # Keep what was verified even when the client went away mid-run.
+        await asyncio.shield(recorder.finish())
+
+
+# --- Queries ---
+def _limit(limit: Optional[int]) -> int:
+    return max(1, min(limit or RUN_QUERY_DEFAULT_LIMIT, RUN_QUERY_MAX_LIMIT))
+
+
+def _run_dict(run: models.VerificationRun, details: bool = False) -> Dict[str, Any]:
+    data = {
+        "run_id": run.id, "kind": run.kind, "status": run.status, "model_name": run.model_name,
+        "document_hash": run.document_hash, "filename": run.filename, "paper_title": run.paper_title,
+        "total_references": run.total_references, "verified_count": run.verified_count,
+        "not_found_count": run.not_found_count, "format_error_count": run.format_error_count, "error": run.error,
+        "created_at": run.created_at.isoformat(), "finished_at": run.finished_at.isoformat() if run.finished_at else None,
+    }
+    if details:
+        data["details"] = json.loads(run.details) if run.details else {}
+    return data
+
+
+def _reference_dict(reference: models.RunReference, outcome: Optional[models.VerificationOutcome]) -> Dict[str, Any]:
+    return {
+        "run_id": reference.run_id, "document": reference.document, "index": reference.position,
+        "raw_text": reference.raw_text, "authors": json.loads(reference.authors) if reference.authors else None,
+        "year": reference.year, "title": reference.title, "source": reference.source, "doi": reference.doi,
+        "status": outcome.status if outcome else None,
+        "verification_score": outcome.verification_score if outcome else None,
+        "verified_doi": outcome.verified_doi if outcome else None,
+        "format_suggestion": outcome.format_suggestion if outcome else None,
+        "source_url": outcome.source_url if outcome else None,
+    }
+
+
+def _run_cursor(run: models.VerificationRun) -> str:
+    return f"{run.created_at.isoformat()}|{run.id}"
+
+
+def list_runs(status: Optional[str] = None, kind: Optional[str] = None, document_hash: Optional[str] = None,
+              limit: Optional[int] = None, cursor: Optional[str] = None, session_factory=None) -> Dict[str, Any]:
+    """Runs newest first. `cursor` is the `next_cursor` of the previous page (keyset pagination)."""
+    Run = models.VerificationRun
+    limit = _limit(limit)
+    query = select(Run)
+    if status:
+        query = query.where(Run.status == status)
+    if kind:
+        query = query.where(Run.kind == kind)
+    if document_hash:
+        query = query.where(Run.document_hash == document_hash)
+    if cursor:
+        created, _, run_id = cursor.partition("|")
+        created_at = datetime.fromisoformat(created)
+        query = query.where(or_(Run.created_at < created_at, and_(Run.created_at == created_at, Run.id < run_id)))
+    query = query.order_by(Run.created_at.desc(), Run.id.desc()).limit(limit + 1)
+    with (session_factory or _session_factory())() as db:
+        runs = db.execute(query).scalars().all()
+    return {"runs": [_run_dict(run) for run in runs[:limit]], "next_cursor": _run_cursor(runs[limit - 1]) if len(runs) > limit else None}
+
+
+def get_run(run_id: str, session_factory=None) -> Optional[Dict[str, Any]]:
+    with (session_factory or _session_factory())() as db:
+        run = db.get(models.VerificationRun, run_id)
+        return _run_dict(run, details=True) if run else None
+
+
+def _with_outcomes(query):
+    Reference, Outcome = models.RunReference, models.VerificationOutcome
+    return query.outerjoin(Outcome, and_(Outcome.run_id == Reference.run_id, Outcome.document == Reference.document, Outcome.position == Reference.position))
+
+
+def list_run_references(run_id: str, status: Optional[str] = None, limit: Optional[int] = None, cursor: Optional[str] = None,
+                        session_factory=None) -> Dict[str, Any]:
+    """A run's references in document and bibliography order. `cursor` is "<document>:<index>" of the last one seen."""
+    Reference, Outcome = models.RunReference, models.VerificationOutcome
+    limit = _limit(limit)
+    query = _with_outcomes(select(Reference, Outcome)).where(Reference.run_id == run_id)
+    if status:
+        query = query.where(Outcome.status == status)
+    if cursor:
+        document, position = (int(part) for part in cursor.split(":", 1))
+        query = query.where(or_(Reference.document > document, and_(Reference.document == document, Reference.position > position)))
+    query = query.order_by(Reference.document, Reference.position).limit(limit + 1)
+    with (session_factory or _session_factory())() as db:
+        rows = db.execute(query).all()
+    page = rows[:limit]
+    next_cursor = f"{page[-1][0].document}:{page[-1][0].position}" if len(rows) > limit else None
+    return {"references": [_reference_dict(reference, outcome) for reference, outcome in page], "next_cursor": next_cursor}
+
+
+def find_references(doi: Optional[str] = None, title: Optional[str] = None, status: Optional[str] = None,
+                    limit: Optional[int] = None, cursor: Optional[str] = None, session_factory=None) -> Dict[str, Any]:
+    """Earlier verifications of one work, by DOI or by normalized title, newest first. `cursor` is an outcome id."""
+    Reference, Outcome, Run = models.RunReference, models.VerificationOutcome, models.VerificationRun
+    limit = _limit(limit)
+    query = _with_outcomes(select(Reference, Outcome, Run.created_at)).join(Run, Run.id == Reference.run_id)
+    if doi:
+        query = query.where(Reference.doi == normalize_doi(doi))
+    elif title:
+        query = query.where(Reference.title_hash == title_hash(title))
+    else:
+        raise ValueError("Give a DOI or a title.")
+    if status:
+        query = query.where(Outcome.status == status)
+    if cursor:
+        query = query.where(Outcome.id < int(cursor))
+    query = query.order_by(Outcome.id.desc()).limit(limit + 1)
+    with (session_factory or _session_factory())() as db:
+        rows = db.execute(query).all()
+    page = rows[:limit]
+    return {
+        "references": [{**_reference_dict(reference, outcome), "run_created_at": created_at.isoformat()} for reference, outcome, created_at in page],
+        "next_cursor": str(page[-1][1].id) if len(rows) > limit else None,
+    }
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Literal
 
 class PaperBase(BaseModel):
     title: str
@@ -36,3 +36,10 @@ class UploadResponse(BaseModel):
     filename: str
     summary: Summary
     references: List[Reference]
+
+class VerificationOptions(BaseModel):
+    # "sequential" queries one source at a time, "parallel" queries all at once,
+    # "hedged" starts the next source when the previous one is slower than hedge_delay.
+    strategy: Literal["sequential", "parallel", "hedged"] = "hedged"
+    hedge_delay: float = 1.0
+    grace_window: float = 0.3
@@ -0,0 +1,196 @@
+"""
+Server-sent event encoding for verification streams.
+
+A run's events go through an EventBuffer before they are written. Progress statuses ("Finished
+reference 12/300") and summaries are coalesced: only the latest of each is kept and it is sent at most
+every SSE_PROGRESS_INTERVAL seconds, and summaries only carry the fields that changed since the last one
+sent. Everything else is sent in order. Events are encoded with orjson when it is installed, and whatever
+is ready is written as one chunk.
+
+The run itself is consumed by a producer task. When the client is slow and SSE_BUFFER_EVENTS encoded
+events are waiting, the producer stops pulling events, which pauses the run until the client catches up.
+"""
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+from metrics import sse_backpressure_waits, sse_events
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# --- Configuration ---
+# Seconds between coalesced progress and summary events; 0 sends each one (still as deltas).
+SSE_PROGRESS_INTERVAL = float(os.getenv("SSE_PROGRESS_INTERVAL", "0.25"))
+# Encoded events waiting for a slow client before the run is paused.
+SSE_BUFFER_EVENTS = int(os.getenv("SSE_BUFFER_EVENTS", "256"))
+# "full" sends every status message; "compact" replaces them with `progress` events and drops empty fields.
+EVENT_MODES = ("full", "compact")
+SSE_EVENT_MODE = os.getenv("SSE_EVENT_MODE", "full")
+
+CoalescingKey = Tuple[str, Any]
+
+
+def encode_json(value: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def format_sse(event: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}data: {encode_json(event)}\n\n"
+
+
+def event_mode(value: Optional[str]) -> str:
+    mode = value or SSE_EVENT_MODE
+    if mode not in EVENT_MODES:
+        raise ValueError(f"event_mode must be one of {', '.join(EVENT_MODES)}")
+    return mode
+
+
+def coalescing_key(event: Dict[str, Any]) -> Optional[CoalescingKey]:
+    """Events that only matter in their latest state: progress statuses and (per-document) summaries."""
+    event_type, payload = event["type"], event.get("payload") or {}
+    if event_type == "status" and "completed" in payload:
+        return ("progress", None)
+    if event_type == "summary":
+        return ("summary", None)
+    if event_type == "document_summary":
+        return ("document_summary", payload.get("document"))
+    return None
+
+
+def compact_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in payload.items() if value is not None and value != "" and value != []}
+
+
+class EventBuffer:
+    """Coalesces and encodes one run's events; see the module docstring."""
+
+    def __init__(self, mode: str = SSE_EVENT_MODE, interval: float = SSE_PROGRESS_INTERVAL, max_events: int = SSE_BUFFER_EVENTS):
+        self.mode = mode
+        self.interval = interval
+        self.max_events = max(1, max_events)
+        self.outbox: Deque[str] = deque()
+        self.pending: Dict[CoalescingKey, Dict[str, Any]] = {}
+        self.sent_summaries: Dict[CoalescingKey, Dict[str, Any]] = {}
+        self.last_flush = float("-inf")
+        self.closed = False
+        self.readable = asyncio.Event()
+        self.writable = asyncio.Event()
+        self.peak_events = 0
+
+    def _send(self, event: Dict[str, Any]) -> None:
+        if self.mode == "compact":
+            if event["type"] == "status":
+                if "completed" not in event["payload"]:
+                    sse_events.inc(type="status", outcome="dropped")
+                    return
+                event = {"type": "progress", "payload": {key: event["payload"][key] for key in ("completed", "total")}}
+            elif event["type"] in ("reference", "metadata"):
+                event = {"type": event["type"], "payload": compact_payload(event["payload"])}
+        self.outbox.append(format_sse(event))
+        self.peak_events = max(self.peak_events, len(self.outbox))
+        sse_events.inc(type=event["type"], outcome="sent")
+
+    def flush(self) -> None:
+        """Sends the pending progress and summary events; summaries as the fields changed since the last one."""
+        for key, event in self.pending.items():
+            if key[0] == "progress":
+                self._send(event)
+                continue
+            payload, previous = event["payload"], self.sent_summaries.get(key, {})
+            delta = {field: value for field, value in payload.items() if previous.get(field) != value}
+            self.sent_summaries[key] = payload
+            if key[0] == "document_summary":
+                delta.pop("document", None)
+                if delta:
+                    delta = {"document": key[1], **delta}
+            if delta:
+                self._send({"type": event["type"], "payload": delta})
+        self.pending.clear()
+        self.last_flush = time.monotonic()
+
+    def add(self, event: Dict[str, Any]) -> None:
+        key = coalescing_key(event)
+        if key is not None:
+            if key in self.pending:
+                sse_events.inc(type=event["type"], outcome="coalesced")
+            self.pending[key] = event
+            if time.monotonic() - self.last_flush >= self.interval:
+                self.flush()
+        else:
+            # Progress and totals must not lag behind the end of a run or a document's status change;
+            # references are the bulk of the stream and do not need them to be current.
+            if self.pending and event["type"] != "reference":
+                self.flush()
+            self._send(event)
+        self.readable.set()
+
+    async def put(self, event: Dict[str, Any]) -> None:
+        self.add(event)
+        while len(self.outbox) >= self.max_events and not self.closed:
+            sse_backpressure_waits.inc()
+            self.writable.clear()
+            await self.writable.wait()
+
+    def close(self) -> None:
+        self.flush()
+        self.closed = True
+        self.readable.set()
+        self.writable.set()
+
+    async def get(self) -> Optional[str]:
+        """The next chunk to write: every encoded event ready so far. None once the run has ended."""
+        while True:
+            timeout = None
+            if self.pending:
+                timeout = self.last_flush + self.interval - time.monotonic()
+                if timeout <= 0:
+                    self.flush()
+                    timeout = None
+            if self.outbox:
+                chunk = "".join(self.outbox)
+                self.outbox.clear()
+                self.writable.set()
+                return chunk
+            if self.closed:
+                return None
+            self.readable.clear()
+            try:
+                await asyncio.wait_for(self.readable.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+async def sse_stream(events, mode: str = SSE_EVENT_MODE, interval: float = SSE_PROGRESS_INTERVAL,
+                     max_events: int = SSE_BUFFER_EVENTS) -> AsyncIterator[str]:
+    """Encodes a run's {"type", "payload"} events as SSE chunks, consuming the run in a producer task."""
+    buffer = EventBuffer(mode, interval, max_events)
+
+    async def produce():
+        try:
+            async for event in events:
+                await buffer.put(event)
+        finally:
+            try:
+                await events.aclose()
+            finally:
+                buffer.close()
+
+    producer = asyncio.create_task(produce())
+    try:
+        while (chunk := await buffer.get()) is not None:
+            yield chunk
+        await producer
+    finally:
+        if not producer.done():
+            # The client went away: stop the run and let its cleanup (run store, cancelled tasks) finish.
+            producer.cancel()
+            await asyncio.wait({producer})
@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+# Modules import each other as top-level modules (run from the backend directory), and database.py
+# connects at import time, so both are set up before any test module imports them.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'tests.db')}")
@@ -0,0 +1,62 @@
+from citation_parser import LOCAL_PARSE_MIN_CONFIDENCE, parse_citation, parse_confidently
+
+
+def test_apa_journal_article():
+    result = parse_citation("Smith, J., & Doe, A. B. (2020). Deep learning for citation checks. Journal of X, 1(2), 3-4.")
+    assert result.style == "apa"
+    assert result.reference.title == "Deep learning for citation checks"
+    assert result.reference.source == "Journal of X"
+    assert result.reference.year == 2020
+    assert result.reference.authors == ["Smith, J.", "Doe, A. B."]
+    assert result.confidence >= LOCAL_PARSE_MIN_CONFIDENCE
+
+
+def test_apa_title_with_dotted_acronym():
+    result = parse_citation("Smith, J. (2020). A study of U.S. policy. Journal of X, 1(2), 3-4.")
+    assert result.reference.title == "A study of U.S. policy"
+    assert result.reference.source == "Journal of X"
+
+
+def test_apa_title_with_abbreviation():
+    result = parse_citation("Lee, K. (2019). Nature vs. nurture in language models. Cognitive Science, 43, 1-20.")
+    assert result.reference.title == "Nature vs. nurture in language models"
+    assert result.reference.source == "Cognitive Science"
+
+
+def test_apa_source_followed_by_prose_is_not_confident():
+    # The title ends at an abbreviation the pattern does not know, so the "source" is the rest of the title.
+    text = "Smith, J. (2020). A study of Calif. policy makers. Journal of X, 1(2), 3-4."
+    assert parse_citation(text).confidence < LOCAL_PARSE_MIN_CONFIDENCE
+    assert parse_confidently(text) is None
+
+
+def test_apa_book_with_publisher():
+    result = parse_citation("Brown, A. B. (2015). Learning theory. Cambridge University Press.")
+    assert result.reference.title == "Learning theory"
+    assert result.reference.source == "Cambridge University Press"
+    assert result.confidence >= LOCAL_PARSE_MIN_CONFIDENCE
+
+
+def test_ieee():
+    result = parse_citation('[3] J. Smith and A. Doe, "Graph networks for citation analysis," Proc. IEEE Conf. Comput. Vis., vol. 2, pp. 1-9, 2021.')
+    assert result.style == "ieee"
+    assert result.reference.title == "Graph networks for citation analysis"
+    assert result.reference.source == "Proc. IEEE Conf. Comput. Vis"
+    assert result.reference.year == 2021
+
+
+def test_gbt7714():
+    result = parse_citation("张三, 李四. 深度学习在文献核查中的应用[J]. 计算机学报, 2020, 43(2): 1-10.")
+    assert result.style == "gbt7714"
+    assert result.reference.title == "深度学习在文献核查中的应用"
+    assert result.reference.source == "计算机学报"
+    assert result.reference.year == 2020
+
+
+def test_keeps_raw_text():
+    raw = "  [1]  Smith, J. (2020). A study of policy. Journal of X, 1(2), 3-4.  "
+    assert parse_citation(raw).reference.raw_text == raw
+
+
+def test_unstructured_text_is_left_to_the_llm():
+    assert parse_confidently("see the appendix for more details") is None
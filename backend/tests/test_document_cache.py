@@ -0,0 +1,34 @@
+import asyncio
+
+import schemas
+from document_cache import DocumentCache, is_cacheable
+
+PDF = b"%PDF-1.4 document cache test"
+
+
+def reference(text: str, status: str = "Not Found") -> schemas.Reference:
+    return schemas.Reference(raw_text=text, status=status, title="A study of policy")
+
+
+def test_is_cacheable():
+    assert is_cacheable(reference("[1] A."))
+    assert not is_cacheable(reference("[1] A."), complete=False)
+    assert not is_cacheable(reference("[1] A.", status="Format Error"))
+
+
+def test_incomplete_outcomes_are_not_stored():
+    cache = DocumentCache(enabled=True)
+
+    async def run():
+        await cache.set_reference("model", reference("[1] Stored citation."))
+        await cache.set_reference("model", reference("[2] Outage citation."), complete=False)
+        found = await cache.get_references("model", ["Stored citation.", "Outage citation."])
+        await cache.set_document("model", PDF, None, [reference("[1] Stored citation.")], complete=False)
+        skipped = await cache.get_document("model", PDF)
+        await cache.set_document("model", PDF, None, [reference("[1] Stored citation.")])
+        return found, skipped, await cache.get_document("model", PDF)
+
+    found, skipped, stored = asyncio.run(run())
+    assert list(found) == [0]
+    assert skipped is None
+    assert [ref["raw_text"] for ref in stored["references"]] == ["[1] Stored citation."]
@@ -0,0 +1,46 @@
+import asyncio
+
+import job_queue
+from job_queue import MemoryJobStore, process_job, replay_events
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_finished_jobs_expire_after_the_ttl():
+    store = MemoryJobStore()
+
+    async def scenario():
+        for job_id in ("finished", "running"):
+            await store.create(job_id, b"%PDF", {})
+            store._jobs[job_id]["created_at"] -= job_queue.JOB_TTL + 1
+        await store.set_status("finished", "completed")
+        await store.set_status("running", "running")
+        await store.create("new", b"%PDF", {})
+        return [job_id for job_id in ("finished", "running", "new") if await store.get(job_id)]
+
+    assert run(scenario()) == ["running", "new"]
+
+
+def test_restarted_job_replaces_its_events():
+    store = MemoryJobStore()
+
+    async def runner(pdf_content, params):
+        yield {"type": "reference", "payload": {"index": 0}}
+        yield {"type": "end", "payload": {}}
+
+    async def scenario():
+        await store.create("job", b"%PDF", {})
+        # A worker died after sending three events of the first attempt.
+        await store.set_status("job", "running")
+        for index in range(3):
+            await store.append_event("job", {"type": "status", "payload": {"index": index}})
+        await process_job(store, runner, "job")
+        replayed = [(offset, event["type"]) async for offset, event in replay_events(store, "job")]
+        return replayed, await store.events("job", 1), await store.get("job")
+
+    replayed, (start, after_first), job = run(scenario())
+    assert replayed == [(4, "status"), (5, "reference"), (6, "end")]
+    assert start == 3 and len(after_first) == 3
+    assert job["event_count"] == 6 and job["status"] == "completed"
@@ -0,0 +1,48 @@
+import asyncio
+import json
+
+import main
+from llm_backends import LLM_TIMEOUT, FakeBackend, LLMBackend
+from llm_cache import LLMResponseCache
+from llm_router import CompositeBackend
+from verification_cache import build_verification_cache
+
+CITATION = "Smith, J. (2020). A study of policy. Journal of X, 1(2), 3-4."
+ANSWER = json.dumps({"authors": ["Smith, J."], "year": 2020, "title": "A study of policy", "source": "Journal of X"})
+
+
+class FailingBackend(LLMBackend):
+    provider = "fake"
+
+    def __init__(self, model_name: str, error: Exception):
+        super().__init__(model_name)
+        self.error = error
+
+    async def generate(self, prompt: str) -> str:
+        raise self.error
+
+
+def client(*backends: LLMBackend) -> main.LLMClient:
+    cache = LLMResponseCache(build_verification_cache(prefix="llm-test", name="llm-test"), enabled=True)
+    return main.LLMClient(backends[0].model_name, backend=CompositeBackend(list(backends), routing="failover"), cache=cache)
+
+
+def test_fallback_answers_are_memoized_under_the_fallback_model():
+    llm = client(FailingBackend("test-primary", RuntimeError("unavailable")), FakeBackend("test-fallback", latency=0, responder=lambda prompt: ANSWER))
+
+    async def scenario():
+        reference = await llm.parse_single_reference(CITATION)
+        primary = await llm.cache.get(llm._cache_key("parse", CITATION))
+        fallback = await llm.cache.get(llm._cache_key("parse", CITATION, "test-fallback"))
+        return reference, primary, fallback
+
+    reference, primary, fallback = asyncio.run(scenario())
+    assert reference.title == "A study of policy"
+    assert primary is None
+    assert fallback == ANSWER
+
+
+def test_failures_come_back_as_error_text():
+    llm = client(FailingBackend("test-slow", asyncio.TimeoutError()), FailingBackend("test-broken", ValueError()))
+    response_text = asyncio.run(llm._execute_prompt("prompt"))
+    assert response_text == f"Error: test-slow: timed out after {LLM_TIMEOUT:.0f}s; test-broken: ValueError"
@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+import main
+import schemas
+from local_index import LocalIndex, build_index
+
+DOI = "10.5555/abc"
+
+
+@pytest.fixture
+def local_index(tmp_path, monkeypatch):
+    build_index([(DOI, "Attention is all you need", "2017", "NeurIPS", "Vaswani;Shazeer")], str(tmp_path))
+    index = LocalIndex(str(tmp_path))
+    monkeypatch.setattr(main, "get_local_index", lambda: index)
+    yield index
+    index.close()
+
+
+def citation(title: str) -> schemas.Reference:
+    return schemas.Reference(raw_text=f"Vaswani, A., & Shazeer, N. (2017). {title}. NeurIPS. https://doi.org/{DOI}",
+                             title=title, authors=["Vaswani, A.", "Shazeer, N."], year=2017)
+
+
+def test_cited_doi_found_offline_is_verified(local_index):
+    result, complete = asyncio.run(main.lookup_reference(citation("Attention is all you need")))
+    assert complete
+    assert (result["status"], result["verification_score"], result["source"]) == ("Verified", 100, "Local Index: NeurIPS")
+
+
+def test_cited_doi_of_another_work_falls_through(local_index, monkeypatch):
+    searched = []
+
+    async def no_sources(reference, options):
+        searched.append(reference.title)
+        return None, True
+
+    async def unexpected_lookup(doi):
+        raise AssertionError("the DOI's record is already known offline")
+
+    monkeypatch.setattr(main, "query_sources", no_sources)
+    monkeypatch.setattr(main.doi_resolver, "lookup", unexpected_lookup)
+    result, complete = asyncio.run(main.lookup_reference(citation("Quantum attention for protein folding")))
+    assert result is None and complete
+    assert searched == ["Quantum attention for protein folding"]
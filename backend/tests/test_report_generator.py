@@ -0,0 +1,25 @@
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from report_generator import CELL_PADDING, COLUMN_WIDTHS, report_styles, wrap_cell
+
+
+def line_widths(text: str, style) -> list:
+    return [stringWidth(line, style.fontName, style.fontSize) for line in text.split("\n")]
+
+
+def test_wraps_at_spaces():
+    body = report_styles(False)[2]
+    wrapped = wrap_cell("A study of citation verification with large language models and bibliographic databases", body, COLUMN_WIDTHS[1])
+    assert wrapped.count("\n") >= 1
+    assert " ".join(wrapped.split("\n")).startswith("A study of citation verification")
+    assert max(line_widths(wrapped, body)) <= COLUMN_WIDTHS[1] - CELL_PADDING
+
+
+def test_breaks_tokens_wider_than_the_column():
+    body = report_styles(True)[2]
+    for text in ("基於深度學習之文獻引用自動驗證系統設計與實作以大型語言模型結合多來源書目資料庫之交叉比對方法為例",
+                 "https://doi.org/10.1000/a-very-long-doi-identifier-that-does-not-fit-in-one-column-2024"):
+        wrapped = wrap_cell(text, body, COLUMN_WIDTHS[1])
+        assert wrapped.count("\n") >= 1
+        assert wrapped.replace("\n", "") == text
+        assert max(line_widths(wrapped, body)) <= COLUMN_WIDTHS[1] - CELL_PADDING
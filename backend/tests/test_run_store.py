@@ -0,0 +1,211 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import models
+import run_store
+from run_store import RunRecorder, find_references, list_run_references, list_runs, recorded_run
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    models.Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def reference_event(index: int, document: int = 0, doi: str = "10.1000/shared") -> dict:
+    return {"type": "reference", "payload": {
+        "raw_text": f"Author, A. ({2000 + index}). Title {index}. Journal, 1, 1-2. https://doi.org/{doi}",
+        "status": "Verified" if index % 2 == 0 else "Not Found", "title": f"Title {index}", "year": 2000 + index,
+        "authors": ["Author, A."], "index": index, "document": document,
+    }}
+
+
+def count_rows(session_factory, model) -> int:
+    with session_factory() as db:
+        return db.execute(select(func.count()).select_from(model)).scalar()
+
+
+def record(session_factory, events, kind: str = "stream") -> RunRecorder:
+    recorder = RunRecorder(kind, "model", session_factory=session_factory, enabled=True)
+
+    async def source():
+        for event in events:
+            yield event
+
+    async def run():
+        async for _ in recorded_run(recorder, source()):
+            pass
+
+    asyncio.run(run())
+    return recorder
+
+
+def test_references_are_flushed_at_the_threshold_and_at_the_end(session_factory, monkeypatch):
+    monkeypatch.setattr(run_store, "RUN_STORE_FLUSH_ROWS", 3)
+    recorder = RunRecorder("stream", "model", session_factory=session_factory, enabled=True)
+    stored_after = []
+
+    async def source():
+        for index in range(5):
+            yield reference_event(index)
+        yield {"type": "end", "payload": {}}
+
+    async def run():
+        async for event in recorded_run(recorder, source()):
+            if event["type"] == "reference":
+                stored_after.append(count_rows(session_factory, models.RunReference))
+
+    asyncio.run(run())
+    assert stored_after == [0, 0, 3, 3, 3]
+    assert count_rows(session_factory, models.RunReference) == 5
+    assert count_rows(session_factory, models.VerificationOutcome) == 5
+    run = run_store.get_run(recorder.id, session_factory=session_factory)
+    assert run["status"] == "complete"
+    assert (run["total_references"], run["verified_count"], run["not_found_count"]) == (5, 3, 2)
+
+
+def test_run_without_end_event_is_cancelled(session_factory):
+    recorder = record(session_factory, [reference_event(0)])
+    assert run_store.get_run(recorder.id, session_factory=session_factory)["status"] == "cancelled"
+
+
+def test_slow_database_does_not_hold_up_the_stream(session_factory):
+    def slow_session_factory():
+        time.sleep(1.0)
+        return session_factory()
+
+    recorder = RunRecorder("stream", "model", session_factory=slow_session_factory, enabled=True)
+
+    async def source():
+        yield reference_event(0)
+        yield {"type": "end", "payload": {}}
+
+    async def run():
+        started, arrivals = time.perf_counter(), []
+        async for event in recorded_run(recorder, source()):
+            arrivals.append((event["type"], time.perf_counter() - started))
+        return arrivals
+
+    arrivals = asyncio.run(run())
+    assert arrivals[0][0] == "run" and arrivals[0][1] < 0.9
+    # The run is still stored once the slow insert is done.
+    assert run_store.get_run(recorder.id, session_factory=session_factory)["status"] == "complete"
+
+
+def test_unreachable_database_does_not_stop_the_run():
+    def unreachable():
+        raise ConnectionError("database is down")
+
+    recorder = RunRecorder("stream", "model", session_factory=unreachable, enabled=True)
+
+    async def source():
+        yield reference_event(0)
+        yield {"type": "end", "payload": {}}
+
+    async def run():
+        return [event["type"] async for event in recorded_run(recorder, source())]
+
+    assert asyncio.run(run()) == ["reference", "end"]
+    assert not recorder.enabled
+
+
+def test_list_runs_pages(session_factory):
+    ids = [record(session_factory, [{"type": "end", "payload": {}}]).id for _ in range(5)]
+    pages, cursor = [], None
+    while True:
+        page = list_runs(limit=2, cursor=cursor, session_factory=session_factory)
+        pages.append([run["run_id"] for run in page["runs"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert sum(pages, []) == ids[::-1]
+
+
+def test_list_run_references_pages(session_factory):
+    events = [reference_event(index, document) for document in (0, 1) for index in range(3)]
+    recorder = record(session_factory, events + [{"type": "end", "payload": {}}], kind="batch")
+    seen, cursor = [], None
+    while True:
+        page = list_run_references(recorder.id, limit=4, cursor=cursor, session_factory=session_factory)
+        seen += [(reference["document"], reference["index"]) for reference in page["references"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [(document, index) for document in (0, 1) for index in range(3)]
+    verified = list_run_references(recorder.id, status="Verified", session_factory=session_factory)
+    assert [reference["index"] for reference in verified["references"]] == [0, 2, 0, 2]
+
+
+def test_find_references_pages_newest_first(session_factory):
+    for _ in range(3):
+        record(session_factory, [reference_event(0), reference_event(1, doi="10.1000/other"), {"type": "end", "payload": {}}])
+    seen, cursor = [], None
+    while True:
+        page = find_references(doi="https://doi.org/10.1000/SHARED", limit=2, cursor=cursor, session_factory=session_factory)
+        seen += page["references"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert len(seen) == 3
+    assert all(reference["doi"] == "10.1000/shared" for reference in seen)
+    assert [reference["run_created_at"] for reference in seen] == sorted((reference["run_created_at"] for reference in seen), reverse=True)
+    assert find_references(title="title 1", session_factory=session_factory)["references"][0]["doi"] == "10.1000/other"
+
+
+def test_document_without_references_is_recorded_complete(session_factory, monkeypatch):
+    import main
+
+    class MetadataOnlyLLM:
+        def __init__(self, model_name):
+            self.model_name = model_name
+
+        async def extract_paper_metadata(self, text):
+            return None
+
+    async def no_references(pdf_content):
+        return "First page", ""
+
+    monkeypatch.setattr(main, "LLMClient", MetadataOnlyLLM)
+    monkeypatch.setattr(main, "extract_pdf_text", no_references)
+    monkeypatch.setattr(run_store, "_session_factory", lambda: session_factory)
+
+    async def run():
+        return [event async for event in main.run_verification(b"%PDF-1.4 without references", "model")]
+
+    events = asyncio.run(run())
+    assert [event["type"] for event in events][-2:] == ["end", "timing"]
+    run_id = events[0]["payload"]["run_id"]
+    assert run_store.get_run(run_id, session_factory=session_factory)["status"] == "complete"
+
+
+def test_runs_are_not_stored_without_a_schema(session_factory, monkeypatch):
+    import main
+
+    def unreachable(*args, **kwargs):
+        raise ConnectionError("database is down")
+
+    writes = []
+    monkeypatch.setattr(main.models.Base.metadata, "create_all", unreachable)
+    monkeypatch.setattr(run_store, "schema_ready", True)
+    asyncio.run(main.create_database_schema())
+    assert run_store.schema_ready is False
+
+    recorder = RunRecorder("stream", "model", session_factory=lambda: writes.append(1) or session_factory(), enabled=True)
+
+    async def source():
+        yield reference_event(0)
+        yield {"type": "end", "payload": {}}
+
+    async def run():
+        return [event["type"] async for event in recorded_run(recorder, source())]
+
+    assert asyncio.run(run()) == ["reference", "end"]
+    assert writes == []
@@ -0,0 +1,73 @@
+import asyncio
+from collections import OrderedDict
+
+import main
+import schemas
+from doi_resolver import doi_resolver
+from verification_cache import verification_cache_key
+
+DOI = "10.5555/shared-doi-test"
+RECORD = {
+    "DOI": DOI,
+    "title": ["Attention is all you need"],
+    "container-title": ["Advances in Neural Information Processing Systems"],
+    "author": [{"family": "Vaswani"}, {"family": "Shazeer"}],
+    "issued": {"date-parts": [[2017]]},
+}
+
+
+class UnverifiedLLM:
+    async def analyze_unverified_reference(self, reference):
+        return "Not Found"
+
+
+async def no_sources(reference, options):
+    return None, True
+
+
+def citation(title: str) -> schemas.Reference:
+    return schemas.Reference(
+        raw_text=f"Vaswani, A., & Shazeer, N. (2017). {title}. Journal of Y, 1, 1-10. https://doi.org/{DOI}",
+        title=title, authors=["Vaswani, A.", "Shazeer, N."], year=2017, source="Journal of Y",
+    )
+
+
+def test_cache_key_separates_titles_citing_one_doi():
+    raw = f"Some citation. https://doi.org/{DOI}"
+    genuine = verification_cache_key(raw, "Attention is all you need", ["A. Vaswani"], 2017)
+    fabricated = verification_cache_key(raw, "Quantum attention for protein folding", ["A. Vaswani"], 2017)
+    assert genuine.startswith(f"doi:{DOI}|")
+    assert genuine != fabricated
+    assert verification_cache_key(raw, None, None) == f"doi:{DOI}"
+
+
+def test_citations_sharing_a_doi_are_verified_separately(monkeypatch):
+    monkeypatch.setattr(main, "query_sources", no_sources)
+    monkeypatch.setattr(doi_resolver, "records", OrderedDict([*doi_resolver.records.items(), (DOI, RECORD)]))
+
+    async def verify(title):
+        reference, _ = await main.verify_reference(citation(title), UnverifiedLLM())
+        return reference
+
+    async def run():
+        # Concurrently (in-flight lookups) and again afterwards (cached outcomes), in both orders.
+        concurrent = await asyncio.gather(verify("Attention is all you need"), verify("Quantum attention for protein folding"))
+        cached = [await verify("Quantum attention for protein folding"), await verify("Attention is all you need")]
+        return concurrent, cached
+
+    (genuine, fabricated), (fabricated_again, genuine_again) = asyncio.run(run())
+    assert genuine.status == genuine_again.status == "Verified"
+    assert genuine.verified_doi == DOI
+    assert fabricated.status == fabricated_again.status == "Not Found"
+
+
+def test_cache_key_uses_surnames_in_either_order():
+    assert verification_cache_key("x", "Deep learning", ["LeCun, Y.", "Bengio, Y.", "Hinton, G."], 2015) == \
+        verification_cache_key("x", "Deep learning", ["Y. LeCun", "Y. Bengio", "G. Hinton"], 2015)
+    assert verification_cache_key("x", "Deep learning", ["LeCun, Y.", "Bengio, Y.", "Hinton, G."], 2015) != \
+        verification_cache_key("x", "Deep learning", ["Young, Y.", "Yang, Y.", "Gao, G."], 2015)
+
+
+def test_cache_key_separates_years():
+    assert verification_cache_key("x", "Deep learning", ["LeCun, Y."], 2015) != \
+        verification_cache_key("x", "Deep learning", ["LeCun, Y."], 2009)
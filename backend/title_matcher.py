@@ -0,0 +1,121 @@
+"""
+Ranks bibliographic candidates (search results or offline index records) against a parsed reference.
+
+Title similarity is token_set_ratio on normalized titles, computed for all of a reference's
+candidates in one call with rapidfuzz (C++) when it is installed, or pair by pair with fuzzywuzzy
+otherwise. The year and author surnames then move candidates up or down, so a correct match that
+the search API ranked second still wins over a similar title from another year by other authors.
+"""
+import os
+from typing import Any, List, NamedTuple, Optional, Sequence
+
+from verification_cache import normalize_text
+
+try:
+    from rapidfuzz import fuzz as _rapid_fuzz, process as _rapid_process
+except ImportError:
+    _rapid_fuzz = _rapid_process = None
+
+# --- Configuration ---
+# Candidates requested from each search API.
+MATCH_TOP_K = int(os.getenv("MATCH_TOP_K", "5"))
+# Same bar as the former single-candidate check (token_set_ratio > 85).
+MATCH_MIN_TITLE_SCORE = int(os.getenv("MATCH_MIN_TITLE_SCORE", "86"))
+YEAR_EXACT_BONUS = 5
+# Preprints and proceedings are often dated a year apart from the final publication.
+YEAR_CLOSE_BONUS = 2
+YEAR_MISMATCH_PENALTY = 10
+AUTHOR_OVERLAP_BONUS = 10
+
+
+class Candidate(NamedTuple):
+    title: str
+    year: Optional[int] = None
+    surnames: Sequence[str] = ()
+    payload: Any = None
+
+
+class Match(NamedTuple):
+    candidate: Candidate
+    title_score: float
+    score: float
+    position: int
+
+
+def surname(author: str) -> str:
+    """Normalized family name: "LeCun, Y.", "Y. LeCun" and "LECUN Y" all give "lecun"."""
+    if "," in author:
+        author = author.split(",", 1)[0]
+    tokens = normalize_text(author).split()
+    named = [token for token in tokens if len(token) > 1]
+    return (named or tokens or [""])[-1]
+
+
+def parse_year(value: Any) -> Optional[int]:
+    try:
+        return int(str(value)[:4])
+    except (TypeError, ValueError):
+        return None
+
+
+class TitleMatcher:
+    """Reusable scorer; one instance can serve any number of references and threads."""
+
+    def __init__(self, min_title_score: float = MATCH_MIN_TITLE_SCORE):
+        self.min_title_score = min_title_score
+
+    def title_scores(self, title: str, titles: Sequence[str], cutoff: float = 0) -> List[float]:
+        """token_set_ratio (0-100) of `title` against every entry of `titles`; scores below `cutoff` may be reported as 0."""
+        query = normalize_text(title)
+        choices = [normalize_text(choice or "") for choice in titles]
+        if _rapid_process is None:
+            from fuzzywuzzy import fuzz
+            return [fuzz.token_set_ratio(query, choice) for choice in choices]
+        scores = [0.0] * len(choices)
+        for _, value, position in _rapid_process.extract(query, choices, scorer=_rapid_fuzz.token_set_ratio, processor=None, limit=None, score_cutoff=cutoff):
+            scores[position] = value
+        return scores
+
+    @staticmethod
+    def _year_adjustment(year: Optional[int], candidate_year: Optional[int]) -> float:
+        if not year or not candidate_year:
+            return 0
+        gap = abs(year - candidate_year)
+        if gap == 0:
+            return YEAR_EXACT_BONUS
+        return YEAR_CLOSE_BONUS if gap == 1 else -YEAR_MISMATCH_PENALTY
+
+    @staticmethod
+    def _author_adjustment(surnames: Sequence[str], candidate_surnames: Sequence[str]) -> float:
+        if not surnames or not candidate_surnames:
+            return 0
+        known = {surname(name) for name in candidate_surnames}
+        return AUTHOR_OVERLAP_BONUS * sum(1 for name in surnames if name in known) / len(surnames)
+
+    def rank(self, title: str, candidates: Sequence[Candidate], year: Optional[int] = None, authors: Optional[Sequence[str]] = None) -> List[Match]:
+        """
+        Candidates whose title reaches `min_title_score` and whose combined score does too, best first.
+        The combined score adds a year bonus (or a penalty for a gap of two years or more) and up to
+        AUTHOR_OVERLAP_BONUS for the share of the reference's surnames found among the candidate's.
+        Ties keep the order the candidates were given in.
+        """
+        if not title or not candidates:
+            return []
+        surnames = [surname(author) for author in authors or [] if surname(author)]
+        scores = self.title_scores(title, [candidate.title for candidate in candidates], cutoff=self.min_title_score)
+        matches = []
+        for position, (candidate, title_score) in enumerate(zip(candidates, scores)):
+            if title_score < self.min_title_score:
+                continue
+            score = title_score + self._year_adjustment(year, candidate.year) + self._author_adjustment(surnames, candidate.surnames)
+            if score >= self.min_title_score:
+                matches.append(Match(candidate, title_score, score, position))
+        matches.sort(key=lambda match: (-match.score, match.position))
+        return matches
+
+    def best(self, title: str, candidates: Sequence[Candidate], year: Optional[int] = None, authors: Optional[Sequence[str]] = None) -> Optional[Match]:
+        matches = self.rank(title, candidates, year, authors)
+        return matches[0] if matches else None
+
+
+title_matcher = TitleMatcher()
@@ -0,0 +1,275 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from metrics import record_cache
+
+# --- Configuration ---
+VERIFICATION_CACHE_TTL = int(os.getenv("VERIFICATION_CACHE_TTL", str(30 * 24 * 3600)))
+VERIFICATION_CACHE_NEGATIVE_TTL = int(os.getenv("VERIFICATION_CACHE_NEGATIVE_TTL", str(24 * 3600)))
+VERIFICATION_CACHE_SIZE = int(os.getenv("VERIFICATION_CACHE_SIZE", "10000"))
+REDIS_URL = os.getenv("REDIS_URL")
+VERIFICATION_CACHE_DB = os.getenv("VERIFICATION_CACHE_DB", "0") == "1"
+
+# Seconds a tier stays disabled after a connection error before it is tried again.
+TIER_RETRY_AFTER = 60
+
+DOI_PATTERN = re.compile(r'10\.\d{4,9}/[-._;()/:A-Z0-9]+', re.IGNORECASE)
+
+
+# --- Cache Keys ---
+def normalize_doi(doi: str) -> str:
+    doi = doi.strip().lower()
+    doi = re.sub(r'^(https?://)?(dx\.)?doi\.org/', '', doi)
+    doi = re.sub(r'^doi:\s*', '', doi)
+    doi = doi.rstrip('.,;')
+    # "(doi:10.1000/xyz)." leaves a closing parenthesis that the DOI itself did not open.
+    while doi.endswith(')') and doi.count(')') > doi.count('('):
+        doi = doi[:-1].rstrip('.,;')
+    return doi
+
+
+def cited_doi(text: str) -> Optional[str]:
+    """The first DOI written in a citation, normalized."""
+    match = DOI_PATTERN.search(text)
+    return normalize_doi(match.group(0)) if match else None
+
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = re.sub(r'[^\w\s]', ' ', text)
+    return " ".join(text.split())
+
+
+def reference_fingerprint(title: str, authors: Optional[List[str]]) -> str:
+    """Stable fingerprint of a normalized title plus the sorted author surnames ("LeCun, Y." and "Y. LeCun" agree)."""
+    # title_matcher imports this module.
+    from title_matcher import surname
+    surnames = sorted(filter(None, (surname(author) for author in authors or [])))
+    basis = normalize_text(title) + "|" + ",".join(surnames)
+    return hashlib.sha1(basis.encode("utf-8")).hexdigest()
+
+
+def verification_cache_key(raw_text: str, title: Optional[str], authors: Optional[List[str]], year: Optional[int] = None) -> Optional[str]:
+    # The outcome depends on whether the cited title, year and authors match what a source has, so a
+    # fabricated citation reusing a real DOI, title or author list must not share the genuine citation's entry.
+    doi = cited_doi(raw_text)
+    if doi:
+        return f"doi:{doi}|{reference_fingerprint(title, authors)}|{year or ''}" if title else f"doi:{doi}"
+    if title:
+        return f"ref:{reference_fingerprint(title, authors)}|{year or ''}"
+    return None
+
+
+# --- Tiers ---
+class MemoryTier:
+    """
+    In-process LRU bounded by entry count and, optionally, by the total size of the stored values.
+    Also serves as the stand-in when Redis or Postgres is unavailable.
+    """
+    name = "memory"
+
+    def __init__(self, maxsize: int = VERIFICATION_CACHE_SIZE, max_bytes: Optional[int] = None):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def _discard(self, key: str) -> None:
+        _, value = self._entries.pop(key)
+        self.size_bytes -= len(value)
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.time():
+            self._discard(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        if key in self._entries:
+            self._discard(key)
+        self._entries[key] = (time.time() + ttl, value)
+        self.size_bytes += len(value)
+        while len(self._entries) > self.maxsize or (self.max_bytes is not None and self.size_bytes > self.max_bytes and len(self._entries) > 1):
+            self._discard(next(iter(self._entries)))
+
+
+class RedisTier:
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "verify"):
+        import redis.asyncio as aioredis
+        self._client = aioredis.from_url(url)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self._client.get(f"{self.prefix}:{key}")
+        return value.decode("utf-8") if value is not None else None
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        await self._client.set(f"{self.prefix}:{key}", value, ex=ttl)
+
+
+class DiskTier:
+    """Local SQLite file; survives restarts of a single-host deployment without Redis."""
+    name = "disk"
+
+    def __init__(self, path: str):
+        import sqlite3
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)")
+        self._connection.commit()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return row[0]
+
+    def _set(self, key: str, value: str, ttl: int) -> None:
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)", (key, value, time.time() + ttl))
+            self._connection.commit()
+
+    async def get(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        await asyncio.to_thread(self._set, key, value, ttl)
+
+
+class DatabaseTier:
+    name = "postgres"
+
+    def __init__(self):
+        import models
+        from database import SessionLocal
+        self._model = models.VerificationCacheEntry
+        self._session_factory = SessionLocal
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._session_factory() as db:
+            row = db.get(self._model, key)
+            if row is None or row.expires_at <= datetime.utcnow():
+                return None
+            return row.value
+
+    def _set(self, key: str, value: str, ttl: int) -> None:
+        with self._session_factory() as db:
+            db.merge(self._model(key=key, value=value, expires_at=datetime.utcnow() + timedelta(seconds=ttl)))
+            db.commit()
+
+    async def get(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        await asyncio.to_thread(self._set, key, value, ttl)
+
+
+# --- Tiered Cache ---
+class VerificationCache:
+    """
+    Looks entries up tier by tier (memory -> Redis -> Postgres) and backfills the faster tiers on a hit.
+    Entries record whether the upstream lookups found the reference; "not found" entries use a shorter TTL.
+    A tier that raises is skipped for TIER_RETRY_AFTER seconds instead of failing the verification.
+    """
+
+    def __init__(self, tiers: List[Any], ttl: int = VERIFICATION_CACHE_TTL, negative_ttl: int = VERIFICATION_CACHE_NEGATIVE_TTL, name: str = "verification"):
+        self.name = name
+        self.tiers = tiers
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._disabled_until: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {"hits": 0, "negative_hits": 0, "misses": 0, "sets": 0, "errors": 0}
+        for tier in tiers:
+            self.counters[f"{tier.name}_hits"] = 0
+
+    def _available(self, tier) -> bool:
+        return self._disabled_until.get(tier.name, 0) <= time.time()
+
+    def _tier_failed(self, tier, e: Exception) -> None:
+        print(f"Verification cache tier '{tier.name}' unavailable: {type(e).__name__} - {e}")
+        self.counters["errors"] += 1
+        self._disabled_until[tier.name] = time.time() + TIER_RETRY_AFTER
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Returns {"found": bool, "result": dict | None} or None on a miss."""
+        for depth, tier in enumerate(self.tiers):
+            if not self._available(tier):
+                continue
+            try:
+                raw = await tier.get(key)
+            except Exception as e:
+                self._tier_failed(tier, e)
+                continue
+            if raw is None:
+                continue
+            entry = json.loads(raw)
+            remaining = int(entry["expires_at"] - time.time())
+            if remaining <= 0:
+                continue
+            for upper in self.tiers[:depth]:
+                if self._available(upper):
+                    try:
+                        await upper.set(key, raw, remaining)
+                    except Exception as e:
+                        self._tier_failed(upper, e)
+            self.counters[f"{tier.name}_hits"] += 1
+            self.counters["hits" if entry["found"] else "negative_hits"] += 1
+            record_cache(self.name, hit=True)
+            return entry
+        self.counters["misses"] += 1
+        record_cache(self.name, hit=False)
+        return None
+
+    async def set(self, key: str, result: Optional[Dict[str, Any]]) -> None:
+        """Stores a verification result, or a negative entry when `result` is None."""
+        ttl = self.ttl if result is not None else self.negative_ttl
+        raw = json.dumps({"found": result is not None, "result": result, "expires_at": time.time() + ttl})
+        self.counters["sets"] += 1
+        for tier in self.tiers:
+            if not self._available(tier):
+                continue
+            try:
+                await tier.set(key, raw, ttl)
+            except Exception as e:
+                self._tier_failed(tier, e)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.counters["hits"] + self.counters["negative_hits"] + self.counters["misses"]
+        hit_rate = (lookups - self.counters["misses"]) / lookups if lookups else 0.0
+        return {**self.counters, "tiers": [tier.name for tier in self.tiers], "hit_rate": round(hit_rate, 4)}
+
+
+def build_verification_cache(size: int = VERIFICATION_CACHE_SIZE, ttl: int = VERIFICATION_CACHE_TTL, prefix: str = "verify", name: str = "verification") -> VerificationCache:
+    """Memory tier plus Redis and Postgres when configured. `prefix` namespaces the Redis keys."""
+    tiers: List[Any] = [MemoryTier(size)]
+    if REDIS_URL:
+        try:
+            tiers.append(RedisTier(REDIS_URL, prefix))
+        except Exception as e:
+            print(f"Redis verification cache disabled: {e}")
+    if VERIFICATION_CACHE_DB:
+        try:
+            tiers.append(DatabaseTier())
+        except Exception as e:
+            print(f"Database verification cache disabled: {e}")
+    return VerificationCache(tiers, ttl=ttl, name=name)
+
+
+verification_cache = build_verification_cache()
@@ -0,0 +1,23 @@
+"""
+Standalone job worker: `python worker.py`.
+Processes jobs submitted to POST /jobs/ from the shared Redis queue, so workers can be scaled
+separately from the API (run the API with JOB_WORKERS=0).
+"""
+import asyncio
+import os
+
+from main import create_database_schema, http_clients, job_runner, job_store
+from job_queue import run_worker
+
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "2"))
+
+async def serve():
+    await create_database_schema()
+    await http_clients.start()
+    try:
+        await asyncio.gather(*(run_worker(job_store, job_runner) for _ in range(WORKER_CONCURRENCY)))
+    finally:
+        await http_clients.close()
+
+if __name__ == "__main__":
+    asyncio.run(serve())
@@ -14,6 +14,7 @@ interface Reference {
   verification_score: number;
   format_suggestion?: string;
   source_url?: string;
+  index?: number;
 }
 
 interface Summary {
@@ -122,9 +123,15 @@ const App: React.FC = () => {
               if (type === 'status') {
                 setStatusLog(prev => [...prev, payload.message]);
               } else if (type === 'summary') {
-                setSummary(payload);
+                // Summaries only carry the counts that changed since the previous one.
+                setSummary(prev => ({ ...(prev ?? {}), ...payload } as Summary));
               } else if (type === 'reference') {
-                setReferences(prev => [...prev, payload]);
+                // References finish out of order; place each one by its original position.
+                setReferences(prev => {
+                  const next = [...prev];
+                  next[payload.index ?? next.length] = payload;
+                  return next;
+                });
               } else if (type === 'metadata') {
                 setPaperMetadata(payload);
               } else if (type === 'end') {
@@ -172,7 +179,7 @@ const App: React.FC = () => {
     }
   
     const reportData = {
-      references,
+      references: references.filter(Boolean),
       summary,
       paperMetadata,
       language: i18n.language, // Pass current language to backend
@@ -296,7 +303,7 @@ const App: React.FC = () => {
               </tr>
             </thead>
             <tbody>
-              {references.map((ref, index) => (
+              {references.map((ref, index) => ref && (
                 <tr key={index} className={getRowClass(ref.verification_score)}>
                   <td>
                     <span className="status-text">{ref.status === 'Verified' ? t('status_verified') : `${t('status_unverified_prefix')}${t('status_' + ref.status.replace(/ /g, '_'))}`}</span>